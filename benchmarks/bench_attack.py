@@ -0,0 +1,135 @@
+"""ATT&CK coverage matrix benchmark.
+
+Inserts synthetic IDS alerts into the technique bitmaps in the batches live
+ingestion would add them, then builds the coverage matrix under a set of
+time, sensor and severity filters, comparing each with the same counts from
+a pandas scan over the alert columns. The run exits non-zero when a matrix
+query is over budget.
+
+    python benchmarks/bench_attack.py --alerts 2000000 --budget-ms 50
+"""
+
+import argparse
+import json
+import os
+import platform as host
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from soc.attack import AttackCoverage  # noqa: E402
+from soc.synthetic import SyntheticGenerator  # noqa: E402
+
+FILTERS = [
+    {},
+    {"sensors": ["DMZ"]},
+    {"severities": ["High", "Critical"]},
+    {"hours": 1},
+    {"hours": 1, "sensors": ["DMZ", "Cloud"], "severities": ["Critical"]},
+    {"hours": 4, "sensors": ["Internal"]},
+]
+
+
+def run(alerts: int, batch: int, seed: int) -> Dict[str, Any]:
+    generator = SyntheticGenerator(seed)
+    rng = generator.rng("bench-attack")
+    coverage = AttackCoverage()
+    now_ms = int(time.time() * 1000)
+    edges = np.linspace(now_ms - 8 * 3600000, now_ms, -(-alerts // batch) + 1).astype(np.int64)
+    counters = {}
+    columns: Dict[str, List[Any]] = {"timestamp": [], "sensor_location": [], "severity": [], "mitre_technique": []}
+    insert_s = 0.0
+    for index, start in enumerate(range(0, alerts, batch)):
+        times = np.sort(rng.integers(edges[index], edges[index + 1], min(batch, alerts - start)))
+        records = generator.alerts(rng, times, [], counters)
+        started = time.perf_counter()
+        coverage.add_records("ids_alerts", records)
+        insert_s += time.perf_counter() - started
+        for name, values in columns.items():
+            values.extend(record[name] for record in records)
+        del records
+    frame = pd.DataFrame(columns)
+    del columns
+
+    now = datetime.fromtimestamp(now_ms / 1000)
+    queries = []
+    for spec in FILTERS:
+        start = now - timedelta(hours=spec["hours"]) if "hours" in spec else None
+        matrix = coverage.matrix(start, None, {"sensor_location": spec.get("sensors"), "severity": spec.get("severities")})
+        started = time.perf_counter()
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= (frame["timestamp"] >= start).to_numpy()
+        if "sensors" in spec:
+            mask &= frame["sensor_location"].isin(spec["sensors"]).to_numpy()
+        if "severities" in spec:
+            mask &= frame["severity"].isin(spec["severities"]).to_numpy()
+        scanned = frame.loc[mask, "mitre_technique"].value_counts().to_dict()
+        scan_ms = round((time.perf_counter() - started) * 1000, 2)
+        counted = {technique: count for technique, count in zip(matrix.frame["technique"], matrix.frame["ids_alerts"]) if count}
+        queries.append({
+            "filters": spec,
+            "alerts": int(mask.sum()),
+            "ms": matrix.elapsed_ms,
+            "bitmap_ops": matrix.operations,
+            "scan_ms": scan_ms,
+            "matches_scan": counted == scanned,
+        })
+
+    index = coverage.stats()["ids_alerts"]
+    # Retention drops the oldest hour; whole dead chunks leave the bitmaps
+    started = time.perf_counter()
+    expired = coverage.expire("ids_alerts", now - timedelta(hours=7))
+    expire_ms = round((time.perf_counter() - started) * 1000, 2)
+    after = coverage.matrix(now - timedelta(hours=1))
+
+    return {
+        "alerts": alerts,
+        "batch": batch,
+        "insert_s": round(insert_s, 2),
+        "insert_alerts_per_s": round(alerts / insert_s),
+        "index": index,
+        "queries": queries,
+        "expire": {"expired": expired, "ms": expire_ms, "matrix_ms_after": after.elapsed_ms,
+                   "index_after": coverage.stats()["ids_alerts"]},
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=2000000)
+    parser.add_argument("--batch", type=int, default=50000, help="alerts inserted per batch")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="budget for each matrix query")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.alerts, args.batch, args.seed)
+    report["host"] = host.platform()
+    report["budget_ms"] = args.budget_ms
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    over = [json.dumps(query["filters"]) for query in report["queries"] if query["ms"] > args.budget_ms]
+    wrong = [json.dumps(query["filters"]) for query in report["queries"] if not query["matches_scan"]]
+    if wrong:
+        print("MISMATCH WITH SCAN:\n  " + "\n  ".join(wrong))
+    if over:
+        print("OVER BUDGET:\n  " + "\n  ".join(over))
+    if over or wrong:
+        return 1
+    print(f"all matrix queries within {args.budget_ms:g} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Login latency benchmark.
+
+Fires a burst of concurrent logins at an ``AuthService`` (one thread per
+login, the way simultaneous Streamlit sessions call it) and reports
+p50/p95/p99 of the end-to-end login time, queueing on the hash pool
+included, against a latency budget. A mix of valid and invalid passwords is
+used, spread over many client addresses so no lockout kicks in. The run
+exits non-zero when p99 is over budget.
+
+    python benchmarks/bench_auth.py --logins 50 --budget-ms 300
+    python benchmarks/bench_auth.py --workers 8 --n 32768
+
+The cost defaults to the platform's and cannot go below the scrypt security
+floor; a host with too few cores for the burst reports the target as unmet
+rather than being benchmarked at a weaker hash.
+"""
+
+import argparse
+import json
+import os
+import platform as host
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from soc import auth  # noqa: E402
+
+
+def run(logins: int, workers: Optional[int], n: int, invalid_fraction: float) -> Dict[str, Any]:
+    service = auth.AuthService(workers=workers, user_limit=logins + 1, ip_limit=logins + 1, n=n)
+    for index in range(logins):
+        service.register(f"analyst{index}", f"secret{index}")
+    # Warm-up login waits for every registration hash, so the burst measures verification only
+    for index in range(logins):
+        service.authenticate(f"analyst{index}", f"secret{index}", "127.0.0.1")
+
+    latencies = [0.0] * logins
+    outcomes = [""] * logins
+    start = threading.Barrier(logins)
+
+    def login(index: int):
+        password = f"secret{index}" if index >= logins * invalid_fraction else "wrong"
+        start.wait()
+        started = time.perf_counter()
+        outcomes[index] = service.authenticate(f"analyst{index}", password, f"10.0.{index // 250}.{index % 250}")
+        latencies[index] = time.perf_counter() - started
+
+    threads = [threading.Thread(target=login, args=(index,)) for index in range(logins)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    service.shutdown()
+
+    p50, p95, p99 = (float(value) * 1000 for value in np.percentile(latencies, [50, 95, 99]))
+    return {
+        "logins": logins,
+        "workers": service.workers,
+        "n": service.n,
+        "estimated_burst_ms": round(service.burst_seconds(logins) * 1000, 2),
+        "cpus": os.cpu_count(),
+        "outcomes": {outcome: outcomes.count(outcome) for outcome in sorted(set(outcomes))},
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50, help="concurrent login attempts")
+    parser.add_argument("--workers", type=int, default=None, help="hash pool size (default: AuthService's)")
+    parser.add_argument("--n", type=int, default=auth.SCRYPT_N,
+                        help=f"scrypt cost parameter, at least {auth.SCRYPT_MIN_N} (default: %(default)s)")
+    parser.add_argument("--invalid-fraction", type=float, default=0.2)
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="p99 login latency budget")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.logins, args.workers, args.n, args.invalid_fraction)
+    report["host"] = host.platform()
+    report["budget_ms"] = args.budget_ms
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    if report["p99_ms"] > args.budget_ms:
+        print(f"TARGET UNMET on this host: p99 {report['p99_ms']:g} ms > {args.budget_ms:g} ms at n={report['n']} "
+              f"({report['cpus']} CPU(s), {report['workers']} hash worker(s)); hashes are not weakened to meet it, "
+              f"so the target needs more cores")
+        return 1
+    print(f"p99 {report['p99_ms']:g} ms within {args.budget_ms:g} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
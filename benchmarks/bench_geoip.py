@@ -0,0 +1,90 @@
+"""Geo/ASN enrichment benchmark.
+
+Times enrichment of a batch of addresses against a range database: packed
+addresses straight through ``searchsorted`` (the flow path), and address
+strings through the LRU cache, cold and then warm (the record path), with
+the strings drawn from a smaller set of hot addresses the way attacker IPs
+repeat. Without ``--db`` the synthetic database is used. The run exits
+non-zero when a path is over budget.
+
+    python benchmarks/bench_geoip.py --ips 1000000 --budget-ms 1000
+    python benchmarks/bench_geoip.py --db data/ip-ranges.csv --distinct 50000
+"""
+
+import argparse
+import json
+import os
+import platform as host
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from soc import geoip  # noqa: E402
+from soc.flows import ips_to_strings  # noqa: E402
+
+
+def timed_ms(func) -> float:
+    started = time.perf_counter()
+    func()
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def run(ips: int, distinct: int, db: str, seed: int) -> Dict[str, Any]:
+    opened = time.perf_counter()
+    database = geoip.open_database(db)
+    open_ms = round((time.perf_counter() - opened) * 1000, 2)
+    enricher = geoip.GeoEnricher(database)
+    rng = np.random.default_rng(seed)
+    keys = rng.integers(0, 2 ** 32, ips, dtype=np.uint64).astype(np.uint32)
+    hot = ips_to_strings(rng.integers(0, 2 ** 32, distinct, dtype=np.uint64).astype(np.uint32)).tolist()
+    strings = [hot[index] for index in rng.integers(0, distinct, ips).tolist()]
+
+    # First call registers the database's countries as geo_location labels
+    enricher.location_codes(keys[:1000])
+    report = {
+        "ips": ips,
+        "distinct": distinct,
+        "ranges": len(database),
+        "source": database.source,
+        "open_ms": open_ms,
+        "packed_ms": timed_ms(lambda: enricher.location_codes(keys)),
+        "strings_cold_ms": timed_ms(lambda: enricher.lookup_many(strings)),
+        "strings_warm_ms": timed_ms(lambda: enricher.lookup_many(strings)),
+    }
+    report.update(enricher.stats())
+    return report
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ips", type=int, default=1000000, help="addresses per batch")
+    parser.add_argument("--distinct", type=int, default=20000, help="distinct addresses in the string batch")
+    parser.add_argument("--db", default=None, help="range CSV or compiled database (default: synthetic)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="budget for each enrichment path")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.ips, args.distinct, args.db, args.seed)
+    report["host"] = host.platform()
+    report["budget_ms"] = args.budget_ms
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    over = [name for name in ("packed_ms", "strings_cold_ms", "strings_warm_ms") if report[name] > args.budget_ms]
+    if over:
+        print(f"OVER BUDGET: {', '.join(over)} > {args.budget_ms:g} ms")
+        return 1
+    print(f"all paths within {args.budget_ms:g} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Ingest throughput benchmark.
+
+Writes a synthetic NDJSON capture split into shards, then ingests it into a
+fresh platform with the thread pipeline and with the process pipeline at
+several worker counts. For each run it reports events per second from the
+first batch to the last, and the latency of dashboard calls (KPI tiles and
+the enterprise risk score) made from the main thread while ingestion is
+running, which is the latency a Streamlit session would see.
+
+Process workers only scale with the CPUs they get: on a single core the
+process pipeline can at best match the thread pipeline, and the numbers
+show the cost of the handover rather than any speed-up.
+
+    python benchmarks/bench_ingest.py --events 200000 --workers 1 2 4
+"""
+
+import argparse
+import json
+import os
+import platform as host
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def write_capture(directory: str, events: int, shards: int, seed: int) -> List[str]:
+    """NDJSON flow and alert lines spread round-robin over ``shards`` files"""
+    from soc.synthetic import SyntheticGenerator, flow_lines, record_lines
+
+    generator = SyntheticGenerator(seed)
+    rng = generator.rng("bench-ingest")
+    times = np.sort(rng.integers(0, 3_600_000, events)) + int(datetime(2024, 1, 1).timestamp() * 1000)
+    flows = generator.flows(rng, times[: events - events // 100])
+    alerts = generator.alerts(rng, times[events - events // 100:], ["10.0.1.1"], {})
+    lines = flow_lines(flows) + record_lines(alerts)
+    paths = []
+    for index in range(shards):
+        path = os.path.join(directory, f"capture-{index}.ndjson")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(lines[index::shards]) + "\n")
+        paths.append(path)
+    return paths
+
+
+def run_case(mode: str, workers: int, paths: List[str], events: int, timeout: float) -> Dict[str, Any]:
+    import app
+    from soc.ingest import FileTailSource
+
+    platform = app.EnterpriseSOCPlatform()
+    platform.materialize(*platform.ENTERPRISE_DATASETS)
+    started = time.perf_counter()
+    if mode == "thread":
+        platform.start_ingestion([FileTailSource(path, "ndjson", from_start=True) for path in paths], workers=workers)
+    else:
+        platform.start_process_ingestion(",".join(f"ndjson:{path}" for path in paths), workers=workers, from_start=True)
+    metrics = platform.ingest_pipeline.metrics
+
+    latencies: Dict[str, List[float]] = {"kpi_tiles": [], "risk_score": []}
+    calls = {"kpi_tiles": lambda: app.build_kpi_tiles(platform), "risk_score": platform.calculate_enterprise_risk_score}
+    while metrics.events_total < events and time.perf_counter() - started < timeout:
+        for name, call in calls.items():
+            called = time.perf_counter()
+            call()
+            latencies[name].append(time.perf_counter() - called)
+        time.sleep(0.02)
+    elapsed = time.perf_counter() - started
+    ingested = metrics.events_total
+    platform.stop_ingestion()
+
+    report = {
+        "mode": mode,
+        "workers": workers,
+        "events": ingested,
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(ingested / elapsed),
+        "complete": ingested >= events,
+    }
+    for name, samples in latencies.items():
+        if samples:
+            p50, p99 = (float(value) * 1000 for value in np.percentile(samples, [50, 99]))
+            report[f"{name}_p50_ms"] = round(p50, 2)
+            report[f"{name}_p99_ms"] = round(p99, 2)
+    return report
+
+
+def run(events: int, workers: List[int], modes: List[str], seed: int, timeout: float) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_capture(directory, events, max(workers), seed)
+        results = [run_case(mode, count, paths, events, timeout) for mode in modes for count in workers]
+    return {"events": events, "cpus": os.cpu_count(), "results": results}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000, help="events in the capture")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", choices=["thread", "process"], default=["thread", "process"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds allowed per run")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.events, args.workers, args.modes, args.seed, args.timeout)
+    report["host"] = host.platform()
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 0 if all(result["complete"] for result in report["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""IOC matching benchmark.
+
+Compiles a synthetic indicator feed (IPs, CIDRs, domains, hashes and URL
+fragments in feed proportions, plus extra URL paths so the Aho-Corasick
+automaton is realistically large) and then matches one second's worth of
+events against it: flow columns through the packed-IP path and alert-style
+records with URL, payload and DNS fields through the record path. A share
+of the events carries a known indicator so every path also does hit
+bookkeeping. Reports compile time and events per second; the run
+exits non-zero when matching falls short of the target rate.
+
+    python benchmarks/bench_ioc.py --iocs 1000000 --events 100000 --target-eps 100000
+    python benchmarks/bench_ioc.py --iocs 200000 --record-share 0.25
+"""
+
+import argparse
+import json
+import os
+import platform as host
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from soc.flows import ips_to_strings, pack_ip_strings  # noqa: E402
+from soc.ioc import IOCEngine  # noqa: E402
+from soc.synthetic import SyntheticGenerator  # noqa: E402
+
+THREATS = ["APT29", "APT28", "Lazarus Group", "Emotet", "TrickBot"]
+PATHS = ["/index.php?id=", "/login", "/api/v1/items/", "/static/app.js", "/search?q="]
+
+
+def indicators(count: int, url_share: float, seed: int) -> List[Dict[str, Any]]:
+    generator = SyntheticGenerator(seed=seed)
+    rng = generator.rng("bench_ioc")
+    urls = int(count * url_share)
+    feed = generator.threat_indicators(rng, count - urls, THREATS)
+    tokens = rng.bytes(6 * urls).hex()
+    feed += [{"type": "url", "value": f"/{tokens[12 * index:12 * index + 12]}.php", "threat": "Webshell", "severity": "HIGH"}
+             for index in range(urls)]
+    return feed
+
+
+def events(feed: List[Dict[str, Any]], count: int, record_share: float, hit_share: float, seed: int):
+    """(flow columns, records) for one batch of ``count`` events"""
+    rng = np.random.default_rng(seed)
+    by_type: Dict[str, List[str]] = {}
+    for indicator in feed:
+        by_type.setdefault(indicator["type"], []).append(indicator["value"])
+    records = int(count * record_share)
+    flows = count - records
+
+    source_ips = rng.integers(1 << 24, 224 << 24, flows, dtype=np.uint64).astype(np.uint32)
+    dest_ips = rng.integers(1 << 24, 224 << 24, flows, dtype=np.uint64).astype(np.uint32)
+    known = pack_ip_strings(by_type.get("ip", ["0.0.0.0"]))
+    hits = np.flatnonzero(rng.random(flows) < hit_share)
+    dest_ips[hits] = known[rng.integers(0, len(known), len(hits))]
+
+    domains = by_type.get("domain", ["example.com"])
+    urls = by_type.get("url", ["/"])
+    attackers = ips_to_strings(rng.integers(1 << 24, 224 << 24, records, dtype=np.uint64).astype(np.uint32)).tolist()
+    hit = (rng.random(records) < hit_share).tolist()
+    picks = rng.integers(0, 1 << 30, (records, 3)).tolist()
+    alert_records = []
+    for index in range(records):
+        domain_pick, url_pick, path_pick = picks[index]
+        if hit[index]:
+            query = f"cdn.{domains[domain_pick % len(domains)]}"
+            url = f"http://{query}{urls[url_pick % len(urls)]}"
+        else:
+            query = f"host{domain_pick % 100000}.example.com"
+            url = f"http://{query}{PATHS[path_pick % len(PATHS)]}{url_pick}"
+        alert_records.append({"source_ip": attackers[index], "dest_ip": "10.0.0.5", "query": query, "url": url,
+                              "payload_info": f"GET {url} HTTP/1.1 from {attackers[index]}"})
+    return {"source_ip": source_ips, "dest_ip": dest_ips}, alert_records
+
+
+def run(iocs: int, count: int, record_share: float, url_share: float, hit_share: float, seed: int) -> Dict[str, Any]:
+    feed = indicators(iocs, url_share, seed)
+    engine = IOCEngine()
+    started = time.perf_counter()
+    engine.load(feed)
+    compile_ms = (time.perf_counter() - started) * 1000
+    compiled = engine.compiled
+
+    flow_columns, records = events(feed, count, record_share, hit_share, seed)
+    started = time.perf_counter()
+    flow_hits = engine.match_batch(flow_columns)
+    flow_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    record_hits = engine.match_batch(records=records)
+    record_seconds = time.perf_counter() - started
+
+    flows = len(flow_columns["source_ip"])
+    total = flow_seconds + record_seconds
+    return {
+        "iocs": len(compiled),
+        "ips": len(compiled.ip_keys),
+        "cidr_segments": len(compiled.segment_starts),
+        "domains": len(compiled.domains),
+        "hashes": len(compiled.hashes),
+        "url_nodes": len(compiled.urls) if compiled.urls is not None else 0,
+        "compile_ms": round(compile_ms, 1),
+        "events": count,
+        "flows": flows,
+        "records": len(records),
+        "flow_ms": round(flow_seconds * 1000, 2),
+        "record_ms": round(record_seconds * 1000, 2),
+        "flow_hits": sum(hit["count"] for hit in flow_hits),
+        "record_hits": sum(hit["count"] for hit in record_hits),
+        "flows_per_second": round(flows / flow_seconds) if flow_seconds else None,
+        "records_per_second": round(len(records) / record_seconds) if record_seconds else None,
+        "events_per_second": round(count / total) if total else None,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iocs", type=int, default=1000000, help="indicators in the compiled set")
+    parser.add_argument("--events", type=int, default=100000, help="events matched in the timed batch")
+    parser.add_argument("--record-share", type=float, default=0.1, help="share of events that are records, not flows")
+    parser.add_argument("--url-share", type=float, default=0.02, help="share of indicators that are URL fragments")
+    parser.add_argument("--hit-share", type=float, default=0.01, help="share of events carrying a known indicator")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--target-eps", type=float, default=100000.0, help="events per second matching must sustain")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.iocs, args.events, args.record_share, args.url_share, args.hit_share, args.seed)
+    report["host"] = host.platform()
+    report["target_eps"] = args.target_eps
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    if report["events_per_second"] < args.target_eps:
+        print(f"UNDER TARGET: {report['events_per_second']:,} events/s < {args.target_eps:,.0f} events/s")
+        return 1
+    print(f"{report['events_per_second']:,} events/s meets {args.target_eps:,.0f} events/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Lateral-movement graph benchmark.
+
+Fills a flow table with synthetic flows in which a share of the traffic runs
+between endpoints over SSH/SMB/RDP, folds it into the host graph in the
+batches live ingestion would append, then times the cached queries on the
+result: reachability within k hops, attack paths to Critical endpoints and
+sampled-betweenness pivots. Each query is timed cold (first run against the
+current graph version) and warm (served from the cache). The run exits
+non-zero when a query is over budget.
+
+    python benchmarks/bench_lateral.py --flows 200000 --budget-ms 1000
+"""
+
+import argparse
+import json
+import os
+import platform as host
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from soc.flows import FlowTable, int_to_ip  # noqa: E402
+from soc.lateral import LateralMovementGraph, pack_hosts  # noqa: E402
+from soc.synthetic import SyntheticGenerator  # noqa: E402
+
+
+def timed_twice(query: Callable[[], Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    result = query()
+    cold_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    query()
+    warm_ms = (time.perf_counter() - started) * 1000
+    return {"result": result, "cold_ms": round(cold_ms, 2), "warm_ms": round(warm_ms, 3)}
+
+
+def run(flows: int, endpoints: int, batch: int, seed: int) -> Dict[str, Any]:
+    generator = SyntheticGenerator(seed)
+    fleet = generator.endpoints(generator.rng("bench-lateral-endpoints"), endpoints, datetime.now())
+    addresses = [endpoint["ip_address"] for endpoint in fleet]
+    critical = set(pack_hosts(endpoint["ip_address"] for endpoint in fleet if endpoint["criticality"] == "Critical"))
+    rng = generator.rng("bench-lateral")
+    table = FlowTable(flows)
+    graph = LateralMovementGraph(seed=seed)
+    now_ms = int(time.time() * 1000)
+    edges = np.linspace(now_ms - 3600000, now_ms, -(-flows // batch) + 1).astype(np.int64)
+    sync_ms = []
+    for index, start in enumerate(range(0, flows, batch)):
+        times = np.sort(rng.integers(edges[index], edges[index + 1], min(batch, flows - start)))
+        table.append_batch(generator.flows(rng, times, addresses))
+        started = time.perf_counter()
+        graph.sync(table)
+        sync_ms.append((time.perf_counter() - started) * 1000)
+
+    # Compromised hosts: the endpoints with the most outgoing internal edges
+    fanout = sorted(((graph.graph.out_degree(address), address) for address in pack_hosts(addresses)
+                     if address in graph.graph), reverse=True)
+    compromised = [address for _, address in fanout[:5]]
+    queries = []
+    for hops in (2, 3, 4):
+        timing = timed_twice(lambda: graph.reachable(compromised[0], hops))
+        queries.append({"query": f"reachable from {int_to_ip(compromised[0])} within {hops} hops",
+                        "matches": len(timing.pop("result")), **timing})
+    for max_hops in (3, 6):
+        timing = timed_twice(lambda: graph.attack_paths(compromised, critical, max_hops))
+        paths = timing.pop("result")
+        queries.append({"query": f"attack paths from {len(compromised)} hosts to Critical within {max_hops} hops",
+                        "matches": len(paths), "longest": max((len(path) - 1 for path in paths), default=0), **timing})
+    timing = timed_twice(lambda: graph.pivots(20))
+    estimate = timing.pop("result")
+    queries.append({"query": "top 20 pivot hosts", "matches": len(estimate["hosts"]),
+                    "sampled": estimate["sampled"], "candidates": estimate["candidates"], **timing})
+
+    return {
+        "flows": flows,
+        "endpoints": endpoints,
+        "batch": batch,
+        "build_s": round(sum(sync_ms) / 1000, 2),
+        "last_sync_ms": round(sync_ms[-1], 2),
+        "graph": graph.stats(),
+        "queries": queries,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flows", type=int, default=200000)
+    parser.add_argument("--endpoints", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=10000, help="flows appended between syncs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="budget for each query")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.flows, args.endpoints, args.batch, args.seed)
+    report["host"] = host.platform()
+    report["budget_ms"] = args.budget_ms
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    over = [query["query"] for query in report["queries"] if max(query["cold_ms"], query["warm_ms"]) > args.budget_ms]
+    if over:
+        print("OVER BUDGET:\n  " + "\n  ".join(over))
+        return 1
+    print(f"all queries within {args.budget_ms:g} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
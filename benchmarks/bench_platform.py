@@ -0,0 +1,191 @@
+"""Platform performance benchmarks.
+
+Times platform construction, construction plus generating every lazy
+dataset (``platform_ready``), every ``generate_*`` method, the enterprise
+risk score and a full dashboard render (through Streamlit's headless
+AppTest) at several data scale factors, and records peak traced memory for
+each stage. Background dataset warming is switched off
+(``SOC_WARM_DATASETS=0``) so no render races a warming thread. Results are
+written as JSON and compared against a stored baseline; a stage that got
+slower or bigger than the tolerance allows is reported as a regression and
+the run exits non-zero.
+
+    python benchmarks/bench_platform.py --scales 1 10 100
+    python benchmarks/bench_platform.py --scales 1 10 --save-baseline
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform as host
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Any
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results", "latest.json")
+
+# Credentials of a built-in analyst account, used to get past the login page
+LOGIN = ("soc_manager", "Enterprise2024!")
+
+sys.path.insert(0, ROOT)
+
+from soc.datasets import lazy_datasets  # noqa: E402
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Best wall time over ``repeat`` runs, plus peak traced memory of one extra run"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    # Memory is traced in a separate run so tracing overhead never lands in the timings
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(timings), 6), "peak_mb": round(peak / 2 ** 20, 3)}
+
+
+def bench_platform(scale: float, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Construction, data generation and risk scoring on a platform instance"""
+    os.environ["SOC_DATA_SCALE"] = str(scale)
+    import app
+
+    results = {"platform_init": measure(app.EnterpriseSOCPlatform, repeat)}
+    datasets = list(lazy_datasets(app.EnterpriseSOCPlatform))
+    results["platform_ready"] = measure(lambda: app.EnterpriseSOCPlatform().materialize(*datasets), repeat)
+    platform = app.EnterpriseSOCPlatform()
+    generators = sorted(name for name in dir(platform) if name.startswith("generate_") and callable(getattr(platform, name)))
+    for name in generators:
+        results[name] = measure(getattr(platform, name), repeat)
+    results["calculate_enterprise_risk_score"] = measure(platform.calculate_enterprise_risk_score, repeat)
+    platform.stop_ingestion()
+    return results
+
+
+def bench_dashboard(scale: float, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Login page and full enterprise dashboard renders through AppTest"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["SOC_DATA_SCALE"] = str(scale)
+    # The shared platform is cached per process; drop the one built at the previous scale
+    st.cache_resource.clear()
+    at = AppTest.from_file(APP_PATH, default_timeout=600)
+    results = {"login_render": measure(at.run, repeat)}
+    at.text_input[0].input(LOGIN[0])
+    at.text_input[1].input(LOGIN[1])
+    at.button[0].click()
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"Dashboard failed to render: {at.exception[0].value}")
+    results["show_enterprise_dashboard"] = measure(at.run, repeat)
+    return results
+
+
+def run(scales: List[float], repeat: int) -> Dict[str, Any]:
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "machine": host.machine(),
+            "processor": host.processor() or host.machine(),
+            "commit": git_commit(),
+            "repeat": repeat,
+        },
+        "results": {},
+    }
+    for scale in scales:
+        key = f"{scale:g}x"
+        print(f"== scale {key}", flush=True)
+        results = bench_platform(scale, repeat)
+        results.update(bench_dashboard(scale, repeat))
+        for stage, numbers in results.items():
+            print(f"   {stage:<36} {numbers['seconds'] * 1000:>11.2f} ms {numbers['peak_mb']:>10.2f} MB", flush=True)
+        report["results"][key] = results
+    return report
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_seconds: float, min_mb: float) -> List[str]:
+    """Stages slower or bigger than baseline by more than the tolerance"""
+    regressions = []
+    for scale, stages in report["results"].items():
+        for stage, current in stages.items():
+            previous = baseline.get("results", {}).get(scale, {}).get(stage)
+            if previous is None:
+                continue
+            # Absolute floors keep noise on very short or very small stages from failing the run
+            for metric, floor, unit in (("seconds", min_seconds, "s"), ("peak_mb", min_mb, "MB")):
+                before, after = previous[metric], current[metric]
+                if after > before * (1 + tolerance) and after - before > floor:
+                    change = (after / before - 1) * 100 if before else float("inf")
+                    regressions.append(f"{scale} {stage}: {metric} {before:g}{unit} -> {after:g}{unit} (+{change:.0f}%)")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage; the best is kept")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown or growth")
+    parser.add_argument("--min-seconds", type=float, default=0.05)
+    parser.add_argument("--min-mb", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    # Timings must not depend on how far a background warming thread has got
+    os.environ["SOC_WARM_DATASETS"] = "0"
+    # Event store, alert spill files and logs go to a scratch directory
+    workdir = tempfile.mkdtemp(prefix="soc-bench-")
+    os.chdir(workdir)
+    report = run(args.scales, args.repeat)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    regressions = compare(report, baseline, args.tolerance, args.min_seconds, args.min_mb)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"no regressions against {args.baseline} (baseline commit {baseline['meta'].get('commit')})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
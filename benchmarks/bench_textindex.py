@@ -0,0 +1,124 @@
+"""Full-text index benchmark.
+
+Builds the inverted index over synthetic IDS alerts, appended in batches
+the way ingestion syncs them, then runs a set of keyword, phrase, boolean
+and time-filtered searches and the same single-word search as a scan over
+every payload for comparison. Payloads name the alert's addresses and
+signature so the index also holds rare, high-cardinality terms. The run
+exits non-zero when a search is over budget.
+
+    python benchmarks/bench_textindex.py --alerts 2000000 --budget-ms 100
+"""
+
+import argparse
+import json
+import os
+import platform as host
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from soc.synthetic import SyntheticGenerator  # noqa: E402
+from soc.textindex import TextIndex  # noqa: E402
+
+SEARCHES = [
+    "ransomware",
+    '"exploit kit"',
+    "trojan OR backdoor -tcp",
+    "malicious payload detected ransomware",
+    "{source_ip}",
+    "{signature} AND (ransomware OR trojan)",
+]
+
+
+def build_alerts(alerts: int, seed: int, batch: int) -> List[List[Dict[str, Any]]]:
+    generator = SyntheticGenerator(seed)
+    rng = generator.rng("bench-textindex")
+    now_ms = int(time.time() * 1000)
+    counters = {}
+    batches = []
+    edges = np.linspace(now_ms - 8 * 3600000, now_ms, -(-alerts // batch) + 1).astype(np.int64)
+    for index, start in enumerate(range(0, alerts, batch)):
+        times = np.sort(rng.integers(edges[index], edges[index + 1], min(batch, alerts - start)))
+        records = generator.alerts(rng, times, [], counters)
+        for record in records:
+            record["payload_info"] += (f" from {record['source_ip']} to {record['dest_ip']}"
+                                       f" {record['signature']} over {record['protocol']}")
+        batches.append(records)
+    return batches
+
+
+def run(alerts: int, batch: int, seed: int) -> Dict[str, Any]:
+    batches = build_alerts(alerts, seed, batch)
+    index = TextIndex()
+    records: List[Dict[str, Any]] = []
+    sync_ms = []
+    for records_batch in batches:
+        records.extend(records_batch)
+        started = time.perf_counter()
+        index.sync("ids_alerts", records)
+        sync_ms.append((time.perf_counter() - started) * 1000)
+
+    sample = records[len(records) // 2]
+    searches = []
+    for template in SEARCHES:
+        query = template.format(source_ip=sample["source_ip"], signature=sample["signature"])
+        cold = index.search(query)
+        warm = index.search(query)
+        searches.append({"query": query, "matches": cold.total, "cold_ms": cold.elapsed_ms, "warm_ms": warm.elapsed_ms})
+    window = index.search("ransomware", start=datetime.now() - timedelta(hours=1))
+    searches.append({"query": "ransomware (last hour)", "matches": window.total, "cold_ms": window.elapsed_ms,
+                     "warm_ms": window.elapsed_ms})
+
+    # The same single-word search as a scan over every payload
+    word = re.compile(r"\bransomware\b")
+    started = time.perf_counter()
+    scanned = sum(1 for record in records if word.search(record["payload_info"].lower()))
+    scan_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    return {
+        "alerts": alerts,
+        "batch": batch,
+        "build_s": round(sum(sync_ms) / 1000, 2),
+        "build_docs_per_s": round(alerts / (sum(sync_ms) / 1000)),
+        "last_sync_ms": round(sync_ms[-1], 2),
+        "index": index.stats(),
+        "searches": searches,
+        "scan": {"query": "ransomware", "matches": scanned, "ms": scan_ms},
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=2000000)
+    parser.add_argument("--batch", type=int, default=50000, help="alerts appended between syncs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="budget for each search")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.alerts, args.batch, args.seed)
+    report["host"] = host.platform()
+    report["budget_ms"] = args.budget_ms
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    over = [search["query"] for search in report["searches"] if max(search["cold_ms"], search["warm_ms"]) > args.budget_ms]
+    if over:
+        print("OVER BUDGET:\n  " + "\n  ".join(over))
+        return 1
+    print(f"all searches within {args.budget_ms:g} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""Data engines backing the Enterprise SOC Platform.
+
+The Streamlit UI lives in ``app.py``; the modules in this package hold the
+data structures and processing stages it reads from, so they can also be
+used from worker processes, CLIs and benchmarks without importing Streamlit.
+"""
@@ -0,0 +1,101 @@
+"""Incrementally maintained platform aggregates.
+
+Dashboard KPIs and the enterprise risk score are derived from counters that
+are adjusted whenever a threat, endpoint or asset is added, changed or
+removed, so reading them never rescans the underlying datasets.
+"""
+
+import threading
+from typing import Callable, Dict, Any
+
+# Dataset name -> function mapping one record to its counter contributions
+COUNTER_RULES: Dict[str, Callable[[Dict[str, Any]], Dict[str, int]]] = {
+    "live_threats": lambda t: {
+        "critical_threats": t.get("severity") == "Critical",
+        "high_threats": t.get("severity") == "High",
+        "active_incidents": t.get("status") == "Active",
+    },
+    "endpoint_telemetry": lambda e: {
+        "endpoints_at_risk": e.get("risk_score", 0) > 70,
+    },
+    "cloud_assets": lambda a: {
+        "open_vulnerabilities": a.get("vulnerabilities", 0),
+    },
+    "iot_devices": lambda d: {
+        "open_vulnerabilities": d.get("vulnerabilities", 0),
+    },
+}
+
+
+class PlatformAggregates:
+    """Counters per dataset plus keyed groups whose mean is read in O(1)"""
+
+    def __init__(self, rules: Dict[str, Callable] = None):
+        self.rules = COUNTER_RULES if rules is None else rules
+        self._counters: Dict[str, Dict[str, int]] = {dataset: {} for dataset in self.rules}
+        self._groups: Dict[str, Dict[str, float]] = {}
+        self._group_sums: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Bumped on every change so readers can tell whether anything moved; versions is per dataset or group
+        self.version = 0
+        self.versions: Dict[str, int] = {}
+
+    def _bump(self, name: str):
+        self.version += 1
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+    def _apply(self, dataset: str, record: Dict[str, Any], sign: int):
+        counters = self._counters[dataset]
+        for name, value in self.rules[dataset](record).items():
+            counters[name] = counters.get(name, 0) + sign * int(value)
+
+    def add(self, dataset: str, record: Dict[str, Any]):
+        with self._lock:
+            self._apply(dataset, record, 1)
+            self._bump(dataset)
+
+    def remove(self, dataset: str, record: Dict[str, Any]):
+        with self._lock:
+            self._apply(dataset, record, -1)
+            self._bump(dataset)
+
+    def update(self, dataset: str, before: Dict[str, Any], after: Dict[str, Any]):
+        with self._lock:
+            self._apply(dataset, before, -1)
+            self._apply(dataset, after, 1)
+            self._bump(dataset)
+
+    def rebuild(self, dataset: str, records):
+        """Recount a dataset after it was replaced wholesale"""
+        with self._lock:
+            self._counters[dataset] = {}
+            for record in records:
+                self._apply(dataset, record, 1)
+            self._bump(dataset)
+
+    def get(self, dataset: str, name: str) -> int:
+        return self._counters[dataset].get(name, 0)
+
+    def total(self, name: str) -> int:
+        """Counter summed over every dataset that contributes to it"""
+        return sum(counters.get(name, 0) for counters in self._counters.values())
+
+    def set_group(self, group: str, values: Dict[str, float]):
+        with self._lock:
+            self._groups[group] = dict(values)
+            self._group_sums[group] = sum([value for value in self._groups[group].values()])
+            self._bump(group)
+
+    def set_group_value(self, group: str, key: str, value: float):
+        with self._lock:
+            members = self._groups.setdefault(group, {})
+            if members.get(key) == value:
+                return
+            members[key] = value
+            # Re-summed in insertion order so the mean matches a full rescan exactly
+            self._group_sums[group] = sum([member for member in members.values()])
+            self._bump(group)
+
+    def group_mean(self, group: str) -> float:
+        """Mean of a group; raises ZeroDivisionError for an empty group"""
+        return self._group_sums.get(group, 0) / len(self._groups.get(group, {}))
@@ -0,0 +1,111 @@
+"""Bounded alert history.
+
+``AlertRingBuffer`` keeps the most recent security events in a fixed-size
+ring with secondary indexes by severity, type and user. Events pushed out of
+the ring are appended to an NDJSON spill file so the full history survives.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Dict, List, Any, Optional, Iterator
+
+# Event fields that get a secondary index
+INDEXED_FIELDS = ("severity", "type", "user")
+
+
+class AlertRingBuffer:
+    """Fixed-capacity event log with O(1) append and O(n) latest-n queries"""
+
+    def __init__(self, capacity: int = 10000, spill_path: Optional[str] = None, flush_every: int = 256):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.flush_every = flush_every
+        self.spilled = 0
+        self._slots: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._next_seq = 0
+        # field -> value -> deque of sequence numbers still in the ring, oldest first
+        self._indexes: Dict[str, Dict[Any, deque]] = {field: {} for field in INDEXED_FIELDS}
+        self._spill_file = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._next_seq, self.capacity)
+
+    def __bool__(self) -> bool:
+        return self._next_seq > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate retained events, oldest first"""
+        return iter(self.latest(len(self)))
+
+    @property
+    def total_logged(self) -> int:
+        return self._next_seq
+
+    def append(self, event: Dict[str, Any]):
+        with self._lock:
+            seq = self._next_seq
+            slot = seq % self.capacity
+            evicted = self._slots[slot]
+            if evicted is not None:
+                for field in INDEXED_FIELDS:
+                    # The evicted event is the oldest in the ring, so it heads its index deque
+                    postings = self._indexes[field][evicted.get(field)]
+                    postings.popleft()
+                    if not postings:
+                        del self._indexes[field][evicted.get(field)]
+                self._spill(evicted)
+            self._slots[slot] = event
+            for field in INDEXED_FIELDS:
+                self._indexes[field].setdefault(event.get(field), deque()).append(seq)
+            self._next_seq = seq + 1
+
+    def latest(self, n: int) -> List[Dict[str, Any]]:
+        """Most recent n events, oldest first"""
+        with self._lock:
+            count = min(n, len(self))
+            first = self._next_seq - count
+            return [self._slots[seq % self.capacity] for seq in range(first, self._next_seq)]
+
+    def latest_by(self, field: str, value: Any, n: int) -> List[Dict[str, Any]]:
+        """Most recent n events whose indexed field equals value, oldest first"""
+        with self._lock:
+            postings = self._indexes[field].get(value)
+            if not postings:
+                return []
+            count = min(n, len(postings))
+            seqs = [postings[-i] for i in range(count, 0, -1)]
+            return [self._slots[seq % self.capacity] for seq in seqs]
+
+    def count_by(self, field: str) -> Dict[Any, int]:
+        """Retained event count per value of an indexed field"""
+        with self._lock:
+            return {value: len(postings) for value, postings in self._indexes[field].items()}
+
+    def _spill(self, event: Dict[str, Any]):
+        if not self.spill_path:
+            return
+        if self._spill_file is None:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._spill_file = open(self.spill_path, "a", encoding="utf-8")
+        self._spill_file.write(json.dumps(event, default=str) + "\n")
+        self.spilled += 1
+        if self.spilled % self.flush_every == 0:
+            self._spill_file.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
@@ -0,0 +1,160 @@
+"""Per-host behavioral baselines and flow anomaly scoring.
+
+Every source host gets a row in a set of NumPy arrays holding exponentially
+weighted means and variances of its flow features (log-scaled bytes sent,
+bytes received, duration and connection rate). A flow batch is scored in one
+pass: each flow's z-scores against its host's baseline (or the global
+baseline while the host is still warming up) become ``threat_score`` and
+``flagged``, and the baselines are then moved towards the batch statistics.
+A cold model (fewer than ``warmup`` flows seen) is fitted on a batch before
+scoring it instead, so the first batch, which at startup is the whole
+generated snapshot, is scored against its own global statistics rather than
+passed through unflagged. State grows with the number of hosts, never with the number of flows.
+"""
+
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+
+FEATURES = ("bytes_sent", "bytes_received", "duration_seconds", "connections")
+
+# Log-space variance floor, so hosts with very regular traffic do not flag on small changes
+_VARIANCE_FLOOR = 0.05
+
+
+class HostBaselines:
+    """EWMA feature baselines keyed by source IP, with vectorized batch scoring"""
+
+    def __init__(self, alpha: float = 0.05, threshold: float = 4.0, warmup: int = 20,
+                 max_hosts: int = 1000000, capacity: int = 4096):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.max_hosts = max_hosts
+        # Sorted host keys and the baseline row each one owns
+        self._keys = np.empty(0, dtype=np.uint32)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._mean = np.zeros((capacity, len(FEATURES)))
+        self._var = np.ones((capacity, len(FEATURES)))
+        self._seen = np.zeros(capacity, dtype=np.int64)
+        self._size = 0
+        self._global_mean = np.zeros(len(FEATURES))
+        self._global_var = np.ones(len(FEATURES))
+        self._global_seen = 0
+        self._lock = threading.Lock()
+        self.flows_scored = 0
+        self.flows_flagged = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._keys.nbytes + self._rows.nbytes + self._mean.nbytes + self._var.nbytes + self._seen.nbytes
+
+    def _grow(self, needed: int):
+        capacity = len(self._seen)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_mean", "_var", "_seen"):
+            current = getattr(self, name)
+            grown = np.ones((capacity,) + current.shape[1:], dtype=current.dtype) if name == "_var" else \
+                np.zeros((capacity,) + current.shape[1:], dtype=current.dtype)
+            grown[:self._size] = current[:self._size]
+            setattr(self, name, grown)
+
+    def _host_rows(self, hosts: np.ndarray) -> np.ndarray:
+        """Baseline row per unique sorted host, registering new hosts; -1 once max_hosts is reached"""
+        slot = np.searchsorted(self._keys, hosts)
+        known = slot < len(self._keys)
+        known[known] = self._keys[slot[known]] == hosts[known]
+        rows = np.full(len(hosts), -1, dtype=np.int64)
+        rows[known] = self._rows[slot[known]]
+        new = np.flatnonzero(~known)[:max(0, self.max_hosts - self._size)]
+        if len(new):
+            self._grow(self._size + len(new))
+            rows[new] = np.arange(self._size, self._size + len(new))
+            self._size += len(new)
+            # Both sides are sorted, so new hosts are spliced in rather than re-sorted
+            at = np.searchsorted(self._keys, hosts[new])
+            self._keys = np.insert(self._keys, at, hosts[new])
+            self._rows = np.insert(self._rows, at, rows[new])
+        return rows
+
+    @staticmethod
+    def features(columns: Dict[str, np.ndarray], inverse: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Log-scaled feature matrix, one row per flow"""
+        timestamps = columns["timestamp"].astype("datetime64[ms]").astype(np.int64)
+        span_minutes = max(1.0, (timestamps.max() - timestamps.min()) / 60000) if len(timestamps) else 1.0
+        matrix = np.empty((len(inverse), len(FEATURES)))
+        for index, name in enumerate(FEATURES[:-1]):
+            np.log1p(columns[name], out=matrix[:, index], casting="unsafe")
+        matrix[:, -1] = np.log1p(counts / span_minutes)[inverse]
+        return matrix
+
+    def score(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """(threat_score, flagged) for a flow column batch, folding the batch into the baselines"""
+        size = len(columns["source_ip"])
+        if not size:
+            return np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=bool)
+        hosts, inverse, counts = np.unique(columns["source_ip"], return_inverse=True, return_counts=True)
+        matrix = self.features(columns, inverse, counts)
+        with self._lock:
+            rows = self._host_rows(hosts)
+            # Hosts still warming up (or untracked) are compared against the global baseline
+            warm = rows >= 0
+            warm[warm] = self._seen[rows[warm]] >= self.warmup
+            cold = self._global_seen < self.warmup
+            if cold:
+                self._update(rows, inverse, counts, matrix)
+            host_mean = np.broadcast_to(self._global_mean, (len(hosts), len(FEATURES))).copy()
+            host_var = np.broadcast_to(self._global_var, (len(hosts), len(FEATURES))).copy()
+            host_mean[warm] = self._mean[rows[warm]]
+            host_var[warm] = self._var[rows[warm]]
+
+            if self._global_seen >= self.warmup:
+                z = (matrix - host_mean[inverse]) / np.sqrt(np.maximum(host_var[inverse], _VARIANCE_FLOOR))
+                peak = np.maximum(z.max(axis=1), 0.0)
+                threat_score = np.minimum(100.0, peak * (70.0 / self.threshold)).astype(np.uint8)
+                flagged = peak >= self.threshold
+            else:
+                threat_score = np.zeros(size, dtype=np.uint8)
+                flagged = np.zeros(size, dtype=bool)
+
+            if not cold:
+                self._update(rows, inverse, counts, matrix)
+            self.flows_scored += size
+            self.flows_flagged += int(np.count_nonzero(flagged))
+        return threat_score, flagged
+
+    def _update(self, rows: np.ndarray, inverse: np.ndarray, counts: np.ndarray, matrix: np.ndarray):
+        """Move host and global baselines towards this batch's per-host means and variances"""
+        batch_mean = np.empty((len(counts), len(FEATURES)))
+        batch_var = np.empty((len(counts), len(FEATURES)))
+        for index in range(len(FEATURES)):
+            sums = np.bincount(inverse, weights=matrix[:, index], minlength=len(counts))
+            squares = np.bincount(inverse, weights=matrix[:, index] ** 2, minlength=len(counts))
+            batch_mean[:, index] = sums / counts
+            batch_var[:, index] = np.maximum(squares / counts - batch_mean[:, index] ** 2, 0.0)
+
+        # A host seen n times in the batch decays its baseline as if updated n times
+        tracked = rows >= 0
+        target = rows[tracked]
+        weight = (1.0 - (1.0 - self.alpha) ** counts[tracked])[:, None]
+        first = (self._seen[target] == 0)[:, None]
+        weight = np.where(first, 1.0, weight)
+        delta = batch_mean[tracked] - self._mean[target]
+        self._mean[target] += weight * delta
+        self._var[target] = (1.0 - weight) * (self._var[target] + weight * delta ** 2) + weight * batch_var[tracked]
+        self._seen[target] += counts[tracked]
+
+        total = counts.sum()
+        weight = 1.0 if self._global_seen == 0 else 1.0 - (1.0 - self.alpha) ** total
+        overall_mean = matrix.mean(axis=0)
+        delta = overall_mean - self._global_mean
+        self._global_mean += weight * delta
+        self._global_var = (1.0 - weight) * (self._global_var + weight * delta ** 2) + weight * matrix.var(axis=0)
+        self._global_seen += int(total)
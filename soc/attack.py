@@ -0,0 +1,400 @@
+"""MITRE ATT&CK coverage from compressed bitmap indexes.
+
+IDS alerts, live threats and threat-intel actors are entities: each gets the
+next id of its dataset when it is inserted, and that id goes into roaring
+bitmaps (``soc.bitmaps``), one per technique it carries, one per facet value
+(sensor location, severity) and one per time bucket. A filtered coverage
+matrix is then, per dataset, one union per filter, one intersection of the
+filters and one intersection count per technique, so its cost follows the
+number of techniques and 64k-id chunks rather than the number of alerts.
+
+Time windows union the buckets that lie inside them and check the recorded
+times of the ids in the two edge buckets, so they are exact. Filters apply
+to the datasets that carry the field; threat-intel actors have neither
+times nor facets and always count.
+
+Ids are never reused. Expired entities are added to the dataset's dead
+bitmap, which every count subtracts, and a chunk whose 65536 ids are all
+dead is dropped from every bitmap of the dataset, so memory follows the
+retention window. Alerts are only appended and expired; threats and intel
+change in place, so ``invalidate`` marks them for a reload, as with the
+other indexes.
+"""
+
+import threading
+import time
+from functools import reduce
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from soc.bitmaps import CHUNK_SIZE, RoaringBitmap
+
+# Enterprise ATT&CK tactics in kill-chain order
+TACTICS = (
+    "Reconnaissance", "Resource Development", "Initial Access", "Execution", "Persistence", "Privilege Escalation",
+    "Defense Evasion", "Credential Access", "Discovery", "Lateral Movement", "Collection", "Command and Control",
+    "Exfiltration", "Impact",
+)
+
+# Column for techniques outside the catalog below
+UNMAPPED = "Unmapped"
+
+# Technique -> (name, tactics): the techniques the platform's sources report plus common ones, so gaps show;
+# sub-techniques that are not listed take their parent's tactics
+TECHNIQUES = {
+    "T1595": ("Active Scanning", ("Reconnaissance",)),
+    "T1595.001": ("Scanning IP Blocks", ("Reconnaissance",)),
+    "T1589": ("Gather Victim Identity Information", ("Reconnaissance",)),
+    "T1589.001": ("Credentials", ("Reconnaissance",)),
+    "T1592": ("Gather Victim Host Information", ("Reconnaissance",)),
+    "T1592.002": ("Software", ("Reconnaissance",)),
+    "T1583": ("Acquire Infrastructure", ("Resource Development",)),
+    "T1588": ("Obtain Capabilities", ("Resource Development",)),
+    "T1588.002": ("Tool", ("Resource Development",)),
+    "T1189": ("Drive-by Compromise", ("Initial Access",)),
+    "T1190": ("Exploit Public-Facing Application", ("Initial Access",)),
+    "T1133": ("External Remote Services", ("Initial Access", "Persistence")),
+    "T1566": ("Phishing", ("Initial Access",)),
+    "T1566.001": ("Spearphishing Attachment", ("Initial Access",)),
+    "T1195": ("Supply Chain Compromise", ("Initial Access",)),
+    "T1195.002": ("Compromise Software Supply Chain", ("Initial Access",)),
+    "T1078": ("Valid Accounts", ("Initial Access", "Persistence", "Privilege Escalation", "Defense Evasion")),
+    "T1059": ("Command and Scripting Interpreter", ("Execution",)),
+    "T1059.003": ("Windows Command Shell", ("Execution",)),
+    "T1204": ("User Execution", ("Execution",)),
+    "T1053": ("Scheduled Task/Job", ("Execution", "Persistence", "Privilege Escalation")),
+    "T1547": ("Boot or Logon Autostart Execution", ("Persistence", "Privilege Escalation")),
+    "T1098": ("Account Manipulation", ("Persistence", "Privilege Escalation")),
+    "T1068": ("Exploitation for Privilege Escalation", ("Privilege Escalation",)),
+    "T1055": ("Process Injection", ("Privilege Escalation", "Defense Evasion")),
+    "T1027": ("Obfuscated Files or Information", ("Defense Evasion",)),
+    "T1036": ("Masquerading", ("Defense Evasion",)),
+    "T1070": ("Indicator Removal", ("Defense Evasion",)),
+    "T1112": ("Modify Registry", ("Defense Evasion",)),
+    "T1562": ("Impair Defenses", ("Defense Evasion",)),
+    "T1550": ("Use Alternate Authentication Material", ("Defense Evasion", "Lateral Movement")),
+    "T1003": ("OS Credential Dumping", ("Credential Access",)),
+    "T1110": ("Brute Force", ("Credential Access",)),
+    "T1558": ("Steal or Forge Kerberos Tickets", ("Credential Access",)),
+    "T1016": ("System Network Configuration Discovery", ("Discovery",)),
+    "T1018": ("Remote System Discovery", ("Discovery",)),
+    "T1046": ("Network Service Discovery", ("Discovery",)),
+    "T1057": ("Process Discovery", ("Discovery",)),
+    "T1082": ("System Information Discovery", ("Discovery",)),
+    "T1087": ("Account Discovery", ("Discovery",)),
+    "T1021": ("Remote Services", ("Lateral Movement",)),
+    "T1570": ("Lateral Tool Transfer", ("Lateral Movement",)),
+    "T1005": ("Data from Local System", ("Collection",)),
+    "T1074": ("Data Staged", ("Collection",)),
+    "T1074.001": ("Local Data Staging", ("Collection",)),
+    "T1113": ("Screen Capture", ("Collection",)),
+    "T1560": ("Archive Collected Data", ("Collection",)),
+    "T1560.001": ("Archive via Utility", ("Collection",)),
+    "T1071": ("Application Layer Protocol", ("Command and Control",)),
+    "T1090": ("Proxy", ("Command and Control",)),
+    "T1105": ("Ingress Tool Transfer", ("Command and Control",)),
+    "T1219": ("Remote Access Software", ("Command and Control",)),
+    "T1573": ("Encrypted Channel", ("Command and Control",)),
+    "T1020": ("Automated Exfiltration", ("Exfiltration",)),
+    "T1030": ("Data Transfer Size Limits", ("Exfiltration",)),
+    "T1041": ("Exfiltration Over C2 Channel", ("Exfiltration",)),
+    "T1048": ("Exfiltration Over Alternative Protocol", ("Exfiltration",)),
+    "T1485": ("Data Destruction", ("Impact",)),
+    "T1486": ("Data Encrypted for Impact", ("Impact",)),
+    "T1490": ("Inhibit System Recovery", ("Impact",)),
+    "T1498": ("Network Denial of Service", ("Impact",)),
+}
+
+# Dataset -> (technique field, a string or a list; time field or None; facet fields)
+ATTACK_SOURCES = {
+    "ids_alerts": ("mitre_technique", "timestamp", ("sensor_location", "severity")),
+    "live_threats": ("mitre_techniques", "last_activity", ("severity",)),
+    "threat_intel": ("mitre_techniques", None, ()),
+}
+
+# Recorded time of an entity without one
+_NO_TIME = np.iinfo(np.int64).min
+
+
+def technique_info(technique: str) -> Tuple[str, Tuple[str, ...]]:
+    """(name, tactics) of a technique id, falling back to its parent and then to the unmapped column"""
+    info = TECHNIQUES.get(technique) or TECHNIQUES.get(technique.split(".")[0])
+    return info if info is not None else (technique, (UNMAPPED,))
+
+
+def _groups(codes: np.ndarray, ids: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+    """(code, ids with that code) for non-negative codes"""
+    if not len(codes):
+        return
+    order = np.argsort(codes, kind="stable")
+    codes, ids = codes[order], ids[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    for start, stop in zip(starts.tolist(), np.r_[starts[1:], len(codes)].tolist()):
+        if codes[start] >= 0:
+            yield int(codes[start]), ids[start:stop]
+
+
+def _to_ms(values: List[Any]) -> np.ndarray:
+    try:
+        # datetime objects and ISO strings convert directly; pandas handles everything else
+        times = np.asarray(values, dtype="datetime64[ms]")
+    except (ValueError, TypeError):
+        times = pd.to_datetime(values, errors="coerce").values.astype("datetime64[ms]")
+    times = times.astype(np.int64)
+    times[np.isnat(times.view("datetime64[ms]"))] = _NO_TIME
+    return times
+
+
+class _Entities:
+    """Bitmaps and recorded times of one dataset's entities"""
+
+    def __init__(self):
+        self.next_id = 0
+        self.techniques: Dict[str, RoaringBitmap] = {}
+        self.facets: Dict[Tuple[str, str], RoaringBitmap] = {}
+        self.buckets: Dict[int, RoaringBitmap] = {}
+        # Chunk key -> epoch ms of each id in the chunk
+        self.times: Dict[int, np.ndarray] = {}
+        self.dead = RoaringBitmap()
+        # Ids of chunks dropped once all of them were dead
+        self.reclaimed = 0
+
+    @property
+    def live(self) -> int:
+        return self.next_id - self.reclaimed - len(self.dead)
+
+    def bitmaps(self) -> List[RoaringBitmap]:
+        return [*self.techniques.values(), *self.facets.values(), *self.buckets.values()]
+
+    def record_times(self, ids: np.ndarray, times: np.ndarray):
+        for key in np.unique(ids >> 16).tolist():
+            chunk = self.times.setdefault(key, np.full(CHUNK_SIZE, _NO_TIME, dtype=np.int64))
+            in_chunk = (ids >> 16) == key
+            chunk[ids[in_chunk] & 0xFFFF] = times[in_chunk]
+
+    def times_of(self, ids: np.ndarray) -> np.ndarray:
+        times = np.full(len(ids), _NO_TIME, dtype=np.int64)
+        for key in np.unique(ids >> 16).tolist():
+            in_chunk = (ids >> 16) == key
+            if key in self.times:
+                times[in_chunk] = self.times[key][ids[in_chunk] & 0xFFFF]
+        return times
+
+
+class AttackMatrix:
+    """Per-technique entity counts of a coverage query, laid out by tactic"""
+
+    def __init__(self, counts: Dict[str, Dict[str, int]], elapsed_ms: float, operations: int):
+        self.elapsed_ms = elapsed_ms
+        # Bitmap operations the query ran
+        self.operations = operations
+        techniques = sorted(set(TECHNIQUES).union(*(set(by_technique) for by_technique in counts.values())))
+        self.frame = pd.DataFrame([{
+            "technique": technique,
+            "name": technique_info(technique)[0],
+            "tactics": ", ".join(technique_info(technique)[1]),
+            **{dataset: counts.get(dataset, {}).get(technique, 0) for dataset in ATTACK_SOURCES},
+        } for technique in techniques], columns=["technique", "name", "tactics", *ATTACK_SOURCES])
+
+    def covered(self, dataset: str = "ids_alerts") -> int:
+        """Techniques with at least one entity in a dataset"""
+        return int((self.frame[dataset] > 0).sum())
+
+    def grid(self, dataset: str = "ids_alerts") -> Tuple[List[str], List[List[float]], List[List[str]]]:
+        """(tactic columns, counts, cell labels) with each tactic's techniques stacked busiest first;
+        cells below a tactic's last technique are NaN with an empty label"""
+        by_tactic: Dict[str, List[Tuple[str, int]]] = {}
+        for technique, count in zip(self.frame["technique"], self.frame[dataset].tolist()):
+            for tactic in technique_info(technique)[1]:
+                by_tactic.setdefault(tactic, []).append((technique, count))
+        tactics = [tactic for tactic in TACTICS + (UNMAPPED,) if tactic in by_tactic]
+        for tactic in tactics:
+            by_tactic[tactic].sort(key=lambda cell: (-cell[1], cell[0]))
+        depth = max((len(cells) for cells in by_tactic.values()), default=0)
+        counts = [[float("nan")] * len(tactics) for _ in range(depth)]
+        labels = [[""] * len(tactics) for _ in range(depth)]
+        for column, tactic in enumerate(tactics):
+            for row, (technique, count) in enumerate(by_tactic[tactic]):
+                counts[row][column] = count
+                labels[row][column] = f"{technique}<br>{count:,}"
+        return tactics, counts, labels
+
+
+class AttackCoverage:
+    """Technique, facet and time-bucket bitmaps per dataset, kept current as entities are inserted"""
+
+    def __init__(self, bucket_minutes: int = 10, sources: Dict[str, Tuple[str, Optional[str], Tuple[str, ...]]] = None):
+        self.bucket_ms = bucket_minutes * 60000
+        self.sources = ATTACK_SOURCES if sources is None else sources
+        self._datasets: Dict[str, _Entities] = {}
+        # Datasets changed in place since they were loaded
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def reset(self, dataset: Optional[str] = None):
+        with self._lock:
+            if dataset is None:
+                self._datasets = {}
+                self._dirty = set()
+            else:
+                self._datasets.pop(dataset, None)
+                self._dirty.discard(dataset)
+
+    def invalidate(self, dataset: str):
+        """Mark a dataset whose records changed in place for a reload"""
+        if dataset in self.sources:
+            with self._lock:
+                self._dirty.add(dataset)
+
+    def stale(self) -> List[str]:
+        """Datasets to reload before a query"""
+        with self._lock:
+            return sorted(self._dirty)
+
+    def load(self, dataset: str, records: Sequence[Dict[str, Any]]):
+        """Replace a dataset's entities"""
+        self.reset(dataset)
+        self.add_records(dataset, records)
+
+    def add_records(self, dataset: str, records: Sequence[Dict[str, Any]]):
+        """Give each record the next entity id and add it to its technique, facet and time bitmaps"""
+        technique_field, time_field, facets = self.sources[dataset]
+        records = list(records)
+        with self._lock:
+            entities = self._datasets.setdefault(dataset, _Entities())
+            ids = np.arange(entities.next_id, entities.next_id + len(records), dtype=np.uint32)
+            entities.next_id += len(records)
+            if not len(ids):
+                return
+            rows, techniques = [], []
+            for row, record in enumerate(records):
+                value = record.get(technique_field)
+                for technique in ([value] if isinstance(value, str) else value or ()):
+                    if technique:
+                        rows.append(row)
+                        techniques.append(technique)
+            if techniques:
+                codes, labels = pd.factorize(np.asarray(techniques, dtype=object))
+                for code, members in _groups(codes, ids[rows]):
+                    entities.techniques.setdefault(labels[code], RoaringBitmap()).add_many(members)
+            for facet in facets:
+                codes, labels = pd.factorize(np.asarray([str(record.get(facet, "")) for record in records], dtype=object))
+                for code, members in _groups(codes, ids):
+                    entities.facets.setdefault((facet, labels[code]), RoaringBitmap()).add_many(members)
+            if time_field is not None:
+                times = _to_ms([record.get(time_field) for record in records])
+                entities.record_times(ids, times)
+                timed = times != _NO_TIME
+                for bucket, members in _groups(times[timed] // self.bucket_ms, ids[timed]):
+                    entities.buckets.setdefault(bucket, RoaringBitmap()).add_many(members)
+
+    def expire(self, dataset: str, cutoff: Any) -> int:
+        """Retire entities whose time is before ``cutoff``; returns how many"""
+        cutoff_ms = int(np.datetime64(cutoff, "ms").astype(np.int64))
+        with self._lock:
+            entities = self._datasets.get(dataset)
+            if entities is None:
+                return 0
+            edge = cutoff_ms // self.bucket_ms
+            old = [bucket for bucket in entities.buckets if bucket < edge]
+            expired = RoaringBitmap.union(entities.buckets.pop(bucket) for bucket in old)
+            if edge in entities.buckets:
+                ids = entities.buckets[edge].to_array()
+                before = entities.times_of(ids) < cutoff_ms
+                expired = expired | RoaringBitmap.from_ids(ids[before])
+                entities.buckets[edge] = entities.buckets[edge] - expired
+                if not entities.buckets[edge]:
+                    del entities.buckets[edge]
+            expired = expired - entities.dead
+            entities.dead = entities.dead | expired
+            self._reclaim(entities)
+            return len(expired)
+
+    def matrix(self, start: Any = None, end: Any = None,
+               facets: Optional[Dict[str, Optional[Sequence[str]]]] = None) -> AttackMatrix:
+        """Technique counts per dataset within [start, end] and the selected facet values
+        (a facet set to None is not filtered)"""
+        started = time.perf_counter()
+        operations = 0
+        counts: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for dataset, entities in self._datasets.items():
+                _, time_field, fields = self.sources[dataset]
+                filters = []
+                if time_field is not None and (start is not None or end is not None):
+                    filters.append(self._window(entities, start, end))
+                    operations += 1
+                for facet, values in (facets or {}).items():
+                    if values is not None and facet in fields:
+                        filters.append(RoaringBitmap.union(entities.facets.get((facet, str(value)), RoaringBitmap())
+                                                           for value in values))
+                        operations += 1
+                by_technique = {}
+                if filters:
+                    selected = reduce(lambda left, right: left & right, filters) - entities.dead
+                    operations += len(filters)
+                    for technique, bitmap in entities.techniques.items():
+                        by_technique[technique] = bitmap.intersection_len(selected)
+                elif entities.dead:
+                    for technique, bitmap in entities.techniques.items():
+                        by_technique[technique] = len(bitmap) - bitmap.intersection_len(entities.dead)
+                else:
+                    for technique, bitmap in entities.techniques.items():
+                        by_technique[technique] = len(bitmap)
+                operations += len(entities.techniques)
+                counts[dataset] = {technique: count for technique, count in by_technique.items() if count}
+        return AttackMatrix(counts, round((time.perf_counter() - started) * 1000, 2), operations)
+
+    def facet_values(self, dataset: str, facet: str) -> List[str]:
+        """Values of a facet seen in a dataset"""
+        with self._lock:
+            entities = self._datasets.get(dataset)
+            return sorted(value for field, value in (entities.facets if entities else {}) if field == facet)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {dataset: {
+                "entities": entities.live,
+                "techniques": len(entities.techniques),
+                "bitmaps": len(entities.bitmaps()),
+                "bytes": sum(bitmap.nbytes for bitmap in entities.bitmaps()) + entities.dead.nbytes,
+            } for dataset, entities in self._datasets.items()}
+
+    def _window(self, entities: _Entities, start: Any, end: Any) -> RoaringBitmap:
+        low_ms = None if start is None else int(np.datetime64(start, "ms").astype(np.int64))
+        high_ms = None if end is None else int(np.datetime64(end, "ms").astype(np.int64))
+        low = None if low_ms is None else low_ms // self.bucket_ms
+        high = None if high_ms is None else high_ms // self.bucket_ms
+        inside, edges = [], []
+        for bucket, bitmap in entities.buckets.items():
+            if (low is not None and bucket < low) or (high is not None and bucket > high):
+                continue
+            (edges if bucket in (low, high) else inside).append(bitmap)
+        window = RoaringBitmap.union(inside)
+        for bitmap in edges:
+            ids = bitmap.to_array()
+            times = entities.times_of(ids)
+            keep = np.ones(len(ids), dtype=bool)
+            if low_ms is not None:
+                keep &= times >= low_ms
+            if high_ms is not None:
+                keep &= times <= high_ms
+            window = window | RoaringBitmap.from_ids(ids[keep])
+        return window
+
+    def _reclaim(self, entities: _Entities):
+        """Drop chunks whose ids are all dead from every bitmap"""
+        keys = entities.dead.full_chunks()
+        if not keys:
+            return
+        for bitmaps in (entities.techniques, entities.facets, entities.buckets):
+            for name, bitmap in list(bitmaps.items()):
+                bitmap.discard_chunks(keys)
+                if not bitmap:
+                    del bitmaps[name]
+        for key in keys:
+            entities.times.pop(key, None)
+        entities.dead.discard_chunks(keys)
+        entities.reclaimed += len(keys) * CHUNK_SIZE
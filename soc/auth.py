@@ -0,0 +1,187 @@
+"""Analyst authentication.
+
+Passwords are stored as per-user salted scrypt hashes in a self-describing
+``scrypt$n$r$p$salt$hash`` string, so the cost parameters can be raised
+later without invalidating existing hashes. Hashing runs on a thread pool
+with one worker per core (OpenSSL's scrypt releases the GIL), so a burst of
+logins queues on the pool instead of stalling every Streamlit session.
+
+The cost never drops below ``SCRYPT_MIN_N`` (2**14, 16 MiB and ~60 ms per
+hash on one core): the login latency target is met by sizing the pool to
+the cores and queueing on it, not by weakening hashes. The last login of a
+burst of ``LOGIN_BURST`` waits for about ``LOGIN_BURST / workers`` hashes, so
+the ``LOGIN_BUDGET_SECONDS`` p99 target takes roughly ten cores at the
+floor; ``AuthService.burst_seconds`` estimates it from the startup hash and
+hosts that cannot reach it report the target as unmet.
+
+Failed attempts are counted per user and per client IP over a sliding
+window; a key that reaches its limit is locked out for a fixed period and
+is rejected before any hashing is done. Clients whose address is unknown
+are only limited per user, since they would all share one IP key.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Optional
+
+# Interactive-login cost (Django's scrypt defaults): 16 MiB and about 60 ms per hash on one core
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+# Security floor: new hashes are never made cheaper than this, whatever the latency target
+SCRYPT_MIN_N = 2 ** 14
+# Concurrent logins that should all complete within the latency budget (the p99 target)
+LOGIN_BURST = 50
+LOGIN_BUDGET_SECONDS = 0.3
+# Client address reported when the server cannot tell; not counted per IP
+UNKNOWN_CLIENT = "unknown"
+_SALT_BYTES = 16
+_KEY_BYTES = 32
+
+
+def hash_password(password: str, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> str:
+    """Salted scrypt hash encoded with its parameters"""
+    salt = os.urandom(_SALT_BYTES)
+    key = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 2 ** 20, dklen=_KEY_BYTES)
+    return f"scrypt${n}${r}${p}${base64.b64encode(salt).decode()}${base64.b64encode(key).decode()}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Check a password against an encoded hash in constant time"""
+    try:
+        scheme, n, r, p, salt, key = encoded.split("$")
+        n, r, p = int(n), int(r), int(p)
+    except ValueError:
+        return False
+    if scheme != "scrypt":
+        return False
+    expected = base64.b64decode(key)
+    actual = hashlib.scrypt(password.encode(), salt=base64.b64decode(salt), n=n, r=r, p=p,
+                            maxmem=256 * n * r + 2 ** 20, dklen=len(expected))
+    return hmac.compare_digest(actual, expected)
+
+
+class FailureWindow:
+    """Failed attempts per key over a sliding window, with lockout once a limit is reached"""
+
+    def __init__(self, limit: int, window_seconds: float, lockout_seconds: float, max_keys: int = 100000):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.lockout_seconds = lockout_seconds
+        self.max_keys = max_keys
+        # Only the latest ``limit`` failures matter, so each deque is bounded
+        self._failures: Dict[str, Deque[float]] = {}
+        self._locked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, now: Optional[float] = None) -> bool:
+        """Record a failure; True when it locks the key out"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            failures = self._failures.get(key)
+            if failures is None:
+                if len(self._failures) >= self.max_keys:
+                    self._prune(now)
+                failures = self._failures[key] = deque(maxlen=self.limit)
+            failures.append(now)
+            if len(failures) >= self.limit and now - failures[0] <= self.window_seconds:
+                self._locked_until[key] = now + self.lockout_seconds
+                failures.clear()
+                return True
+        return False
+
+    def count(self, key: str, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return sum(1 for at in self._failures.get(key, ()) if now - at <= self.window_seconds)
+
+    def locked_for(self, key: str, now: Optional[float] = None) -> float:
+        """Seconds of lockout left for a key (0 when not locked)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            until = self._locked_until.get(key)
+            if until is None:
+                return 0.0
+            if until <= now:
+                del self._locked_until[key]
+                return 0.0
+            return until - now
+
+    def reset(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def _prune(self, now: float):
+        for key in [key for key, failures in self._failures.items() if not failures or now - failures[-1] > self.window_seconds]:
+            del self._failures[key]
+        for key in [key for key, until in self._locked_until.items() if until <= now]:
+            del self._locked_until[key]
+
+
+class AuthService:
+    """Credential store with pooled scrypt verification and per-user/per-IP lockout"""
+
+    def __init__(self, workers: Optional[int] = None, user_limit: int = 5, ip_limit: int = 20,
+                 window_seconds: float = 900, lockout_seconds: float = 900, timeout: float = 30.0,
+                 n: int = SCRYPT_N):
+        if n < SCRYPT_MIN_N:
+            raise ValueError(f"scrypt n={n} is below the security floor of {SCRYPT_MIN_N}")
+        # Hashing is CPU-bound, so threads beyond the core count only add queueing; each holds 128*n*r bytes
+        self.workers = workers or min(16, os.cpu_count() or 1)
+        self.n = n
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="auth")
+        # username -> encoded hash, or the pending Future while it is still being hashed
+        self._credentials: Dict[str, Future] = {}
+        self.user_failures = FailureWindow(user_limit, window_seconds, lockout_seconds)
+        self.ip_failures = FailureWindow(ip_limit, window_seconds, lockout_seconds)
+        # Unknown users are checked against this, so they take as long as known ones; its timing sizes bursts
+        self._hash_seconds = 0.0
+        self._decoy = self._pool.submit(self._hash_decoy)
+
+    def _hash_decoy(self) -> str:
+        started = time.perf_counter()
+        encoded = hash_password(base64.b64encode(os.urandom(12)).decode(), self.n)
+        self._hash_seconds = time.perf_counter() - started
+        return encoded
+
+    def burst_seconds(self, burst: int = LOGIN_BURST) -> float:
+        """Estimated wait of the last login in a burst: the hashes queued ahead of it per worker"""
+        self._decoy.result(self.timeout)
+        return -(-burst // self.workers) * self._hash_seconds
+
+    def meets_target(self, burst: int = LOGIN_BURST, budget_seconds: float = LOGIN_BUDGET_SECONDS) -> bool:
+        return self.burst_seconds(burst) <= budget_seconds
+
+    def register(self, username: str, password: str):
+        """Hash a password on the pool; logins for the user wait for it if needed"""
+        self._credentials[username] = self._pool.submit(hash_password, password, self.n)
+
+    def locked_for(self, username: str, client_ip: str) -> float:
+        if client_ip == UNKNOWN_CLIENT:
+            return self.user_failures.locked_for(username)
+        return max(self.user_failures.locked_for(username), self.ip_failures.locked_for(client_ip))
+
+    def authenticate(self, username: str, password: str, client_ip: str = UNKNOWN_CLIENT) -> str:
+        """Outcome of a login attempt: ok, invalid or locked; locked keys are rejected without hashing"""
+        if self.locked_for(username, client_ip):
+            return "locked"
+        # Waited for here rather than on the pool, where it could queue behind the verification
+        encoded = self._credentials.get(username, self._decoy).result(self.timeout)
+        valid = self._pool.submit(verify_password, password, encoded).result(self.timeout)
+        if valid and username in self._credentials:
+            self.user_failures.reset(username)
+            return "ok"
+        locked = self.user_failures.add(username)
+        if client_ip != UNKNOWN_CLIENT:
+            locked = self.ip_failures.add(client_ip) or locked
+        return "locked" if locked else "invalid"
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,244 @@
+"""Roaring-style compressed bitmaps over uint32 ids.
+
+Ids are split by their high 16 bits into chunks of 65536. A chunk holding
+at most ``ARRAY_MAX`` ids is kept as a sorted uint16 array (two bytes per
+id); a fuller chunk becomes a 1024-word bitset (8 KiB however full).
+Operations work chunk by chunk on matching keys, choosing the kernel by the
+pair of container kinds: ``intersect1d``/``union1d`` for two arrays, a bit
+test of the array against the bitset, or word-wise logic for two bitsets,
+then shrinking a result bitset back to an array when it empties out. Run
+containers are left out: the ids here are assigned in insertion order, so
+dense runs already land in bitsets.
+
+Bitmaps are values: operations return new bitmaps that may share container
+arrays with their operands, and ``add_many`` copies a container before
+changing it.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+# Ids per chunk, and the largest chunk kept as a sorted array
+CHUNK_SIZE = 1 << 16
+ARRAY_MAX = 4096
+
+_WORDS = CHUNK_SIZE // 64
+_EMPTY = np.empty(0, dtype=np.uint16)
+# Set bits per byte value, for popcounts on NumPy < 2.0
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+def _popcount_table(words: np.ndarray) -> int:
+    return int(_BYTE_BITS[np.ascontiguousarray(words).view(np.uint8)].sum(dtype=np.int64))
+
+
+def _popcount_native(words: np.ndarray) -> int:
+    return int(np.bitwise_count(words).sum())
+
+
+# np.bitwise_count arrived in NumPy 2.0; older releases count through the byte table
+_popcount = _popcount_native if hasattr(np, "bitwise_count") else _popcount_table
+
+
+def _is_bitset(container: np.ndarray) -> bool:
+    return container.dtype == np.uint64
+
+
+def _cardinality(container: np.ndarray) -> int:
+    if _is_bitset(container):
+        return _popcount(container)
+    return len(container)
+
+
+def _set_bits(words: np.ndarray, low: np.ndarray):
+    """Set sorted, distinct low ids in a bitset in place"""
+    if not len(low):
+        return
+    index = (low >> 6).astype(np.intp)
+    bits = np.left_shift(np.uint64(1), (low & 63).astype(np.uint64))
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    words[index[starts]] |= np.bitwise_or.reduceat(bits, starts)
+
+
+def _to_bitset(low: np.ndarray) -> np.ndarray:
+    words = np.zeros(_WORDS, dtype=np.uint64)
+    _set_bits(words, low)
+    return words
+
+
+def _to_array(words: np.ndarray) -> np.ndarray:
+    bits = np.unpackbits(words.astype("<u8").view(np.uint8), bitorder="little")
+    return np.flatnonzero(bits).astype(np.uint16)
+
+
+def _contains(words: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """Which low ids are set in a bitset"""
+    return ((words[(low >> 6).astype(np.intp)] >> (low & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+
+def _grow(low: np.ndarray) -> np.ndarray:
+    return _to_bitset(low) if len(low) > ARRAY_MAX else low
+
+
+def _shrink(words: np.ndarray) -> np.ndarray:
+    return _to_array(words) if _cardinality(words) <= ARRAY_MAX else words
+
+
+def _and(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if not _is_bitset(a):
+        if not _is_bitset(b):
+            return np.intersect1d(a, b, assume_unique=True)
+        return a[_contains(b, a)]
+    if not _is_bitset(b):
+        return b[_contains(a, b)]
+    return _shrink(a & b)
+
+
+def _and_cardinality(a: np.ndarray, b: np.ndarray) -> int:
+    if _is_bitset(a) and _is_bitset(b):
+        return _popcount(a & b)
+    return len(_and(a, b))
+
+
+def _or(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if not _is_bitset(a) and not _is_bitset(b):
+        return _grow(np.union1d(a, b))
+    if not _is_bitset(a):
+        a, b = b, a
+    if not _is_bitset(b):
+        words = a.copy()
+        _set_bits(words, b)
+        return words
+    return a | b
+
+
+def _andnot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if not _is_bitset(a):
+        if not _is_bitset(b):
+            return np.setdiff1d(a, b, assume_unique=True)
+        return a[~_contains(b, a)]
+    if not _is_bitset(b):
+        b = _to_bitset(b)
+    return _shrink(a & ~b)
+
+
+def _chunks(ids: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+    """(high key, low ids) per chunk of sorted, distinct ids"""
+    if not len(ids):
+        return
+    highs = ids >> 16
+    bounds = np.flatnonzero(highs[1:] != highs[:-1]) + 1
+    for part in np.split(ids, bounds):
+        yield int(part[0] >> 16), (part & 0xFFFF).astype(np.uint16)
+
+
+class RoaringBitmap:
+    """Set of uint32 ids held as per-chunk sorted arrays or bitsets"""
+
+    __slots__ = ("containers",)
+
+    def __init__(self, containers: Dict[int, np.ndarray] = None):
+        # High 16 bits -> uint16 array or uint64 bitset, never empty
+        self.containers: Dict[int, np.ndarray] = containers if containers is not None else {}
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int]) -> "RoaringBitmap":
+        bitmap = cls()
+        bitmap.add_many(ids)
+        return bitmap
+
+    @classmethod
+    def union(cls, bitmaps: Iterable["RoaringBitmap"]) -> "RoaringBitmap":
+        """Union of many bitmaps, merging each chunk once"""
+        grouped: Dict[int, List[np.ndarray]] = {}
+        for bitmap in bitmaps:
+            for key, container in bitmap.containers.items():
+                grouped.setdefault(key, []).append(container)
+        containers = {}
+        for key, parts in grouped.items():
+            if len(parts) == 1:
+                containers[key] = parts[0]
+            elif not any(_is_bitset(part) for part in parts) and sum(len(part) for part in parts) <= ARRAY_MAX:
+                containers[key] = np.unique(np.concatenate(parts))
+            else:
+                words = np.zeros(_WORDS, dtype=np.uint64)
+                for part in parts:
+                    if _is_bitset(part):
+                        words |= part
+                    else:
+                        _set_bits(words, part)
+                containers[key] = _shrink(words)
+        return cls(containers)
+
+    def add_many(self, ids: Iterable[int]):
+        """Add ids; appending ids above the current maximum is the fast path"""
+        ids = np.asarray(ids, dtype=np.uint32)
+        if len(ids) > 1 and np.any(ids[1:] <= ids[:-1]):
+            ids = np.unique(ids)
+        for key, low in _chunks(ids):
+            container = self.containers.get(key)
+            if container is None:
+                self.containers[key] = _grow(low)
+            elif _is_bitset(container):
+                words = container.copy()
+                _set_bits(words, low)
+                self.containers[key] = words
+            elif len(container) and low[0] > container[-1]:
+                self.containers[key] = _grow(np.concatenate([container, low]))
+            else:
+                self.containers[key] = _grow(np.union1d(container, low))
+
+    def __len__(self) -> int:
+        return sum(_cardinality(container) for container in self.containers.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.containers)
+
+    def __and__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        containers = {}
+        for key in self.containers.keys() & other.containers.keys():
+            container = _and(self.containers[key], other.containers[key])
+            if len(container):
+                containers[key] = container
+        return RoaringBitmap(containers)
+
+    def __or__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        containers = dict(self.containers)
+        for key, container in other.containers.items():
+            containers[key] = _or(containers[key], container) if key in containers else container
+        return RoaringBitmap(containers)
+
+    def __sub__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        containers = {}
+        for key, container in self.containers.items():
+            if key in other.containers:
+                container = _andnot(container, other.containers[key])
+                if not _cardinality(container):
+                    continue
+            containers[key] = container
+        return RoaringBitmap(containers)
+
+    def intersection_len(self, other: "RoaringBitmap") -> int:
+        """Size of the intersection without building it"""
+        return sum(_and_cardinality(self.containers[key], other.containers[key])
+                   for key in self.containers.keys() & other.containers.keys())
+
+    def to_array(self) -> np.ndarray:
+        """Ids in ascending order"""
+        parts = [np.uint32(key << 16) + (_to_array(container) if _is_bitset(container) else container).astype(np.uint32)
+                 for key, container in sorted(self.containers.items())]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.uint32)
+
+    def full_chunks(self) -> List[int]:
+        """Keys of chunks holding all 65536 of their ids"""
+        return [key for key, container in self.containers.items()
+                if _is_bitset(container) and _cardinality(container) == CHUNK_SIZE]
+
+    def discard_chunks(self, keys: Iterable[int]):
+        for key in keys:
+            self.containers.pop(key, None)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(container.nbytes for container in self.containers.values())
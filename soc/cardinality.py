@@ -0,0 +1,224 @@
+"""Distinct-count tracking with HyperLogLog.
+
+Each dataset keeps one HyperLogLog counter per time bucket, per tracked
+field (source IP, destination IP, user) and per dimension value (sensor
+location, service, geo location), plus an overall counter per bucket.
+Counters are register arrays, so a window or a set of dimension values is
+answered by taking the element-wise maximum of the counters involved; no
+set of raw values is ever kept.
+"""
+
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from soc.flows import CATEGORIES
+
+# Dataset -> (fields counted, dimensions they are broken down by)
+TRACKED_FIELDS = {
+    "network_activity": (("source_ip", "dest_ip"), ("service", "geo_location")),
+    "ids_alerts": (("source_ip", "dest_ip"), ("sensor_location",)),
+    "security_events": (("user", "source_ip"), ("severity",)),
+}
+
+_HASH_KEY = "0TrustSOCcardnl!"
+
+
+def hash_values(values) -> np.ndarray:
+    """64-bit hashes of integer arrays or string/object values"""
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        return pd.util.hash_array(values.astype(np.uint64), hash_key=_HASH_KEY)
+    return pd.util.hash_array(values.astype(object), hash_key=_HASH_KEY, categorize=False)
+
+
+class HyperLogLog:
+    """Mergeable distinct counter with 2**precision one-byte registers"""
+
+    def __init__(self, precision: int = 13, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = np.zeros(self.size, dtype=np.uint8) if registers is None else registers
+
+    @staticmethod
+    def positions(hashes: np.ndarray, precision: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(register index, rank) for each hash; rank is the position of the first set bit after the index bits"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        rest = (hashes << np.uint64(precision)) | np.uint64(1 << (precision - 1))
+        # Bit length through frexp on the 32-bit halves, which float64 holds exactly
+        high = (rest >> np.uint64(32)).astype(np.float64)
+        low = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bit_length = np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
+        return index, (65 - bit_length).astype(np.uint8)
+
+    def add_positions(self, index: np.ndarray, rank: np.ndarray):
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, values):
+        self.add_positions(*self.positions(hash_values(values), self.precision))
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    @classmethod
+    def union(cls, counters: List["HyperLogLog"], precision: int = 13) -> "HyperLogLog":
+        if not counters:
+            return cls(precision)
+        return cls(counters[0].precision, np.maximum.reduce([counter.registers for counter in counters]))
+
+    def estimate(self) -> int:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+    @property
+    def nbytes(self) -> int:
+        return self.registers.nbytes
+
+
+class CardinalityTracker:
+    """HyperLogLog counters per dataset, time bucket, field and dimension value"""
+
+    def __init__(self, bucket_minutes: int = 10, retain_hours: int = 24, precision: int = 13,
+                 tracked: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = None, flush_every: int = 256):
+        self.bucket_ms = bucket_minutes * 60000
+        self.retain_buckets = retain_hours * 60 // bucket_minutes
+        self.precision = precision
+        self.tracked = TRACKED_FIELDS if tracked is None else tracked
+        # dataset -> bucket -> (field, dimension, value) -> counter; dimension None is the overall counter
+        self._buckets: Dict[str, Dict[int, Dict[Tuple[str, Optional[str], Any], HyperLogLog]]] = {}
+        # Single records queued by add_record, counted in batches
+        self.flush_every = flush_every
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def reset(self, dataset: Optional[str] = None):
+        with self._lock:
+            if dataset is None:
+                self._buckets = {}
+            else:
+                self._buckets.pop(dataset, None)
+        with self._pending_lock:
+            if dataset is None:
+                self._pending = {}
+            else:
+                self._pending.pop(dataset, None)
+
+    def add_record(self, dataset: str, record: Dict[str, Any]):
+        """Queue one record; queued records are counted once flush_every accumulate or on the next query"""
+        with self._pending_lock:
+            pending = self._pending.setdefault(dataset, [])
+            pending.append(record)
+            full = len(pending) >= self.flush_every
+        if full:
+            self.flush(dataset)
+
+    def flush(self, dataset: str):
+        with self._pending_lock:
+            records = self._pending.pop(dataset, None)
+        if records:
+            self.add_records(dataset, records)
+
+    def add_columns(self, dataset: str, columns: Dict[str, np.ndarray]):
+        """Count a column batch; flow categorical codes are decoded to their labels"""
+        timestamps = np.asarray(columns["timestamp"]).astype("datetime64[ms]")
+        valid = ~np.isnat(timestamps)
+        if not valid.any():
+            return
+        fields, dimensions = self.tracked[dataset]
+        buckets = timestamps[valid].astype(np.int64) // self.bucket_ms
+        positions = {field: HyperLogLog.positions(hash_values(np.asarray(columns[field])[valid]), self.precision)
+                     for field in fields if field in columns}
+        # Dimension values as integer codes plus labels, so grouping never compares strings
+        dimension_codes = {}
+        for dimension in dimensions:
+            if dimension not in columns:
+                continue
+            values = np.asarray(columns[dimension])[valid]
+            if dimension in CATEGORIES and values.dtype.kind == "u":
+                dimension_codes[dimension] = (values, list(CATEGORIES[dimension]))
+            else:
+                codes, labels = pd.factorize(values)
+                dimension_codes[dimension] = (codes, [str(label) for label in labels])
+        with self._lock:
+            by_bucket = self._buckets.setdefault(dataset, {})
+            unique_buckets, bucket_inverse = np.unique(buckets, return_inverse=True)
+            for bucket_index, bucket in enumerate(unique_buckets.tolist()):
+                rows = np.flatnonzero(bucket_inverse == bucket_index)
+                counters = by_bucket.setdefault(bucket, {})
+                for field, (index, rank) in positions.items():
+                    self._counter(counters, field, None, None).add_positions(index[rows], rank[rows])
+                    for dimension, (codes, labels) in dimension_codes.items():
+                        bucket_codes = codes[rows]
+                        for code in np.unique(bucket_codes).tolist():
+                            selected = rows[bucket_codes == code]
+                            label = labels[code] if 0 <= code < len(labels) else "Unknown"
+                            self._counter(counters, field, dimension, label).add_positions(index[selected], rank[selected])
+            newest = max(by_bucket)
+            for bucket in [bucket for bucket in by_bucket if bucket <= newest - self.retain_buckets]:
+                del by_bucket[bucket]
+
+    def add_records(self, dataset: str, records: List[Dict[str, Any]]):
+        """Count dict records such as ids_alerts or security events"""
+        if not records:
+            return
+        fields, dimensions = self.tracked[dataset]
+        timestamps = [record.get("timestamp") for record in records]
+        try:
+            # datetime objects and ISO strings convert directly; pandas handles everything else
+            timestamps = np.asarray(timestamps, dtype="datetime64[ms]")
+        except (ValueError, TypeError):
+            timestamps = pd.to_datetime(timestamps, errors="coerce").values
+        columns = {"timestamp": timestamps}
+        for name in fields + dimensions:
+            columns[name] = np.asarray([str(record.get(name, "")) for record in records], dtype=object)
+        self.add_columns(dataset, columns)
+
+    def _counter(self, counters, field, dimension, value) -> HyperLogLog:
+        counter = counters.get((field, dimension, value))
+        if counter is None:
+            counter = counters[(field, dimension, value)] = HyperLogLog(self.precision)
+        return counter
+
+    def _bucket_range(self, start, end) -> Tuple[Optional[int], Optional[int]]:
+        low = None if start is None else int(np.datetime64(start, "ms").astype(np.int64) // self.bucket_ms)
+        high = None if end is None else int(np.datetime64(end, "ms").astype(np.int64) // self.bucket_ms)
+        return low, high
+
+    def _window(self, dataset: str, start, end):
+        low, high = self._bucket_range(start, end)
+        return [counters for bucket, counters in self._buckets.get(dataset, {}).items()
+                if (low is None or bucket >= low) and (high is None or bucket <= high)]
+
+    def count(self, dataset: str, field: str, start=None, end=None,
+              dimension: Optional[str] = None, value: Any = None) -> int:
+        """Estimated distinct values of a field in [start, end], optionally for one dimension value"""
+        key = (field, dimension, None if dimension is None else str(value))
+        self.flush(dataset)
+        with self._lock:
+            counters = [bucket[key] for bucket in self._window(dataset, start, end) if key in bucket]
+            return HyperLogLog.union(counters, self.precision).estimate()
+
+    def breakdown(self, dataset: str, field: str, dimension: str, start=None, end=None) -> Dict[str, int]:
+        """Estimated distinct values of a field per dimension value in [start, end]"""
+        grouped: Dict[str, List[HyperLogLog]] = {}
+        self.flush(dataset)
+        with self._lock:
+            for bucket in self._window(dataset, start, end):
+                for (counter_field, counter_dimension, value), counter in bucket.items():
+                    if counter_field == field and counter_dimension == dimension:
+                        grouped.setdefault(value, []).append(counter)
+            return {value: HyperLogLog.union(counters).estimate() for value, counters in sorted(grouped.items())}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(counter.nbytes for buckets in self._buckets.values() for bucket in buckets.values() for counter in bucket.values())
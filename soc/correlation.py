@@ -0,0 +1,278 @@
+"""Streaming alert correlation.
+
+IDS alerts are joined to endpoints on ``dest_ip == ip_address`` and to live
+threats on ``mitre_technique in mitre_techniques``. Each side keeps a hash
+index on its join key, so a new alert, endpoint or threat probes the other
+sides' indexes instead of looping over them (a symmetric hash join). Alerts
+stay joinable for a bounded window; an alert that reaches both an endpoint
+and a threat opens an incident for that endpoint and technique, attributed
+to the technique's most severe threat; later alerts for the same pair are
+folded into it. An incident only lists the alert ids still in the window,
+so expiring an alert also drops it from its incidents, and an incident left
+with none (idle for longer than the window) is closed.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+SEVERITY_RANK = {"Low": 0, "Medium": 1, "High": 2, "Critical": 3}
+
+
+def _rank(record: Dict[str, Any]) -> int:
+    return SEVERITY_RANK.get(record.get("severity"), 0)
+
+
+class CorrelationEngine:
+    """Incremental IDS alert / endpoint / threat join"""
+
+    def __init__(self, on_incident: Callable[[Dict[str, Any], bool], None],
+                 window_size: int = 1000000, window: timedelta = timedelta(hours=24),
+                 latency_samples: int = 10000):
+        self.on_incident = on_incident
+        self.window_size = window_size
+        self.window = window
+        self._alerts: deque = deque()
+        # technique -> dest_ip -> alerts in arrival order; covers both join keys at once
+        self._alert_index: Dict[str, Dict[str, deque]] = {}
+        self._endpoints_by_ip: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._threats_by_technique: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # technique -> its most severe threat, which incidents on that technique are attributed to
+        self._lead_threats: Dict[str, Dict[str, Any]] = {}
+        # (endpoint_id, technique) -> open incident and the alert ids already in it
+        self._open_incidents: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._incident_alerts: Dict[Tuple[str, str], set] = {}
+        # alert id -> incidents it was folded into, so expiry can take it back out
+        self._alert_incidents: Dict[Any, set] = {}
+        self._latencies = deque(maxlen=latency_samples)
+        self._lock = threading.RLock()
+        self.alerts_seen = 0
+
+    # -- endpoint and threat sides -------------------------------------------------
+
+    def load_endpoints(self, endpoints: List[Dict[str, Any]]):
+        with self._lock:
+            self._endpoints_by_ip = {}
+            for endpoint in endpoints:
+                self._index_endpoint(endpoint)
+
+    def load_threats(self, threats: List[Dict[str, Any]]):
+        with self._lock:
+            self._threats_by_technique = {}
+            self._lead_threats = {}
+            for threat in threats:
+                self._index_threat(threat)
+
+    def _index_endpoint(self, endpoint: Dict[str, Any]):
+        self._endpoints_by_ip.setdefault(endpoint.get("ip_address"), {})[endpoint.get("endpoint_id")] = endpoint
+
+    def _index_threat(self, threat: Dict[str, Any]):
+        for technique in threat.get("mitre_techniques", ()):
+            self._threats_by_technique.setdefault(technique, {})[threat.get("threat_id")] = threat
+            lead = self._lead_threats.get(technique)
+            if lead is None or _rank(threat) > _rank(lead):
+                self._lead_threats[technique] = threat
+
+    def threats_for(self, technique: str) -> List[Dict[str, Any]]:
+        """Threats currently linked to a technique"""
+        return list(self._threats_by_technique.get(technique, {}).values())
+
+    def remove_endpoint(self, endpoint: Dict[str, Any]):
+        with self._lock:
+            by_id = self._endpoints_by_ip.get(endpoint.get("ip_address"), {})
+            by_id.pop(endpoint.get("endpoint_id"), None)
+            if not by_id:
+                self._endpoints_by_ip.pop(endpoint.get("ip_address"), None)
+
+    def remove_threat(self, threat: Dict[str, Any]):
+        with self._lock:
+            for technique in threat.get("mitre_techniques", ()):
+                by_id = self._threats_by_technique.get(technique, {})
+                by_id.pop(threat.get("threat_id"), None)
+                if not by_id:
+                    self._threats_by_technique.pop(technique, None)
+                    self._lead_threats.pop(technique, None)
+                elif self._lead_threats.get(technique, {}).get("threat_id") == threat.get("threat_id"):
+                    self._lead_threats[technique] = max(by_id.values(), key=_rank)
+
+    def on_endpoint(self, endpoint: Dict[str, Any], previous: Optional[Dict[str, Any]] = None):
+        """Index a new or changed endpoint and join it against alerts in the window"""
+        started = time.perf_counter()
+        with self._lock:
+            if previous is not None:
+                self.remove_endpoint(previous)
+            self._index_endpoint(endpoint)
+            ip = endpoint.get("ip_address")
+            for technique, lead in self._lead_threats.items():
+                alerts = self._alert_index.get(technique, {}).get(ip)
+                if alerts:
+                    self._correlate(alerts, endpoint, technique, lead)
+        self._latencies.append(time.perf_counter() - started)
+
+    def on_threat(self, threat: Dict[str, Any], previous: Optional[Dict[str, Any]] = None):
+        """Index a new or changed threat and join it against alerts in the window"""
+        started = time.perf_counter()
+        with self._lock:
+            if previous is not None:
+                self.remove_threat(previous)
+            self._index_threat(threat)
+            for technique in threat.get("mitre_techniques", ()):
+                by_ip = self._alert_index.get(technique)
+                # Pairs already joined through an equally severe lead threat gain nothing from this one
+                if not by_ip or self._lead_threats.get(technique) is not threat:
+                    continue
+                # Probe from whichever side has fewer distinct IPs
+                if len(by_ip) <= len(self._endpoints_by_ip):
+                    pairs = ((alerts, self._endpoints_by_ip.get(ip)) for ip, alerts in by_ip.items())
+                else:
+                    pairs = ((by_ip.get(ip), endpoints) for ip, endpoints in self._endpoints_by_ip.items())
+                for alerts, endpoints in pairs:
+                    if alerts and endpoints:
+                        for endpoint in endpoints.values():
+                            self._correlate(alerts, endpoint, technique, self._lead_threats[technique])
+        self._latencies.append(time.perf_counter() - started)
+
+    # -- alert side ----------------------------------------------------------------
+
+    def clear_alerts(self):
+        with self._lock:
+            self._alerts.clear()
+            self._alert_index.clear()
+            self._open_incidents.clear()
+            self._incident_alerts.clear()
+            self._alert_incidents.clear()
+
+    def on_alerts(self, alerts: List[Dict[str, Any]]):
+        for alert in alerts:
+            self.on_alert(alert)
+
+    def on_alert(self, alert: Dict[str, Any]):
+        """Probe endpoint and threat indexes for one alert, then add it to the window"""
+        started = time.perf_counter()
+        with self._lock:
+            self.alerts_seen += 1
+            technique, ip = alert.get("mitre_technique"), alert.get("dest_ip")
+            alerts = self._alert_index.setdefault(technique, {}).setdefault(ip, deque())
+            alerts.append(alert)
+            self._alerts.append(alert)
+            endpoints = self._endpoints_by_ip.get(ip)
+            if endpoints:
+                lead = self._lead_threats.get(technique)
+                if lead is not None:
+                    for endpoint in endpoints.values():
+                        self._correlate((alert,), endpoint, technique, lead)
+            self._expire(alert.get("timestamp"))
+        self._latencies.append(time.perf_counter() - started)
+
+    def expire(self, now: datetime):
+        """Drop alerts older than the window at ``now``, closing incidents that have gone idle"""
+        with self._lock:
+            self._expire(now)
+
+    def _expire(self, now: Optional[datetime]):
+        """Drop alerts beyond the window; the oldest alert heads its index deque"""
+        cutoff = now - self.window if isinstance(now, datetime) else None
+        while self._alerts and (len(self._alerts) > self.window_size or
+                                (cutoff is not None and isinstance(self._alerts[0].get("timestamp"), datetime)
+                                 and self._alerts[0]["timestamp"] < cutoff)):
+            expired = self._alerts.popleft()
+            technique, ip = expired.get("mitre_technique"), expired.get("dest_ip")
+            by_ip = self._alert_index[technique]
+            by_ip[ip].popleft()
+            if not by_ip[ip]:
+                del by_ip[ip]
+                if not by_ip:
+                    del self._alert_index[technique]
+            for key in self._alert_incidents.pop(expired.get("alert_id"), ()):
+                self._release(key, expired.get("alert_id"))
+
+    def _release(self, key: Tuple[str, str], alert_id: Any):
+        """Drop an expired alert from an open incident, closing the incident once none are left"""
+        members = self._incident_alerts.get(key)
+        if members is None:
+            return
+        members.discard(alert_id)
+        incident = self._open_incidents[key]
+        if not members:
+            incident["status"] = "Closed"
+            incident["alert_ids"] = []
+            del self._open_incidents[key], self._incident_alerts[key]
+            self.on_incident(incident, False)
+        elif len(incident["alert_ids"]) > 2 * len(members):
+            # Compacted in bulk so each expiry stays O(1) amortized
+            incident["alert_ids"] = [alert_id for alert_id in incident["alert_ids"] if alert_id in members]
+
+    def _track(self, key: Tuple[str, str], alerts):
+        for alert in alerts:
+            self._alert_incidents.setdefault(alert.get("alert_id"), set()).add(key)
+
+    def _correlate(self, alerts, endpoint: Dict[str, Any], technique: str, threat: Dict[str, Any]):
+        """Open or extend the incident for an endpoint/technique pair, attributed to the technique's lead threat"""
+        key = (endpoint.get("endpoint_id"), technique)
+        incident = self._open_incidents.get(key)
+        if incident is not None:
+            seen = self._incident_alerts[key]
+            new_alerts = [alert for alert in alerts if alert.get("alert_id") not in seen]
+            severity = max([incident["severity"], threat.get("severity", "Low")] +
+                           [alert.get("severity", "Low") for alert in new_alerts], key=lambda s: SEVERITY_RANK.get(s, 0))
+            if not new_alerts and severity == incident["severity"]:
+                return
+            seen.update(alert.get("alert_id") for alert in new_alerts)
+            self._track(key, new_alerts)
+            incident["alert_ids"].extend(alert.get("alert_id") for alert in new_alerts)
+            incident["alert_count"] += len(new_alerts)
+            incident["source_ips"].update(alert.get("source_ip") for alert in new_alerts)
+            incident["updated"] = datetime.now()
+            if severity != incident["severity"]:
+                # A more severe threat now leads this technique
+                incident["severity"] = severity
+                incident["threat_id"] = threat.get("threat_id")
+            self.on_incident(incident, False)
+            return
+        latest = alerts[-1]
+        incident = {
+            "incident_id": None,
+            "created": datetime.now(),
+            "updated": datetime.now(),
+            "title": f"{latest.get('attack_type', 'Alert')} on {endpoint.get('hostname', endpoint.get('ip_address'))} linked to {threat.get('type', 'threat')}",
+            "severity": max(latest.get("severity", "Low"), threat.get("severity", "Low"), key=lambda s: SEVERITY_RANK.get(s, 0)),
+            "status": "Open",
+            "endpoint_id": endpoint.get("endpoint_id"),
+            "hostname": endpoint.get("hostname"),
+            "ip_address": endpoint.get("ip_address"),
+            "threat_id": threat.get("threat_id"),
+            "technique": technique,
+            # Alerts still in the window, and every alert ever folded in
+            "alert_ids": [alert.get("alert_id") for alert in alerts],
+            "alert_count": len(alerts),
+            "source_ips": {alert.get("source_ip") for alert in alerts},
+        }
+        self._open_incidents[key] = incident
+        self._incident_alerts[key] = set(incident["alert_ids"])
+        self._track(key, alerts)
+        self.on_incident(incident, True)
+
+    def close_incident(self, incident: Dict[str, Any]):
+        with self._lock:
+            incident["status"] = "Closed"
+            key = (incident.get("endpoint_id"), incident.get("technique"))
+            self._open_incidents.pop(key, None)
+            self._incident_alerts.pop(key, None)
+
+    # -- metrics -------------------------------------------------------------------
+
+    @property
+    def window_alerts(self) -> int:
+        return len(self._alerts)
+
+    def latency_ms(self) -> Dict[str, float]:
+        """Per-event join latency percentiles over recent events"""
+        samples = np.fromiter(self._latencies, dtype=np.float64)
+        if not len(samples):
+            return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        return {"p50": round(float(p50), 3), "p99": round(float(p99), 3), "max": round(float(samples.max() * 1000), 3)}
@@ -0,0 +1,43 @@
+"""Lazily materialized platform datasets.
+
+A dataset attribute declared with ``LazyDataset`` holds nothing until it is
+first read. The first read asks the owner to materialize it, which stores
+an empty value, runs the dataset's generator and stamps a version. Later
+reads are a dictionary lookup. Writes (``self.ids_alerts = []`` inside a
+generator) go straight to the instance, so generators need no changes.
+
+The owner provides ``dataset_versions`` (dataset -> version stamp, present
+once a dataset is fully materialized) and ``materialize(*names)``.
+"""
+
+from typing import Any, Callable, Dict
+
+
+class LazyDataset:
+    """Data descriptor that generates a dataset on first access"""
+
+    def __init__(self, generator: str, factory: Callable[[], Any]):
+        self.generator = generator
+        self.factory = factory
+        self.name = None
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.name not in instance.dataset_versions:
+            instance.materialize(self.name)
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
+def lazy_datasets(cls) -> Dict[str, LazyDataset]:
+    """Lazy dataset declarations of a class, in declaration order"""
+    found = {}
+    for klass in reversed(cls.__mro__):
+        found.update({name: value for name, value in vars(klass).items() if isinstance(value, LazyDataset)})
+    return found
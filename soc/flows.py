@@ -0,0 +1,310 @@
+"""Columnar network flow table.
+
+Flows are held as one NumPy array per field instead of one dict per flow.
+IPs are packed into ``uint32`` and the low-cardinality string fields
+(protocol, service, user agent) are stored as ``uint8`` codes into fixed
+vocabularies, geo location as ``uint16`` so a full country database fits,
+and a row costs ~50 bytes instead of ~2 KB. Byte
+counts are ``uint64`` and durations ``uint32`` so multi-GiB transfers and
+day-long sessions fit.
+"""
+
+import socket
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+PROTOCOLS = ("TCP", "UDP", "HTTP", "HTTPS", "DNS", "SSH", "RDP", "SMB", "FTP", "ICMP")
+SERVICES = ("Web Server", "Database", "File Share", "DNS Server", "Mail Server", "VPN", "API Gateway")
+GEO_LOCATIONS = ("Internal", "USA", "Germany", "Japan", "Brazil", "India")
+USER_AGENTS = ("Browser", "API Client", "Mobile App", "Script")
+DEST_PORTS = (80, 443, 22, 53, 25, 3389, 445, 21)
+
+# Vocabulary for every categorical column, indexed by code. Starts with the
+# synthetic labels; labels first seen in ingested data are appended.
+CATEGORIES = {
+    "protocol": list(PROTOCOLS),
+    "service": list(SERVICES),
+    "geo_location": list(GEO_LOCATIONS),
+    "user_agent": list(USER_AGENTS),
+}
+_CODES = {name: {label: code for code, label in enumerate(labels)} for name, labels in CATEGORIES.items()}
+_CATEGORIES_LOCK = threading.Lock()
+
+# Most labels each categorical column can register; geo_location leaves room
+# for every country of a range database (~250) plus sensor-supplied labels
+CATEGORY_LIMITS = {"protocol": 256, "service": 256, "geo_location": 1024, "user_agent": 256}
+
+# Column name -> storage dtype
+FLOW_SCHEMA = {
+    "timestamp": "datetime64[ms]",
+    "session_id": np.uint32,
+    "source_ip": np.uint32,
+    "dest_ip": np.uint32,
+    "source_port": np.uint16,
+    "dest_port": np.uint16,
+    "protocol": np.uint8,
+    "service": np.uint8,
+    "bytes_sent": np.uint64,
+    "bytes_received": np.uint64,
+    "duration_seconds": np.uint32,
+    "threat_score": np.uint8,
+    "geo_location": np.uint16,
+    "user_agent": np.uint8,
+    "encrypted": np.bool_,
+    "flagged": np.bool_,
+}
+
+
+def ip_to_int(ip: str) -> int:
+    """Pack a dotted IPv4 string into an int"""
+    a, b, c, d = ip.split(".")
+    return (int(a) << 24) | (int(b) << 16) | (int(c) << 8) | int(d)
+
+
+def int_to_ip(value: int) -> str:
+    """Unpack an int into a dotted IPv4 string"""
+    value = int(value)
+    return f"{value >> 24 & 255}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}"
+
+
+def ips_to_strings(values: np.ndarray) -> np.ndarray:
+    """Vectorized uint32 -> dotted IPv4 strings"""
+    values = np.asarray(values, dtype=np.uint32)
+    octets = [((values >> shift) & 255).astype(str) for shift in (24, 16, 8, 0)]
+    out = octets[0]
+    for octet in octets[1:]:
+        out = np.char.add(np.char.add(out, "."), octet)
+    return out
+
+
+def encode_labels(name: str, labels: List[str]) -> np.ndarray:
+    """Categorical codes for labels, registering labels not seen before"""
+    codes = _CODES[name]
+    missing = {label for label in labels if label not in codes}
+    if missing:
+        with _CATEGORIES_LOCK:
+            for label in sorted(missing, key=str):
+                if label in codes:
+                    continue
+                if len(CATEGORIES[name]) >= CATEGORY_LIMITS[name]:
+                    raise ValueError(f"Too many distinct {name} values (limit {CATEGORY_LIMITS[name]})")
+                codes[label] = len(CATEGORIES[name])
+                CATEGORIES[name].append(label)
+    return np.fromiter((codes[label] for label in labels), dtype=FLOW_SCHEMA[name], count=len(labels))
+
+
+def pack_ip_strings(ips: List[str]) -> np.ndarray:
+    """Pack dotted IPv4 strings into uint32 addresses"""
+    packed = b"".join(socket.inet_aton(ip) for ip in ips)
+    return np.frombuffer(packed, dtype=">u4").astype(np.uint32)
+
+
+def pack_ips(a, b, c, d) -> np.ndarray:
+    """Pack octet arrays into uint32 addresses"""
+    return ((np.asarray(a, dtype=np.uint32) << 24) | (np.asarray(b, dtype=np.uint32) << 16)
+            | (np.asarray(c, dtype=np.uint32) << 8) | np.asarray(d, dtype=np.uint32))
+
+
+class FlowTable:
+    """Append-only columnar store for network flows"""
+
+    def __init__(self, capacity: int = 4096):
+        self._size = 0
+        # Bumped by clear() so readers can tell the rows were replaced
+        self.generation = 0
+        self._capacity = max(int(capacity), 1)
+        self._columns = {name: np.empty(self._capacity, dtype=dtype) for name, dtype in FLOW_SCHEMA.items()}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def columns(self) -> List[str]:
+        return list(FLOW_SCHEMA)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the populated part of the table"""
+        return sum(col[:self._size].nbytes for col in self._columns.values())
+
+    def reserve(self, needed: int):
+        """Grow capacity to hold at least ``needed`` rows"""
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, col in self._columns.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:self._size] = col[:self._size]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    def append_batch(self, batch: Dict[str, np.ndarray]) -> int:
+        """Append a batch of column arrays; returns the first new row index"""
+        lengths = {len(batch[name]) for name in FLOW_SCHEMA}
+        if len(lengths) != 1:
+            raise ValueError("All flow columns in a batch must have the same length")
+        count = lengths.pop()
+        start = self._size
+        self.reserve(start + count)
+        for name, col in self._columns.items():
+            col[start:start + count] = batch[name]
+        self._size = start + count
+        return start
+
+    def clear(self):
+        """Drop all rows but keep the allocated capacity"""
+        self._size = 0
+        self.generation += 1
+
+    def retain(self, keep: np.ndarray) -> int:
+        """Compact the table to the rows where ``keep`` is set, in order; returns the rows dropped"""
+        keep = np.asarray(keep, dtype=bool)
+        if len(keep) != self._size:
+            raise ValueError("keep mask must have one entry per row")
+        kept = int(np.count_nonzero(keep))
+        if kept == self._size:
+            return 0
+        for col in self._columns.values():
+            col[:kept] = col[:self._size][keep]
+        dropped = self._size - kept
+        self._size = kept
+        self.generation += 1
+        return dropped
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of a column (codes for categorical columns)"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def writable_column(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Writable view of a column slice for in-place scoring stages"""
+        stop = self._size if stop is None else min(stop, self._size)
+        return self._columns[name][start:stop]
+
+    def code_of(self, name: str, label: str) -> int:
+        """Categorical code for a label"""
+        return _CODES[name][label]
+
+    def count(self, name: str, label: Any = True) -> int:
+        """Number of rows where column equals value (labels for categoricals)"""
+        value = self.code_of(name, label) if name in CATEGORIES else label
+        return int(np.count_nonzero(self.column(name) == value))
+
+    def value_counts(self, name: str) -> Dict[str, int]:
+        """Counts per label of a categorical column"""
+        counts = np.bincount(self.column(name), minlength=len(CATEGORIES[name]))
+        return {label: int(counts[code]) for code, label in enumerate(CATEGORIES[name])}
+
+    def to_frame(self, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """Decode a row range into a display DataFrame"""
+        stop = self._size if stop is None else min(stop, self._size)
+        return self._decode(slice(start, stop))
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        """Decode the given row ids into a display DataFrame"""
+        return self._decode(np.asarray(rows, dtype=np.int64))
+
+    def _decode(self, selector) -> pd.DataFrame:
+        data = {}
+        for name in FLOW_SCHEMA:
+            col = self._columns[name][:self._size][selector]
+            if name in CATEGORIES:
+                data[name] = pd.Categorical.from_codes(col, categories=list(CATEGORIES[name]))
+            elif name in ("source_ip", "dest_ip"):
+                data[name] = ips_to_strings(col)
+            elif name == "session_id":
+                data[name] = np.char.add("SESS-", col.astype(str))
+            else:
+                data[name] = col
+        return pd.DataFrame(data)
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Decode a single flow into the legacy dict layout"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("flow index out of range")
+        record = {}
+        for name in FLOW_SCHEMA:
+            value = self._columns[name][index]
+            if name in CATEGORIES:
+                record[name] = CATEGORIES[name][value]
+            elif name in ("source_ip", "dest_ip"):
+                record[name] = int_to_ip(value)
+            elif name == "session_id":
+                record[name] = f"SESS-{value}"
+            elif name == "timestamp":
+                record[name] = value.astype(datetime)
+            else:
+                record[name] = value.item()
+        return record
+
+
+# Defaults for fields missing from ingested flow records
+_FLOW_DEFAULTS = {
+    "session_id": 0, "source_port": 0, "dest_port": 0, "bytes_sent": 0, "bytes_received": 0,
+    "duration_seconds": 0, "threat_score": 0, "encrypted": False, "flagged": False,
+}
+
+
+def _parse_timestamps(values: List[Any]) -> np.ndarray:
+    """ISO strings, datetimes or epoch seconds -> datetime64[ms]"""
+    if values and all(isinstance(value, (int, float)) for value in values):
+        return (np.asarray(values, dtype=np.float64) * 1000).astype("datetime64[ms]")
+    return np.array([value.rstrip("Z") if isinstance(value, str) else value for value in values], dtype="datetime64[ms]")
+
+
+def _coerce_ints(values: List[Any], dtype) -> np.ndarray:
+    """Integer column from ingested values; unparseable values become 0 and out-of-range ones are clipped"""
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64, na_value=0.0)
+    info = np.iinfo(dtype)
+    return np.clip(np.nan_to_num(numbers, nan=0.0), info.min, info.max).astype(dtype)
+
+
+def _coerce_bools(values: List[Any]) -> np.ndarray:
+    """Boolean column from ingested values; strings count as true only when they say so"""
+    return np.fromiter((value.strip().lower() in ("true", "1", "yes") if isinstance(value, str) else bool(value)
+                        for value in values), dtype=np.bool_, count=len(values))
+
+
+def flows_from_records(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Convert flow dicts in the legacy network_activity layout into column arrays;
+    records whose addresses or timestamp do not parse are dropped"""
+    try:
+        return _flow_columns(records)
+    except (ValueError, TypeError, OSError):
+        # Find the bad records one by one rather than losing the batch
+        return _flow_columns([record for record in records if _converts(record)])
+
+
+def _converts(record: Dict[str, Any]) -> bool:
+    try:
+        _flow_columns([record])
+    except (ValueError, TypeError, OSError):
+        return False
+    return True
+
+
+def _flow_columns(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    # Timestamps and addresses first: they are what can fail, before any label is registered
+    now = datetime.now()
+    columns = {}
+    columns["timestamp"] = _parse_timestamps([record.get("timestamp", now) for record in records])
+    columns["session_id"] = _coerce_ints([str(record.get("session_id", 0)).rpartition("-")[2] for record in records], np.uint32)
+    for name in ("source_ip", "dest_ip"):
+        columns[name] = pack_ip_strings([record.get(name, "0.0.0.0") for record in records])
+    for name in CATEGORIES:
+        columns[name] = encode_labels(name, [record.get(name, "Unknown") for record in records])
+    for name, default in _FLOW_DEFAULTS.items():
+        if name == "session_id":
+            continue
+        values = [record.get(name, default) for record in records]
+        columns[name] = _coerce_bools(values) if FLOW_SCHEMA[name] == np.bool_ else _coerce_ints(values, FLOW_SCHEMA[name])
+    return columns
@@ -0,0 +1,312 @@
+"""Geo/ASN enrichment from a local IP range database.
+
+A range database maps disjoint IPv4 ranges to a country, an AS number and
+an AS organization. It is compiled once from CSV into a directory of
+``.npy`` columns (sorted range starts and ends, label indexes, AS numbers)
+plus a JSON label table::
+
+    <db>/starts.npy ends.npy countries.npy asns.npy organizations.npy labels.json
+
+and opened memory-mapped, so every process on the host shares one copy in
+the page cache. Lookups take whole batches of packed addresses and find each
+one's range with a single ``searchsorted`` over the starts. String lookups
+(record fields) go through an LRU cache first, so hot addresses skip parsing
+and searching; the misses of a batch are resolved in one vectorized call.
+
+Private, loopback and link-local addresses are reported as ``Internal``
+without consulting the database; addresses outside every range as
+``Unknown``.
+"""
+
+import csv
+import ipaddress
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from soc.flows import FLOW_SCHEMA, encode_labels
+from soc.ipindex import pack_ip_values
+
+INTERNAL = "Internal"
+UNKNOWN = "Unknown"
+
+# (country, asn, organization) of an address
+GeoMatch = Tuple[str, int, str]
+INTERNAL_MATCH: GeoMatch = (INTERNAL, 0, INTERNAL)
+UNKNOWN_MATCH: GeoMatch = (UNKNOWN, 0, UNKNOWN)
+
+# Packed (network, prefix length) blocks reported as Internal
+PRIVATE_BLOCKS = ((10 << 24, 8), (172 << 24 | 16 << 16, 12), (192 << 24 | 168 << 16, 16), (127 << 24, 8),
+                  (169 << 24 | 254 << 16, 16), (0, 8))
+
+# Header aliases accepted in range CSVs (ip2location / GeoLite2-ASN style)
+CSV_COLUMNS = {
+    "start": ("start", "start_ip", "ip_from", "range_start"),
+    "end": ("end", "end_ip", "ip_to", "range_end"),
+    "network": ("network", "cidr"),
+    "country": ("country", "country_name", "country_code"),
+    "asn": ("asn", "autonomous_system_number", "as_number"),
+    "organization": ("organization", "autonomous_system_organization", "as_organization", "org"),
+}
+
+_COLUMN_FILES = ("starts", "ends", "countries", "asns", "organizations")
+
+# Batches larger than this are searched in sorted order
+_SORTED_SEARCH_MIN = 65536
+
+
+def is_private(keys: np.ndarray) -> np.ndarray:
+    """Mask of packed IPv4 addresses in private, loopback or link-local blocks"""
+    keys = np.asarray(keys, dtype=np.uint32)
+    mask = np.zeros(len(keys), dtype=bool)
+    for network, prefix in PRIVATE_BLOCKS:
+        mask |= (keys >> np.uint32(32 - prefix)) == np.uint32(network >> (32 - prefix))
+    return mask
+
+
+def _parse_address(value: str) -> int:
+    value = value.strip()
+    return int(value) if value.isdigit() else int(ipaddress.IPv4Address(value))
+
+
+def read_range_csv(path: str) -> Dict[str, Any]:
+    """Range columns from a CSV with start/end (dotted or integer) or CIDR network columns"""
+    starts, ends, countries, asns, organizations = [], [], [], [], []
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        header = {name.strip().lower(): name for name in reader.fieldnames or []}
+        columns = {key: next((header[alias] for alias in aliases if alias in header), None)
+                   for key, aliases in CSV_COLUMNS.items()}
+        if columns["network"] is None and (columns["start"] is None or columns["end"] is None):
+            raise ValueError(f"{path}: needs a network column or start and end columns")
+        for row in reader:
+            try:
+                if columns["network"] is not None:
+                    network = ipaddress.ip_network(row[columns["network"]].strip(), strict=False)
+                    if network.version != 4:
+                        continue
+                    start, end = int(network.network_address), int(network.broadcast_address)
+                else:
+                    start, end = _parse_address(row[columns["start"]]), _parse_address(row[columns["end"]])
+            except (ValueError, ipaddress.AddressValueError):
+                continue
+            starts.append(start)
+            ends.append(end)
+            countries.append((row.get(columns["country"]) or UNKNOWN).strip() if columns["country"] else UNKNOWN)
+            asn = (row.get(columns["asn"]) or "0").strip().upper().lstrip("AS") if columns["asn"] else "0"
+            asns.append(int(asn) if asn.isdigit() else 0)
+            organizations.append((row.get(columns["organization"]) or UNKNOWN).strip() if columns["organization"] else UNKNOWN)
+    return {"start": starts, "end": ends, "country": countries, "asn": asns, "organization": organizations}
+
+
+def write_database(ranges: Dict[str, Any], directory: str, source: str = "") -> str:
+    """Compile range columns into a database directory; replaces an existing one atomically"""
+    order = np.argsort(np.asarray(ranges["start"], dtype=np.uint64), kind="stable")
+    starts = np.asarray(ranges["start"], dtype=np.uint32)[order]
+    ends = np.asarray(ranges["end"], dtype=np.uint32)[order]
+    if len(starts) > 1 and np.any(starts[1:] <= ends[:-1]):
+        raise ValueError("IP ranges overlap; a range database needs disjoint ranges")
+    country_labels, countries = np.unique(np.asarray(ranges["country"], dtype=object)[order].astype(str), return_inverse=True)
+    organization_labels, organizations = np.unique(np.asarray(ranges["organization"], dtype=object)[order].astype(str),
+                                                   return_inverse=True)
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".geoip-", dir=parent)
+    columns = {
+        "starts": starts,
+        "ends": ends,
+        "countries": countries.astype(np.uint16),
+        "asns": np.asarray(ranges["asn"], dtype=np.uint32)[order],
+        "organizations": organizations.astype(np.uint32),
+    }
+    for name, values in columns.items():
+        np.save(os.path.join(staging, f"{name}.npy"), values)
+    with open(os.path.join(staging, "labels.json"), "w", encoding="utf-8") as handle:
+        json.dump({"countries": country_labels.tolist(), "organizations": organization_labels.tolist(),
+                   "source": source, "ranges": len(starts)}, handle)
+    # Built off to the side and moved into place, so no reader opens a partial database;
+    # processes that already mapped the old files keep reading them
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    try:
+        os.replace(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.isdir(directory):
+            raise
+    return directory
+
+
+class GeoDatabase:
+    """Memory-mapped, sorted IPv4 range table"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "labels.json"), encoding="utf-8") as handle:
+            labels = json.load(handle)
+        self.country_labels: List[str] = labels["countries"]
+        self.organization_labels: List[str] = labels["organizations"]
+        self.source = labels.get("source", "")
+        self.starts, self.ends, self.countries, self.asns, self.organizations = (
+            np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in _COLUMN_FILES)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def find(self, keys: np.ndarray) -> np.ndarray:
+        """Range index of each packed IPv4 address, -1 where no range covers it"""
+        keys = np.asarray(keys, dtype=np.uint32)
+        if len(keys) > _SORTED_SEARCH_MIN:
+            # Searching in key order walks the starts forwards, which is about twice as fast on big batches
+            order = np.argsort(keys)
+            slots = np.empty(len(keys), dtype=np.int64)
+            slots[order] = np.searchsorted(self.starts, keys[order], side="right")
+            slots -= 1
+        else:
+            slots = np.searchsorted(self.starts, keys, side="right") - 1
+        covered = slots >= 0
+        covered[covered] = keys[covered] <= self.ends[slots[covered]]
+        slots[~covered] = -1
+        return slots
+
+
+def open_database(path: Optional[str] = None, cache_dir: Optional[str] = None) -> GeoDatabase:
+    """Open a compiled database, compiling a CSV next to it first if it is new or changed
+
+    Without a path, a synthetic database (same countries and organizations as
+    the synthetic datasets) is built once per host and reused.
+    """
+    if path is None:
+        from soc.synthetic import SyntheticGenerator
+
+        directory = os.path.join(cache_dir or tempfile.gettempdir(), "soc-geoip-synthetic")
+        if not os.path.exists(os.path.join(directory, "labels.json")):
+            generator = SyntheticGenerator(0)
+            write_database(generator.geo_ranges(generator.rng("geoip")), directory, source="synthetic")
+        return GeoDatabase(directory)
+    if os.path.isdir(path):
+        return GeoDatabase(path)
+    directory = os.path.join(cache_dir or os.path.dirname(os.path.abspath(path)), os.path.basename(path) + ".db")
+    labels = os.path.join(directory, "labels.json")
+    if not os.path.exists(labels) or os.path.getmtime(labels) < os.path.getmtime(path):
+        write_database(read_range_csv(path), directory, source=os.path.abspath(path))
+    return GeoDatabase(directory)
+
+
+class GeoEnricher:
+    """Batch geo/ASN lookups over a range database, with an LRU cache for string addresses"""
+
+    def __init__(self, database: GeoDatabase, cache_size: int = 65536):
+        self.database = database
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, GeoMatch]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Database country index -> geo_location code, registered on first use (-1 until then)
+        self._location_codes = np.full(len(database.country_labels), -1, dtype=np.int16)
+
+    def location_codes(self, keys: np.ndarray) -> np.ndarray:
+        """geo_location codes (``soc.flows`` vocabulary) of packed IPv4 addresses"""
+        keys = np.asarray(keys, dtype=np.uint32)
+        internal_code, unknown_code = encode_labels("geo_location", [INTERNAL, UNKNOWN])
+        codes = np.full(len(keys), unknown_code, dtype=FLOW_SCHEMA["geo_location"])
+        slots = self.database.find(keys)
+        found = slots >= 0
+        countries = self.database.countries[slots[found]]
+        table = self._location_codes
+        missing = np.unique(countries[table[countries] < 0])
+        if len(missing):
+            table[missing] = encode_labels("geo_location", [self.database.country_labels[index] for index in missing])
+        codes[found] = table[countries]
+        codes[is_private(keys)] = internal_code
+        return codes
+
+    def flow_locations(self, source_ips: np.ndarray, dest_ips: np.ndarray) -> np.ndarray:
+        """geo_location codes of flows: the location of the external side, Internal when both are internal"""
+        source_ips = np.asarray(source_ips, dtype=np.uint32)
+        external = np.where(is_private(source_ips), dest_ips, source_ips)
+        return self.location_codes(external)
+
+    def fill_flow_locations(self, flows: Dict[str, np.ndarray]):
+        """Enrich flows whose geo_location is Unknown (not set by the sensor)"""
+        unknown_code = encode_labels("geo_location", [UNKNOWN])[0]
+        rows = np.flatnonzero(flows["geo_location"] == unknown_code)
+        if len(rows):
+            locations = np.array(flows["geo_location"])
+            locations[rows] = self.flow_locations(flows["source_ip"][rows], flows["dest_ip"][rows])
+            flows["geo_location"] = locations
+
+    def resolve(self, keys: np.ndarray) -> List[GeoMatch]:
+        """Matches of packed IPv4 addresses, without the cache"""
+        keys = np.asarray(keys, dtype=np.uint32)
+        slots = self.database.find(keys)
+        private = is_private(keys)
+        countries = self.database.country_labels
+        organizations = self.database.organization_labels
+        found = np.flatnonzero((slots >= 0) & ~private)
+        country_index = self.database.countries[slots[found]].tolist()
+        asns = self.database.asns[slots[found]].tolist()
+        organization_index = self.database.organizations[slots[found]].tolist()
+        matches = [INTERNAL_MATCH if is_internal else UNKNOWN_MATCH for is_internal in private.tolist()]
+        for position, country, asn, organization in zip(found.tolist(), country_index, asns, organization_index):
+            matches[position] = (countries[country], asn, organizations[organization])
+        return matches
+
+    def lookup_many(self, ips: List[str]) -> List[GeoMatch]:
+        """Matches of address strings; cache misses are resolved in one batch"""
+        matches: List[Optional[GeoMatch]] = [None] * len(ips)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for position, ip in enumerate(ips):
+                match = self._cache.get(ip)
+                if match is None:
+                    missing.setdefault(ip, []).append(position)
+                else:
+                    self._cache.move_to_end(ip)
+                    matches[position] = match
+            self.hits += len(ips) - sum(len(positions) for positions in missing.values())
+            self.misses += len(missing)
+        if not missing:
+            return matches
+        values = list(missing)
+        keys, key_positions, _ = pack_ip_values(values)
+        # IPv6 and malformed values stay Unknown
+        resolved = [UNKNOWN_MATCH] * len(values)
+        for position, match in zip(key_positions.tolist(), self.resolve(keys)):
+            resolved[position] = match
+        with self._lock:
+            for ip, match in zip(values, resolved):
+                self._cache[ip] = match
+                for position in missing[ip]:
+                    matches[position] = match
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return matches
+
+    def lookup(self, ip: str) -> GeoMatch:
+        return self.lookup_many([ip])[0]
+
+    def enrich_records(self, records: List[Dict[str, Any]], ip_field: str, country: Optional[str] = None,
+                       asn: Optional[str] = None, organization: Optional[str] = None):
+        """Set the named country / AS number / AS organization fields of records from their IP field"""
+        matches = self.lookup_many([str(record.get(ip_field, "")) for record in records])
+        for record, (match_country, match_asn, match_organization) in zip(records, matches):
+            if country:
+                record[country] = match_country
+            if asn:
+                record[asn] = match_asn
+            if organization:
+                record[organization] = match_organization
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"ranges": len(self.database), "source": self.database.source, "cached": len(self._cache),
+                    "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
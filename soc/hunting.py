@@ -0,0 +1,786 @@
+"""Threat-hunting queries over platform datasets.
+
+A hunt names a dataset, an optional time window, a filter and an optional
+group-by::
+
+    network_activity last 1h where protocol in (SSH, RDP) and dest_ip in 192.168.0.0/16
+        and bytes_sent > 1000000 | count by source_ip
+    ids_alerts where severity = Critical and not false_positive | count by attack_type
+    endpoint_telemetry where risk_score >= 70 and department in ("Finance", "HR")
+
+Filters support ``= != < <= > >=``, ``in (...)``, ``not in``, ``between a
+and b``, ``contains`` (case-insensitive), CIDR and address literals on IP
+fields, bare boolean fields, ``and``/``or``/``not`` and parentheses.
+
+A query is parsed, then planned against the columns it touches and run as
+vectorized masks. Flow columns are used as stored (categorical codes, packed
+IPs); record datasets are converted to columns on first use and extended as
+records are appended, with strings factorized so they are filtered like
+categoricals. The planner:
+
+* turns the time window into a row range by binary search when the
+  timestamps are in order, and into a mask otherwise;
+* answers address, address-list and narrow CIDR predicates from the packed
+  IP index when the index is caught up with the dataset;
+* runs the AND-ed predicates cheapest first, and once few rows are left
+  evaluates the rest on just those rows.
+
+Every step records its access path, rows in and out and time, so the plan
+of a slow hunt shows where the time went. Results keep the matching row ids
+and are decoded a page at a time.
+"""
+
+import ipaddress
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from soc.flows import CATEGORIES, FlowTable, int_to_ip
+from soc.ipindex import IP_FIELDS, PlatformIPIndex, pack_ip_values
+
+# Datasets a hunt can name
+HUNT_DATASETS = ("network_activity", "ids_alerts", "endpoint_telemetry")
+
+# Relative cost of one predicate per row, used to order AND-ed predicates
+PREDICATE_COSTS = {"index": 0.1, "category": 1.0, "bool": 1.0, "number": 2.0, "ip": 2.0, "time": 2.0, "other": 20.0}
+
+# Once an AND leaves fewer than this share of rows, later predicates run on the survivors only
+SPARSE_FRACTION = 1 / 16
+
+# The IP index is used only when it is at most this many rows behind the dataset
+INDEX_CATCHUP_ROWS = 1_000_000
+
+# CIDRs wider than this prefix are scanned rather than looked up
+INDEX_MIN_PREFIX = 16
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<string>"[^"]*"|'[^']*')
+      | (?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}(?:/\d{1,2})?)
+      | (?P<duration>\d+[smhd])\b
+      | (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+      | (?P<op>==|!=|>=|<=|=|<|>)
+      | (?P<punct>[(),|])
+      | (?P<word>[A-Za-z_][\w.\-]*)
+    )""", re.VERBOSE)
+
+_KEYWORDS = {"where", "and", "or", "not", "in", "between", "contains", "last", "count", "by", "true", "false"}
+
+
+def tokenize(text: str) -> List[Tuple[str, Any, int]]:
+    """(kind, value, position) tokens of a query"""
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Unexpected character at {position}: {text[position:position + 10]!r}")
+        kind = match.lastgroup
+        value, start = match.group(kind), match.start(kind)
+        if kind == "string":
+            value = value[1:-1]
+        elif kind == "number":
+            value = float(value) if any(char in value for char in ".eE") else int(value)
+        elif kind == "word" and value.lower() in _KEYWORDS:
+            kind, value = "keyword", value.lower()
+        tokens.append((kind, value, start))
+        position = match.end()
+    return tokens
+
+
+class Predicate:
+    """One field comparison of a parsed query"""
+
+    def __init__(self, field: str, op: str, value: Any):
+        self.field = field
+        self.op = op
+        self.value = value
+
+    def __repr__(self) -> str:
+        value = f"({', '.join(map(str, self.value))})" if isinstance(self.value, list) else self.value
+        if self.op == "between":
+            value = f"{self.value[0]} and {self.value[1]}"
+        return f"{self.field} {self.op} {value}"
+
+
+class Query:
+    """Parsed hunt"""
+
+    def __init__(self, dataset: str, window: Optional[timedelta], where: Any, group_by: Optional[List[str]], text: str):
+        self.dataset = dataset
+        self.window = window
+        self.where = where
+        self.group_by = group_by
+        self.text = text
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.index = 0
+
+    def peek(self, kind: str = None, value: Any = None) -> bool:
+        if self.index >= len(self.tokens):
+            return False
+        token_kind, token_value, _ = self.tokens[self.index]
+        return (kind is None or token_kind == kind) and (value is None or token_value == value)
+
+    def take(self, kind: str = None, value: Any = None, expected: str = None) -> Any:
+        if not self.peek(kind, value):
+            found = repr(self.tokens[self.index][1]) if self.index < len(self.tokens) else "end of query"
+            position = self.tokens[self.index][2] if self.index < len(self.tokens) else len(self.text)
+            raise ValueError(f"Expected {expected or value or kind} at {position}, found {found}")
+        value = self.tokens[self.index][1]
+        self.index += 1
+        return value
+
+    def parse(self) -> Query:
+        dataset = self.take("word", expected="dataset name")
+        if dataset not in HUNT_DATASETS:
+            raise ValueError(f"Unknown dataset {dataset!r}; hunts run over {', '.join(HUNT_DATASETS)}")
+        window = None
+        if self.peek("keyword", "last"):
+            self.index += 1
+            duration = self.take("duration", expected="duration such as 15m, 1h or 7d")
+            window = timedelta(seconds=int(duration[:-1]) * DURATION_UNITS[duration[-1]])
+        where = None
+        if self.peek("keyword", "where"):
+            self.index += 1
+            where = self.expression()
+        group_by = None
+        if self.peek("punct", "|"):
+            self.index += 1
+            self.take("keyword", "count")
+            group_by = []
+            if self.peek("keyword", "by"):
+                self.index += 1
+                group_by.append(self.take("word", expected="field name"))
+                while self.peek("punct", ","):
+                    self.index += 1
+                    group_by.append(self.take("word", expected="field name"))
+        if self.index < len(self.tokens):
+            raise ValueError(f"Unexpected {self.tokens[self.index][1]!r} at {self.tokens[self.index][2]}")
+        return Query(dataset, window, where, group_by, self.text)
+
+    def expression(self):
+        terms = [self.term()]
+        while self.peek("keyword", "or"):
+            self.index += 1
+            terms.append(self.term())
+        return terms[0] if len(terms) == 1 else ("or", terms)
+
+    def term(self):
+        factors = [self.factor()]
+        while self.peek("keyword", "and"):
+            self.index += 1
+            factors.append(self.factor())
+        return factors[0] if len(factors) == 1 else ("and", factors)
+
+    def factor(self):
+        if self.peek("keyword", "not"):
+            self.index += 1
+            return ("not", self.factor())
+        if self.peek("punct", "("):
+            self.index += 1
+            node = self.expression()
+            self.take("punct", ")")
+            return node
+        return self.predicate()
+
+    def literal(self) -> Any:
+        if self.peek("keyword", "true") or self.peek("keyword", "false"):
+            return self.take() == "true"
+        if self.peek("string") or self.peek("number") or self.peek("ip") or self.peek("word"):
+            return self.take()
+        return self.take(expected="value")
+
+    def predicate(self) -> Predicate:
+        field = self.take("word", expected="field name")
+        if self.peek("op"):
+            op = self.take()
+            return Predicate(field, "=" if op == "==" else op, self.literal())
+        negate = False
+        if self.peek("keyword", "not"):
+            self.index += 1
+            negate = True
+            if not self.peek("keyword", "in"):
+                return self.take("keyword", "in")
+        if self.peek("keyword", "in"):
+            self.index += 1
+            if self.peek("punct", "("):
+                self.index += 1
+                values = [self.literal()]
+                while self.peek("punct", ","):
+                    self.index += 1
+                    values.append(self.literal())
+                self.take("punct", ")")
+            else:
+                values = [self.literal()]
+            return Predicate(field, "not in" if negate else "in", values)
+        if self.peek("keyword", "between"):
+            self.index += 1
+            low = self.literal()
+            self.take("keyword", "and")
+            return Predicate(field, "between", [low, self.literal()])
+        if self.peek("keyword", "contains"):
+            self.index += 1
+            return Predicate(field, "contains", str(self.literal()))
+        # A bare field is a boolean test
+        return Predicate(field, "=", True)
+
+
+def parse_query(text: str) -> Query:
+    return _Parser(text).parse()
+
+
+class FlowColumns:
+    """Column access over a flow table, fixed at the row count seen when created"""
+
+    def __init__(self, table: FlowTable):
+        self.table = table
+        self.rows = len(table)
+
+    def fields(self) -> List[str]:
+        return list(self.table.columns)
+
+    def kind(self, field: str) -> str:
+        if field not in self.table.columns:
+            raise ValueError(f"Unknown network_activity field {field!r}; fields: {', '.join(self.table.columns)}")
+        if field in CATEGORIES:
+            return "category"
+        if field in ("source_ip", "dest_ip"):
+            return "ip"
+        if field == "timestamp":
+            return "time"
+        if field in ("encrypted", "flagged"):
+            return "bool"
+        return "number"
+
+    def column(self, field: str) -> np.ndarray:
+        return self.table.column(field)[:self.rows]
+
+    def labels(self, field: str) -> List[str]:
+        return CATEGORIES[field]
+
+    def code(self, field: str, value: Any) -> int:
+        if field == "session_id":
+            return int(str(value).rpartition("-")[2] or 0)
+        return value
+
+
+class RecordColumns:
+    """Lazily built columns over a list of record dicts, extended as records are appended"""
+
+    def __init__(self, dataset: str, records: List[Dict[str, Any]]):
+        self.dataset = dataset
+        self.records = records
+        self.rows = 0
+        self._columns: Dict[str, Any] = {}
+        self._kinds: Dict[str, str] = {}
+        self.catch_up()
+
+    def catch_up(self):
+        """Fix the row count at the current length; built columns are extended lazily"""
+        self.rows = len(self.records)
+
+    def fields(self) -> List[str]:
+        return list(self.records[0]) if self.records else []
+
+    def kind(self, field: str) -> str:
+        kind = self._kinds.get(field)
+        if kind is not None:
+            return kind
+        sample = next((record[field] for record in self.records[:self.rows] if record.get(field) is not None), None)
+        if sample is None and not any(field in record for record in self.records[:100]):
+            raise ValueError(f"Unknown {self.dataset} field {field!r}; fields: {', '.join(self.fields())}")
+        if field in IP_FIELDS.get(self.dataset, ()):
+            kind = "ip"
+        elif isinstance(sample, bool):
+            kind = "bool"
+        elif isinstance(sample, (int, float, np.integer, np.floating)):
+            kind = "number"
+        elif isinstance(sample, datetime):
+            kind = "time"
+        elif isinstance(sample, str) or sample is None:
+            kind = "category"
+        else:
+            kind = "other"
+        self._kinds[field] = kind
+        return kind
+
+    def _convert(self, field: str, records: List[Dict[str, Any]], labels: Optional[Dict[str, int]]):
+        kind = self.kind(field)
+        values = [record.get(field) for record in records]
+        if kind == "ip":
+            keys, positions, _ = pack_ip_values(values)
+            packed = np.zeros(len(values), dtype=np.uint32)
+            packed[positions] = keys
+            return packed
+        if kind == "bool":
+            return np.fromiter((bool(value) for value in values), dtype=bool, count=len(values))
+        if kind == "number":
+            return np.fromiter((np.nan if value is None else value for value in values), dtype=np.float64, count=len(values))
+        if kind == "time":
+            return np.array(values, dtype="datetime64[ms]")
+        if kind == "category":
+            codes = np.empty(len(values), dtype=np.int32)
+            for position, value in enumerate(values):
+                label = "" if value is None else str(value)
+                code = labels.get(label)
+                if code is None:
+                    code = labels[label] = len(labels)
+                codes[position] = code
+            return codes
+        return np.array(values, dtype=object)
+
+    def column(self, field: str) -> np.ndarray:
+        built = self._columns.get(field)
+        done = 0 if built is None else len(built[0])
+        if done < self.rows:
+            labels = {} if built is None else built[1]
+            tail = self._convert(field, self.records[done:self.rows], labels)
+            values = tail if built is None else np.concatenate([built[0], tail])
+            self._columns[field] = built = (values, labels)
+        return built[0][:self.rows]
+
+    def labels(self, field: str) -> List[str]:
+        self.column(field)
+        return list(self._columns[field][1])
+
+    def code(self, field: str, value: Any) -> Any:
+        return value
+
+
+class _Frame:
+    """Rows of a column source: a contiguous range, or selected row ids"""
+
+    def __init__(self, source, start: int, stop: int, rows: Optional[np.ndarray] = None):
+        self.source = source
+        self.start = start
+        self.stop = stop
+        self.rows = rows
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.stop - self.start if self.rows is None else len(self.rows)
+
+    def column(self, field: str) -> np.ndarray:
+        values = self._cache.get(field)
+        if values is None:
+            values = self.source.column(field)
+            values = values[self.start:self.stop] if self.rows is None else values[self.rows]
+            self._cache[field] = values
+        return values
+
+    def row_ids(self) -> np.ndarray:
+        return np.arange(self.start, self.stop, dtype=np.int64) if self.rows is None else self.rows
+
+    def take(self, positions: np.ndarray) -> "_Frame":
+        if self.rows is None:
+            return _Frame(self.source, self.start, self.stop, positions.astype(np.int64) + self.start)
+        return _Frame(self.source, self.start, self.stop, self.rows[positions])
+
+
+def _ip_networks(values: List[Any]) -> List[ipaddress.IPv4Network]:
+    networks = []
+    for value in values:
+        network = ipaddress.ip_network(str(value).strip(), strict=False)
+        if network.version != 4:
+            raise ValueError(f"Only IPv4 addresses can be hunted: {value}")
+        networks.append(network)
+    return networks
+
+
+def _as_time(value: Any) -> np.datetime64:
+    try:
+        return np.datetime64(str(value).replace(" ", "T").rstrip("Z"), "ms")
+    except ValueError:
+        raise ValueError(f"Not a timestamp: {value!r}") from None
+
+
+class _Step:
+    """A compiled predicate with its plan entry"""
+
+    def __init__(self, predicate: Any, kind: str, access: str, evaluate: Callable[[_Frame], np.ndarray]):
+        self.predicate = predicate
+        self.kind = kind
+        self.access = access
+        self.evaluate = evaluate
+        self.cost = PREDICATE_COSTS.get(kind, PREDICATE_COSTS["other"])
+
+
+class HuntResult:
+    """Matching row ids of a hunt, its group counts and its executed plan"""
+
+    def __init__(self, query: Query, data: Any, rows: np.ndarray, groups: Optional[pd.DataFrame],
+                 plan: List[Dict[str, Any]], elapsed_ms: float):
+        self.query = query
+        self.data = data
+        self.rows = rows
+        self.groups = groups
+        self.plan = plan
+        self.elapsed_ms = elapsed_ms
+        self.cached = False
+
+    @property
+    def total(self) -> int:
+        return len(self.rows)
+
+    def pages(self, page_size: int) -> int:
+        return max(1, -(-self.total // page_size))
+
+    def page(self, number: int, page_size: int = 100) -> pd.DataFrame:
+        """Matching records of a page (1-based), newest rows first"""
+        newest_first = self.rows[::-1][(number - 1) * page_size:number * page_size]
+        if isinstance(self.data, FlowTable):
+            return self.data.take(newest_first)
+        return pd.DataFrame([self.data[row] for row in newest_first.tolist()])
+
+
+class HuntEngine:
+    """Plans and runs hunts, keeping record columns and recent results between runs"""
+
+    def __init__(self, datasets: Callable[[str], Any], ip_index: Optional[PlatformIPIndex] = None,
+                 cache_size: int = 8):
+        self.datasets = datasets
+        self.ip_index = ip_index
+        self.cache_size = cache_size
+        self._record_columns: Dict[str, RecordColumns] = {}
+        # Per flow table: (generation, rows checked, timestamps in order)
+        self._time_order: Dict[str, Tuple[int, int, bool]] = {}
+        self._results: "OrderedDict[Tuple, HuntResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, dataset: str):
+        """Forget converted columns of a dataset whose records were edited or removed in place"""
+        with self._lock:
+            self._record_columns.pop(dataset, None)
+            self._time_order.pop(dataset, None)
+            for key in [key for key in self._results if key[1] == dataset]:
+                del self._results[key]
+
+    def _source(self, dataset: str, data: Any):
+        if isinstance(data, FlowTable):
+            return FlowColumns(data)
+        columns = self._record_columns.get(dataset)
+        if columns is None or columns.records is not data or columns.rows > len(data):
+            columns = self._record_columns[dataset] = RecordColumns(dataset, data)
+            self._time_order.pop(dataset, None)
+        columns.catch_up()
+        return columns
+
+    def _time_ordered(self, dataset: str, data: Any, source) -> bool:
+        """Whether the timestamps are non-decreasing; checked incrementally as rows are appended"""
+        generation = getattr(data, "generation", id(data))
+        known_generation, checked, ordered = self._time_order.get(dataset, (None, 0, True))
+        if known_generation != generation or checked > source.rows:
+            checked, ordered = 0, True
+        if ordered and source.rows > checked:
+            stamps = source.column("timestamp")
+            tail = stamps[max(checked - 1, 0):source.rows]
+            ordered = bool(np.all(tail[1:] >= tail[:-1]))
+        self._time_order[dataset] = (generation, source.rows, ordered)
+        return ordered
+
+    def _index_lag(self, dataset: str, data: Any) -> Optional[int]:
+        """Rows the IP index is behind the dataset, or None without an index"""
+        if self.ip_index is None or dataset not in self.ip_index.fields:
+            return None
+        return len(data) - self.ip_index.indexed_rows(dataset, data)
+
+    def _compile(self, predicate: Predicate, source, dataset: str, data: Any) -> _Step:
+        field, op, value = predicate.field, predicate.op, predicate.value
+        kind = source.kind(field)
+        values = value if isinstance(value, list) else [value]
+        if op in ("<", "<=", ">", ">=") and kind in ("category", "ip", "bool", "other"):
+            raise ValueError(f"{predicate}: {op} needs a numeric or time field")
+        if op == "contains" and kind not in ("category", "other"):
+            raise ValueError(f"{predicate}: contains needs a text field")
+
+        if kind == "ip":
+            networks = _ip_networks(values)
+            if op == "between":
+                ranges = [(int(networks[0].network_address), int(networks[1].broadcast_address))]
+            else:
+                ranges = [(int(network.network_address), int(network.broadcast_address)) for network in networks]
+            negate = op in ("!=", "not in")
+            lag = self._index_lag(dataset, data)
+            narrow = op != "between" and all(network.prefixlen >= INDEX_MIN_PREFIX for network in networks)
+            if not negate and narrow and lag is not None and lag <= INDEX_CATCHUP_ROWS:
+                index, query = self.ip_index, [str(network) for network in networks]
+                hits_cache = {}
+
+                def by_index(frame: _Frame) -> np.ndarray:
+                    hits = hits_cache.get("rows")
+                    if hits is None:
+                        index.sync(dataset, data)
+                        hits = hits_cache["rows"] = index.lookup(dataset, query, fields=[field])
+                    if frame.rows is None:
+                        hits = hits[(hits >= frame.start) & (hits < frame.stop)]
+                        mask = np.zeros(len(frame), dtype=bool)
+                        mask[hits - frame.start] = True
+                        return mask
+                    return np.isin(frame.rows, hits, assume_unique=True)
+
+                behind = f", catching up {lag:,} rows" if lag else ""
+                return _Step(predicate, "index", f"ip index lookup on {field}{behind}", by_index)
+
+            def by_scan(frame: _Frame) -> np.ndarray:
+                column = frame.column(field)
+                singles = np.asarray([low for low, high in ranges if low == high], dtype=np.uint32)
+                mask = np.isin(column, singles) if len(singles) else np.zeros(len(column), dtype=bool)
+                for low, high in ranges:
+                    if low != high:
+                        mask |= (column >= np.uint32(low)) & (column <= np.uint32(high))
+                return ~mask if negate else mask
+
+            reason = "" if lag is None else (" (negated)" if negate else " (wide range)" if not narrow
+                                             else f" (index {lag:,} rows behind)")
+            return _Step(predicate, "ip", f"range scan on {field}{reason}", by_scan)
+
+        if kind == "category":
+            labels = source.labels(field)
+            if op == "contains":
+                needle = str(value).lower()
+                selected = [needle in str(label).lower() for label in labels]
+            elif op in ("=", "!=", "in", "not in"):
+                wanted = {str(item) for item in values}
+                selected = [str(label) in wanted for label in labels]
+                if op in ("!=", "not in"):
+                    selected = [not hit for hit in selected]
+            else:
+                raise ValueError(f"{predicate}: {op} is not supported on {field}")
+            lookup = np.asarray(selected + [op in ("!=", "not in")], dtype=bool)
+
+            def by_lookup(frame: _Frame) -> np.ndarray:
+                codes = frame.column(field)
+                # Labels registered after planning fall through to the last entry
+                return lookup[np.minimum(codes, len(lookup) - 1)]
+
+            return _Step(predicate, "category", f"label lookup table on {field} ({sum(selected)} of {len(labels)} labels)",
+                         by_lookup)
+
+        if kind == "bool":
+            if op not in ("=", "!="):
+                raise ValueError(f"{predicate}: only = and != apply to {field}")
+            truth = value if isinstance(value, bool) else str(value).lower() in ("true", "1", "yes")
+            truth = truth if op == "=" else not truth
+            return _Step(predicate, "bool", f"flag test on {field}",
+                         lambda frame: frame.column(field) if truth else ~frame.column(field))
+
+        if kind in ("number", "time"):
+            convert = _as_time if kind == "time" else (lambda item: float(source.code(field, item)))
+            try:
+                bounds = [convert(item) for item in values]
+            except (TypeError, ValueError):
+                raise ValueError(f"{predicate}: {field} needs {'a timestamp' if kind == 'time' else 'a number'}") from None
+
+            def by_compare(frame: _Frame) -> np.ndarray:
+                column = frame.column(field)
+                if op == "=":
+                    return column == bounds[0]
+                if op == "!=":
+                    return column != bounds[0]
+                if op in ("in", "not in"):
+                    if column.dtype.kind == "u" and column.dtype.itemsize <= 2:
+                        # Small integer columns (ports, durations) index a lookup table directly
+                        lookup = np.zeros(1 << (8 * column.dtype.itemsize), dtype=bool)
+                        wanted = [int(bound) for bound in bounds if 0 <= bound < len(lookup) and bound == int(bound)]
+                        lookup[wanted] = True
+                        mask = lookup[column]
+                    else:
+                        mask = np.isin(column, np.asarray(bounds, dtype=column.dtype))
+                    return ~mask if op == "not in" else mask
+                if op == "between":
+                    return (column >= bounds[0]) & (column <= bounds[1])
+                return {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal}[op](column, bounds[0])
+
+            return _Step(predicate, kind, f"vectorized compare on {field}", by_compare)
+
+        def by_values(frame: _Frame) -> np.ndarray:
+            column = frame.column(field)
+            if op == "contains":
+                needle = str(value).lower()
+                return np.fromiter((needle in str(item).lower() for item in column), dtype=bool, count=len(column))
+            wanted = {str(item) for item in values}
+            mask = np.fromiter((str(item) in wanted for item in column), dtype=bool, count=len(column))
+            return ~mask if op in ("!=", "not in") else mask
+
+        return _Step(predicate, "other", f"per-row test on {field}", by_values)
+
+    def _evaluate(self, node: Any, frame: _Frame, source, dataset: str, data: Any, plan: List[Dict[str, Any]],
+                  depth: int) -> np.ndarray:
+        if isinstance(node, Predicate):
+            node = ("and", [node])
+        kind, children = node
+        if kind == "not":
+            return ~self._evaluate(children, frame, source, dataset, data, plan, depth)
+        if kind == "or":
+            mask = np.zeros(len(frame), dtype=bool)
+            for child in children:
+                mask |= self._evaluate(child, frame, source, dataset, data, plan, depth + 1)
+            return mask
+
+        # AND: compiled predicates cheapest first, nested expressions after them
+        steps = sorted((self._compile(child, source, dataset, data) for child in children if isinstance(child, Predicate)),
+                       key=lambda step: step.cost)
+        nested = [child for child in children if not isinstance(child, Predicate)]
+        mask = np.ones(len(frame), dtype=bool)
+        survivors: Optional[np.ndarray] = None
+        for item in steps + nested:
+            started = time.perf_counter()
+            rows_in = len(frame) if survivors is None else len(survivors)
+            if survivors is None and np.count_nonzero(mask) < len(frame) * SPARSE_FRACTION:
+                survivors = np.flatnonzero(mask)
+                rows_in = len(survivors)
+            if survivors is None:
+                child_mask = item.evaluate(frame) if isinstance(item, _Step) else \
+                    self._evaluate(item, frame, source, dataset, data, plan, depth + 1)
+                mask &= child_mask
+                rows_out = int(np.count_nonzero(mask))
+            else:
+                subset = frame.take(survivors)
+                child_mask = item.evaluate(subset) if isinstance(item, _Step) else \
+                    self._evaluate(item, subset, source, dataset, data, plan, depth + 1)
+                mask[survivors[~child_mask]] = False
+                survivors = survivors[child_mask]
+                rows_out = len(survivors)
+            if isinstance(item, _Step):
+                plan.append({
+                    "step": f"{'  ' * depth}filter {item.predicate}",
+                    "access": item.access + (" on surviving rows" if survivors is not None else ""),
+                    "rows_in": rows_in,
+                    "rows_out": rows_out,
+                    "ms": round((time.perf_counter() - started) * 1000, 3),
+                })
+            if rows_out == 0:
+                break
+        return mask
+
+    @staticmethod
+    def _time_conjuncts(where: Any) -> Tuple[List[Predicate], Any]:
+        """Top-level AND-ed predicates on timestamp, split from the rest of the filter"""
+        if where is None:
+            return [], None
+        children = where[1] if isinstance(where, tuple) and where[0] == "and" else [where]
+        timed = [child for child in children if isinstance(child, Predicate) and child.field == "timestamp"
+                 and child.op in ("<", "<=", ">", ">=", "between")]
+        rest = [child for child in children if not any(child is item for item in timed)]
+        return timed, (None if not rest else rest[0] if len(rest) == 1 else ("and", rest))
+
+    def _group(self, query: Query, source, rows: np.ndarray) -> pd.DataFrame:
+        if not query.group_by:
+            return pd.DataFrame({"count": [len(rows)]})
+        codes, decoded = [], {}
+        for field in query.group_by:
+            kind = source.kind(field)
+            if kind == "other":
+                raise ValueError(f"Cannot count by {field}")
+            values = source.column(field)[rows]
+            if kind == "category":
+                # Codes already index the labels, so no factorizing is needed
+                decoded[field] = source.labels(field)
+                codes.append(values.astype(np.int64))
+                continue
+            uniques, inverse = np.unique(values, return_inverse=True)
+            codes.append(inverse.ravel())
+            decoded[field] = [int_to_ip(key) for key in uniques.tolist()] if kind == "ip" else uniques.tolist()
+        shape = tuple(len(labels) for labels in decoded.values())
+        combined = np.ravel_multi_index(codes, shape) if len(rows) else np.zeros(0, dtype=np.int64)
+        if np.prod(shape, dtype=np.float64) <= 1 << 22:
+            counts = np.bincount(combined, minlength=int(np.prod(shape)))
+            keys = np.flatnonzero(counts)
+            counts = counts[keys]
+        else:
+            keys, counts = np.unique(combined, return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        positions = np.unravel_index(keys[order], shape) if len(keys) else [np.zeros(0, dtype=np.int64)] * len(shape)
+        frame = {field: [decoded[field][position] for position in indexes.tolist()]
+                 for field, indexes in zip(decoded, positions)}
+        frame["count"] = counts[order]
+        return pd.DataFrame(frame)
+
+    def run(self, text: str, now: Optional[datetime] = None) -> HuntResult:
+        """Parse, plan and run a hunt; repeated hunts over unchanged data come from the cache"""
+        started = time.perf_counter()
+        query = parse_query(text)
+        data = self.datasets(query.dataset)
+        normalized = " ".join(text.split())
+        with self._lock:
+            token = (normalized, query.dataset, id(data), getattr(data, "generation", 0), len(data),
+                     None if query.window is None else int((now or datetime.now()).timestamp() // 1))
+            cached = self._results.get(token)
+            if cached is not None:
+                self._results.move_to_end(token)
+                cached.cached = True
+                return cached
+
+            plan: List[Dict[str, Any]] = []
+            source = self._source(query.dataset, data)
+            if query.group_by:
+                for field in query.group_by:
+                    source.kind(field)
+            time_filters, where = self._time_conjuncts(query.where)
+            if query.window is not None:
+                cutoff = (now or datetime.now()) - query.window
+                time_filters.insert(0, Predicate("timestamp", ">=", cutoff.isoformat(sep=" ", timespec="seconds")))
+
+            start, stop = 0, source.rows
+            if time_filters and source.rows:
+                step_started = time.perf_counter()
+                if self._time_ordered(query.dataset, data, source):
+                    stamps = source.column("timestamp")
+                    for predicate in time_filters:
+                        bounds = [_as_time(item) for item in (predicate.value if predicate.op == "between" else [predicate.value])]
+                        if predicate.op in (">", ">=", "between"):
+                            start = max(start, int(np.searchsorted(stamps, bounds[0], side="left" if predicate.op != ">" else "right")))
+                        if predicate.op in ("<", "<="):
+                            stop = min(stop, int(np.searchsorted(stamps, bounds[0], side="left" if predicate.op == "<" else "right")))
+                        if predicate.op == "between":
+                            stop = min(stop, int(np.searchsorted(stamps, bounds[1], side="right")))
+                    stop = max(start, stop)
+                    plan.append({
+                        "step": "time window " + " and ".join(map(str, time_filters)),
+                        "access": "binary search over time-ordered timestamps",
+                        "rows_in": source.rows,
+                        "rows_out": stop - start,
+                        "ms": round((time.perf_counter() - step_started) * 1000, 3),
+                    })
+                else:
+                    where = ("and", time_filters + ([where] if where is not None else []))
+            else:
+                plan.append({"step": "no time window", "access": "all rows", "rows_in": source.rows,
+                             "rows_out": source.rows, "ms": 0.0})
+
+            frame = _Frame(source, start, stop)
+            if where is not None and len(frame):
+                mask = self._evaluate(where, frame, source, query.dataset, data, plan, 0)
+                rows = np.flatnonzero(mask) + start
+            else:
+                rows = np.arange(start, stop, dtype=np.int64)
+
+            groups = None
+            if query.group_by is not None:
+                step_started = time.perf_counter()
+                groups = self._group(query, source, rows)
+                plan.append({
+                    "step": "count" + (f" by {', '.join(query.group_by)}" if query.group_by else ""),
+                    "access": "factorize and bincount",
+                    "rows_in": len(rows),
+                    "rows_out": len(groups),
+                    "ms": round((time.perf_counter() - step_started) * 1000, 3),
+                })
+            result = HuntResult(query, data, rows, groups, plan, round((time.perf_counter() - started) * 1000, 3))
+            self._results[token] = result
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return result
@@ -0,0 +1,688 @@
+"""Streaming telemetry ingestion.
+
+Sources tail local NDJSON / syslog / CEF files or listen on a local socket and
+hand raw lines to a bounded queue. Worker threads parse each batch into the
+platform's ``network_activity``, ``ids_alerts`` and ``endpoint_telemetry``
+record layouts and pass it to a sink. When workers fall behind the queue
+fills up and source threads block, which throttles reading instead of
+buffering without limit.
+
+``ProcessIngestPipeline`` moves reading and parsing into worker processes so
+it does not compete with the UI for the GIL. Workers write flows and alerts
+into shared-memory rings (see ``soc.shm``), which are drained here as NumPy
+views; a full ring blocks its worker the same way a full queue does.
+Alerts cross the ring as fixed-width ``ALERT_ROW`` rows: text longer than a
+column is truncated and fields outside that layout (CEF custom labels such
+as ``cs1``/``cs1Label``, extra NDJSON keys) are dropped. Use the threaded
+pipeline when those must reach the platform.
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import re
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from soc.flows import flows_from_records
+from soc.shm import ALERT_ROW, ERRORS, FLOW_ROW, SharedRing, SharedVocabulary
+from soc.shm import alert_records, alert_rows, flow_columns, flow_rows
+
+# Platform dataset names a parsed batch can contain
+DATASETS = ("network_activity", "ids_alerts", "endpoint_telemetry")
+
+CEF_SEVERITY = [(3, "Low"), (6, "Medium"), (8, "High"), (10, "Critical")]
+
+# CEF extension keys -> ids_alerts fields
+CEF_FIELDS = {
+    "src": "source_ip", "dst": "dest_ip", "proto": "protocol", "act": "action_taken",
+    "msg": "payload_info", "dvchost": "sensor_location", "cat": "attack_type",
+}
+
+# Syslog key=value keys -> network_activity fields
+SYSLOG_FIELDS = {
+    "src": "source_ip", "dst": "dest_ip", "spt": "source_port", "dpt": "dest_port",
+    "proto": "protocol", "service": "service", "sent": "bytes_sent", "rcvd": "bytes_received",
+    "duration": "duration_seconds", "geo": "geo_location", "agent": "user_agent", "session": "session_id",
+}
+
+SYSLOG_INT_FIELDS = {"source_port", "dest_port", "bytes_sent", "bytes_received", "duration_seconds", "threat_score"}
+
+_SYSLOG_HEADER = re.compile(r"^<(\d{1,3})>(?:1 )?(\S+(?: +\d+ [\d:]+)?) +(\S+) +(.*)$")
+_KEY_VALUE = re.compile(r'(\w+)=("[^"]*"|\S+)')
+_CEF_EXTENSION_SPLIT = re.compile(r"\s+(?=\w+=)")
+
+
+def new_batch() -> Dict[str, List[Dict[str, Any]]]:
+    return {dataset: [] for dataset in DATASETS}
+
+
+def classify_record(record: Dict[str, Any]) -> str:
+    """Platform dataset a JSON record belongs to"""
+    kind = record.pop("kind", None)
+    if kind in DATASETS:
+        return kind
+    if "endpoint_id" in record or "hostname" in record:
+        return "endpoint_telemetry"
+    if "alert_id" in record or "attack_type" in record or "signature" in record:
+        return "ids_alerts"
+    return "network_activity"
+
+
+def parse_ndjson(lines: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    batch = new_batch()
+    try:
+        # One decoder call for the whole batch is several times faster than per line
+        records = json.loads("[" + ",".join(line for line in lines if line.strip()) + "]")
+    except ValueError:
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    for record in records:
+        if isinstance(record, dict):
+            batch[classify_record(record)].append(record)
+    return batch
+
+
+def parse_syslog(lines: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Firewall-style syslog lines with key=value flow fields"""
+    batch = new_batch()
+    for line in lines:
+        match = _SYSLOG_HEADER.match(line.strip())
+        if not match:
+            continue
+        flow = {}
+        for key, value in _KEY_VALUE.findall(match.group(4)):
+            field = SYSLOG_FIELDS.get(key, key)
+            value = value.strip('"')
+            flow[field] = int(value) if field in SYSLOG_INT_FIELDS and value.isdigit() else value
+        if "source_ip" in flow and "dest_ip" in flow:
+            batch["network_activity"].append(flow)
+    return batch
+
+
+def _cef_severity(value: str) -> str:
+    try:
+        level = int(float(value))
+    except ValueError:
+        return value.title() or "Low"
+    for upper, label in CEF_SEVERITY:
+        if level <= upper:
+            return label
+    return "Critical"
+
+
+def parse_cef(lines: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """ArcSight CEF lines (optionally behind a syslog header) as IDS alerts"""
+    batch = new_batch()
+    for line in lines:
+        start = line.find("CEF:")
+        if start < 0:
+            continue
+        parts = line[start:].rstrip("\n").split("|", 7)
+        if len(parts) < 8:
+            continue
+        _, vendor, product, _, signature_id, name, severity, extension = parts
+        fields = dict(pair.partition("=")[::2] for pair in _CEF_EXTENSION_SPLIT.split(extension.strip()) if "=" in pair)
+        alert = {
+            "alert_id": fields.get("externalId", f"CEF-{signature_id}"),
+            "signature": signature_id,
+            "attack_type": name,
+            "severity": _cef_severity(severity),
+            "sensor": f"{vendor} {product}",
+        }
+        for key, value in fields.items():
+            if key in CEF_FIELDS:
+                alert[CEF_FIELDS[key]] = value.replace("\\=", "=")
+        # Custom string fields carry their name in csNLabel
+        for index in range(1, 7):
+            label = fields.get(f"cs{index}Label")
+            if label and f"cs{index}" in fields:
+                alert[label] = fields[f"cs{index}"]
+        if "rt" in fields and fields["rt"].isdigit():
+            alert["timestamp"] = int(fields["rt"]) / 1000
+        batch["ids_alerts"].append(alert)
+    return batch
+
+
+PARSERS: Dict[str, Callable[[List[str]], Dict[str, List[Dict[str, Any]]]]] = {
+    "ndjson": parse_ndjson,
+    "syslog": parse_syslog,
+    "cef": parse_cef,
+}
+
+
+class FileTailSource:
+    """Follow a growing log file, reopening it after rotation or truncation"""
+
+    def __init__(self, path: str, fmt: str, from_start: bool = False):
+        if fmt not in PARSERS:
+            raise ValueError(f"Unknown ingest format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.from_start = from_start
+        self._file = None
+        self._inode = None
+        self._partial = b""
+
+    def _open(self) -> bool:
+        try:
+            handle = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(handle.fileno())
+        if not self.from_start and self._inode is None:
+            handle.seek(0, os.SEEK_END)
+        self._file, self._inode, self._partial = handle, stat.st_ino, b""
+        return True
+
+    def _rotated(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return stat.st_ino != self._inode or stat.st_size < self._file.tell()
+
+    def read_batch(self, max_lines: int) -> List[str]:
+        if self._file is None and not self._open():
+            return []
+        lines = []
+        for raw in self._file.readlines(max_lines * 256):
+            if not raw.endswith(b"\n"):
+                # Keep an incomplete trailing line until the writer finishes it
+                self._partial += raw
+                continue
+            lines.append((self._partial + raw).decode("utf-8", "replace"))
+            self._partial = b""
+        if not lines and self._rotated():
+            self._file.close()
+            self._file = None
+            self.from_start = True
+        return lines
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SocketSource:
+    """Listen on a local UDP or TCP socket for newline-delimited records"""
+
+    def __init__(self, host: str, port: int, fmt: str, protocol: str = "udp", poll_interval: float = 0.1,
+                 reuse_port: bool = False):
+        if fmt not in PARSERS:
+            raise ValueError(f"Unknown ingest format: {fmt}")
+        self.fmt = fmt
+        self.protocol = protocol
+        self.poll_interval = poll_interval
+        self._selector = selectors.DefaultSelector()
+        self._buffers: Dict[socket.socket, bytes] = {}
+        kind = socket.SOCK_DGRAM if protocol == "udp" else socket.SOCK_STREAM
+        self._listener = socket.socket(socket.AF_INET, kind)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port and hasattr(socket, "SO_REUSEPORT"):
+            # Several processes bind the same port and the kernel spreads traffic across them
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self._listener.bind((host, port))
+        if protocol == "tcp":
+            self._listener.listen()
+        self._listener.setblocking(False)
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self.address = self._listener.getsockname()
+
+    def read_batch(self, max_lines: int) -> List[str]:
+        lines: List[str] = []
+        for key, _ in self._selector.select(self.poll_interval):
+            sock = key.fileobj
+            if sock is self._listener and self.protocol == "tcp":
+                conn, _ = sock.accept()
+                conn.setblocking(False)
+                self._selector.register(conn, selectors.EVENT_READ)
+                self._buffers[conn] = b""
+                continue
+            while len(lines) < max_lines:
+                try:
+                    data = sock.recv(65536)
+                except BlockingIOError:
+                    break
+                if not data:
+                    self._selector.unregister(sock)
+                    sock.close()
+                    self._buffers.pop(sock, None)
+                    break
+                if self.protocol == "udp":
+                    lines.extend(line for line in data.decode("utf-8", "replace").splitlines() if line)
+                    continue
+                buffered = self._buffers[sock] + data
+                *complete, self._buffers[sock] = buffered.split(b"\n")
+                lines.extend(line.decode("utf-8", "replace") for line in complete if line)
+        return lines
+
+    def close(self):
+        for key in list(self._selector.get_map().values()):
+            self._selector.unregister(key.fileobj)
+            key.fileobj.close()
+        self._selector.close()
+
+
+def spec_entries(spec: str) -> List[str]:
+    return [item.strip() for item in spec.split(",") if item.strip()]
+
+
+def is_socket_entry(entry: str) -> bool:
+    return entry.partition(":")[2].startswith(("udp://", "tcp://"))
+
+
+def sources_from_spec(spec: str, reuse_port: bool = False, from_start: bool = False) -> List[Any]:
+    """Build sources from ``fmt:path`` / ``fmt:udp://host:port`` entries separated by commas"""
+    sources = []
+    for entry in spec_entries(spec):
+        fmt, _, target = entry.partition(":")
+        if is_socket_entry(entry):
+            protocol, _, address = target.partition("://")
+            host, _, port = address.rpartition(":")
+            sources.append(SocketSource(host or "127.0.0.1", int(port), fmt, protocol, reuse_port=reuse_port))
+        else:
+            sources.append(FileTailSource(target, fmt, from_start=from_start))
+    return sources
+
+
+class IngestMetrics:
+    """Rolling ingest rate and queue-to-commit lag"""
+
+    def __init__(self, window_seconds: float = 10.0):
+        self.window_seconds = window_seconds
+        self.events_total = 0
+        self.batches_total = 0
+        self.parse_errors = 0
+        self.lag_ms = 0.0
+        self.queue_depth = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def record(self, events: int, lag_seconds: float, queue_depth: int):
+        now = time.monotonic()
+        with self._lock:
+            self.events_total += events
+            self.batches_total += 1
+            self.queue_depth = queue_depth
+            # EWMA so one slow batch does not dominate the reading
+            self.lag_ms = 0.8 * self.lag_ms + 0.2 * lag_seconds * 1000 if self.batches_total > 1 else lag_seconds * 1000
+            self._recent.append((now, events))
+            while self._recent and now - self._recent[0][0] > self.window_seconds:
+                self._recent.popleft()
+
+    @property
+    def events_per_second(self) -> float:
+        with self._lock:
+            if not self._recent:
+                return 0.0
+            span = max(time.monotonic() - self._recent[0][0], 1.0)
+            return sum(count for _, count in self._recent) / span
+
+
+class IngestPipeline:
+    """Reader threads per source feeding a bounded queue drained by parser workers"""
+
+    def __init__(self, sink: Callable[[Dict[str, List[Dict[str, Any]]], IngestMetrics], None],
+                 batch_size: int = 5000, queue_size: int = 64, workers: int = 1, poll_interval: float = 0.1):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.workers = workers
+        self.metrics = IngestMetrics()
+        self.sources: List[Any] = []
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def add_source(self, source):
+        self.sources.append(source)
+        if self.running:
+            self._spawn(self._read_loop, source)
+
+    def _spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True, name=f"soc-ingest-{len(self._threads)}")
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        for _ in range(self.workers):
+            self._spawn(self._work_loop)
+        for source in self.sources:
+            self._spawn(self._read_loop, source)
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        for source in self.sources:
+            source.close()
+
+    def _read_loop(self, source):
+        while not self._stop.is_set():
+            lines = source.read_batch(self.batch_size)
+            if not lines:
+                self._stop.wait(self.poll_interval)
+                continue
+            item = (source.fmt, lines, time.monotonic())
+            # Blocking put is the backpressure: a full queue pauses this reader
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=self.poll_interval)
+                    break
+                except queue.Full:
+                    continue
+
+    def _work_loop(self):
+        while not self._stop.is_set():
+            try:
+                fmt, lines, enqueued = self._queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            try:
+                batch = PARSERS[fmt](lines)
+            except Exception:
+                self.metrics.parse_errors += 1
+                continue
+            events = sum(len(records) for records in batch.values())
+            try:
+                self.sink(batch, self.metrics)
+            except Exception:
+                # A batch the sink rejects is dropped; the worker keeps going
+                self.metrics.parse_errors += 1
+                continue
+            self.metrics.record(events, time.monotonic() - enqueued, self._queue.qsize())
+
+    def process_lines(self, fmt: str, lines: List[str]) -> int:
+        """Parse and sink lines synchronously; used for replay and load testing"""
+        started = time.monotonic()
+        batch = PARSERS[fmt](lines)
+        events = sum(len(records) for records in batch.values())
+        self.sink(batch, self.metrics)
+        self.metrics.record(events, time.monotonic() - started, self._queue.qsize())
+        return events
+
+
+def _ingest_process(spec: str, flow_ring: str, alert_ring: str, vocabulary: str, endpoints, stop,
+                    batch_size: int, poll_interval: float, from_start: bool):
+    """Worker process: read and parse its sources, writing flows and alerts to its rings"""
+    flows = SharedRing(FLOW_ROW, name=flow_ring)
+    alerts = SharedRing(ALERT_ROW, name=alert_ring)
+    labels = SharedVocabulary(vocabulary)
+    sources = sources_from_spec(spec, reuse_port=True, from_start=from_start)
+    try:
+        while not stop.is_set():
+            idle = True
+            for source in sources:
+                lines = source.read_batch(batch_size)
+                if not lines:
+                    continue
+                idle = False
+                now = datetime.now()
+                try:
+                    batch = PARSERS[source.fmt](lines)
+                except Exception:
+                    flows.count_error()
+                    continue
+                # A bad record costs only itself: the rest of its batch, flows included, still goes through
+                alert_batch, rejected = normalize_records(batch["ids_alerts"], normalize_alert, now)
+                endpoint_batch, rejected_endpoints = normalize_records(batch["endpoint_telemetry"], normalize_endpoint, now)
+                flows.count_error(rejected + rejected_endpoints)
+                written_ns = time.time_ns()
+                flow_data = alert_data = None
+                try:
+                    if batch["network_activity"]:
+                        flow_data = flow_rows(flows_from_records(batch["network_activity"]), written_ns)
+                except Exception:
+                    flows.count_error()
+                try:
+                    if alert_batch:
+                        alert_data = alert_rows(alert_batch, written_ns)
+                except Exception:
+                    flows.count_error(len(alert_batch))
+                if flow_data is not None:
+                    # Labels first, so the reader can decode every code it sees
+                    labels.publish()
+                    flows.write(flow_data, should_stop=stop.is_set)
+                if alert_data is not None:
+                    alerts.write(alert_data, should_stop=stop.is_set)
+                if endpoint_batch:
+                    endpoints.put(endpoint_batch)
+            if idle:
+                stop.wait(poll_interval)
+    finally:
+        # Endpoint batches not yet flushed are dropped rather than holding up exit
+        endpoints.cancel_join_thread()
+        for source in sources:
+            source.close()
+        flows.close()
+        alerts.close()
+        labels.close()
+
+
+class ProcessIngestPipeline:
+    """Parser worker processes handing flows and alerts over through shared-memory rings
+
+    Every worker binds each socket entry of the spec (SO_REUSEPORT), so the
+    kernel spreads datagrams and connections across workers; file entries are
+    tailed by one worker each, assigned round-robin. A drain thread passes
+    column views of the rings to the sink, which must be done with them when
+    it returns.
+    """
+
+    def __init__(self, sink: Callable[[Optional[Dict[str, np.ndarray]], List[Dict[str, Any]], List[Dict[str, Any]], IngestMetrics], None],
+                 spec: str, workers: int = 2, batch_size: int = 5000, flow_capacity: int = 1 << 20,
+                 alert_capacity: int = 1 << 14, poll_interval: float = 0.05, from_start: bool = False):
+        self.sink = sink
+        self.spec = spec
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flow_capacity = flow_capacity
+        self.alert_capacity = alert_capacity
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+        self.metrics = IngestMetrics()
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self._endpoints = None
+        self._channels: List[Dict[str, Any]] = []
+        self._processes: List[Any] = []
+        self._drain_thread: Optional[threading.Thread] = None
+        self._drain_stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return any(process.is_alive() for process in self._processes)
+
+    def assignments(self) -> List[str]:
+        """Spec handled by each worker"""
+        entries = spec_entries(self.spec)
+        shared = [entry for entry in entries if is_socket_entry(entry)]
+        files = [entry for entry in entries if not is_socket_entry(entry)]
+        return [",".join(shared + files[index::self.workers]) for index in range(self.workers)]
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._drain_stop.clear()
+        self._endpoints = self._context.Queue()
+        for spec in self.assignments():
+            channel = {
+                "flows": SharedRing(FLOW_ROW, self.flow_capacity),
+                "alerts": SharedRing(ALERT_ROW, self.alert_capacity),
+                "labels": SharedVocabulary(),
+            }
+            process = self._context.Process(
+                target=_ingest_process, name=f"soc-ingest-{len(self._processes)}", daemon=True,
+                args=(spec, channel["flows"].name, channel["alerts"].name, channel["labels"].name, self._endpoints,
+                      self._stop, self.batch_size, self.poll_interval, self.from_start))
+            process.start()
+            self._channels.append(channel)
+            self._processes.append(process)
+        self._drain_thread = threading.Thread(target=self._drain_loop, daemon=True, name="soc-ingest-drain")
+        self._drain_thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._drain_stop.set()
+        if self._drain_thread is not None:
+            self._drain_thread.join(timeout)
+        self.drain()
+        for channel in self._channels:
+            for shared in channel.values():
+                shared.close()
+        if self._endpoints is not None:
+            self._endpoints.close()
+        self._channels, self._processes, self._drain_thread, self._endpoints = [], [], None, None
+
+    def _drain_loop(self):
+        while not self._drain_stop.is_set():
+            if not self.drain():
+                self._drain_stop.wait(self.poll_interval)
+
+    def drain(self) -> int:
+        """Hand everything the workers have written so far to the sink; returns the event count"""
+        endpoints = []
+        while self._endpoints is not None:
+            try:
+                endpoints.extend(self._endpoints.get_nowait())
+            except (queue.Empty, OSError, ValueError):
+                break
+        events = 0
+        for channel in self._channels:
+            lookup = channel["labels"].lookup()
+            flow_views = channel["flows"].peek()
+            alert_views = channel["alerts"].peek()
+            if not flow_views and not alert_views and not endpoints:
+                continue
+            alerts = [alert for view in alert_views for alert in alert_records(view)]
+            written = [int(views[0]["written_ns"][0]) for views in (flow_views, alert_views) if views]
+            for index, view in enumerate(flow_views or [None]):
+                try:
+                    self.sink(None if view is None else flow_columns(view, lookup),
+                              alerts if index == 0 else [], endpoints if index == 0 else [], self.metrics)
+                except Exception:
+                    # The rows are consumed anyway. Workers only count on their flow ring,
+                    # so the drain thread owns the alert ring's error counter
+                    channel["alerts"].count_error()
+            flow_count = sum(len(view) for view in flow_views)
+            channel["flows"].consume(flow_count)
+            channel["alerts"].consume(len(alerts))
+            count = flow_count + len(alerts) + len(endpoints)
+            lag = (time.time_ns() - min(written)) / 1e9 if written else 0.0
+            self.metrics.record(count, lag, len(channel["flows"]) + len(channel["alerts"]))
+            events += count
+            endpoints = []
+        self.metrics.parse_errors = sum(int(channel[ring].header[ERRORS]) for channel in self._channels for ring in ("flows", "alerts"))
+        return events
+
+def _local_time(value: Any) -> datetime:
+    """Epoch seconds, ISO-8601 text or a datetime as a naive local datetime
+
+    Everything downstream (the correlator window, retention, the store's
+    hourly partitions) compares naive local times, so offsets such as "Z" or
+    "+00:00" are converted rather than kept.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"not a timestamp: {value!r}")
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    if isinstance(value, str):
+        text = value.strip()
+        value = datetime.fromisoformat(text[:-1] + "+00:00" if text.endswith(("Z", "z")) else text)
+    if not isinstance(value, datetime):
+        raise ValueError(f"not a timestamp: {value!r}")
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _whole_number(value: Any, low: int, high: int) -> int:
+    """An integer field from an int, float or numeric string, bounded to its schema range"""
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    number = int(float(value))
+    if not low <= number <= high:
+        raise ValueError(f"{number} outside {low}-{high}")
+    return number
+
+
+def _flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def normalize_alert(record: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Fill an ingested IDS alert out to the ids_alerts layout; ValueError if it cannot be"""
+    alert = {
+        "alert_id": "", "attack_type": "Unknown", "source_ip": "0.0.0.0", "dest_ip": "0.0.0.0",
+        "severity": "Low", "signature": "", "action_taken": "Alerted", "confidence": 0,
+        "protocol": "TCP", "payload_info": "", "mitre_technique": "", "sensor_location": "Unknown",
+        "false_positive": False,
+    }
+    alert.update(record)
+    try:
+        alert["timestamp"] = _local_time(record.get("timestamp", now))
+        alert["confidence"] = _whole_number(alert["confidence"], 0, 100)
+        for field in ("source_port", "dest_port"):
+            if field in alert:
+                alert[field] = _whole_number(alert[field], 0, 65535)
+    except (TypeError, ValueError, OverflowError) as error:
+        raise ValueError(f"unusable alert {alert.get('alert_id')!r}: {error}") from error
+    alert["false_positive"] = _flag(alert["false_positive"])
+    return alert
+
+
+def normalize_endpoint(record: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Convert ingested endpoint timestamps and scores to their types; ValueError if they do not convert"""
+    endpoint = dict(record)
+    try:
+        for field in ("last_seen", "last_scan"):
+            endpoint[field] = _local_time(endpoint.get(field, now))
+        if "risk_score" in endpoint:
+            endpoint["risk_score"] = _whole_number(endpoint["risk_score"], 0, 100)
+        for field in ("threats_detected", "suspicious_processes", "network_connections"):
+            if field in endpoint:
+                endpoint[field] = _whole_number(endpoint[field], 0, 2**31 - 1)
+    except (TypeError, ValueError, OverflowError) as error:
+        raise ValueError(f"unusable endpoint {endpoint.get('endpoint_id')!r}: {error}") from error
+    return endpoint
+
+
+def normalize_records(records: List[Dict[str, Any]], normalize, now: datetime) -> Tuple[List[Dict[str, Any]], int]:
+    """Normalize each record, keeping the ones that convert and counting the ones rejected"""
+    normalized = []
+    rejected = 0
+    for record in records:
+        try:
+            normalized.append(normalize(record, now))
+        except ValueError:
+            rejected += 1
+    return normalized, rejected
@@ -0,0 +1,322 @@
+"""Indicator-of-compromise matching.
+
+An ``IOCSet`` compiles indicators once into structures that can be matched
+in bulk:
+
+* IPv4 addresses -> sorted ``uint32`` array, matched with ``searchsorted``
+* CIDR ranges -> non-overlapping segment table (CIDRs nest or are disjoint,
+  so a stack sweep yields the most specific range per segment)
+* domains -> hash map, also matched on every parent domain
+* file hashes -> hash map
+* URL / payload substrings -> Aho-Corasick automaton
+
+``IOCEngine`` holds the current compiled set behind a single reference.
+Reloads compile a new set off to the side and swap the reference, so
+matching never waits for a reload.
+"""
+
+import csv
+import ipaddress
+import json
+import os
+import threading
+from collections import Counter, deque
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
+
+import numpy as np
+
+from soc.ipindex import pack_ip_values
+
+IOC_TYPES = ("ip", "cidr", "domain", "hash", "url")
+
+# Record fields checked for each indicator type
+IP_RECORD_FIELDS = ("source_ip", "dest_ip", "attacker_ip", "ip_address")
+DOMAIN_RECORD_FIELDS = ("domain", "query", "host")
+HASH_RECORD_FIELDS = ("file_hash", "sha256", "sha1", "md5", "hash")
+TEXT_RECORD_FIELDS = ("url", "payload_info", "uri", "command_line")
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher (case-insensitive)"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        outputs: List[List[int]] = [[]]
+        for pattern, ioc_id in patterns:
+            node = 0
+            for char in pattern.lower():
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append([])
+                node = nxt
+            outputs[node].append(ioc_id)
+        # Breadth-first fail links; each node's output includes its fail chain
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                outputs[child].extend(outputs[self._fail[child]])
+        self._out = [tuple(ids) for ids in outputs]
+
+    def __len__(self) -> int:
+        return len(self._goto) - 1
+
+    def search(self, text: str) -> List[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        hits: List[int] = []
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                hits.extend(out[node])
+        return hits
+
+
+class IOCSet:
+    """Immutable compiled indicator set"""
+
+    def __init__(self, indicators: List[Dict[str, Any]]):
+        self.indicators = indicators
+        ip_values, ip_ids, cidrs, url_patterns = [], [], [], []
+        self.domains: Dict[str, int] = {}
+        self.hashes: Dict[str, int] = {}
+        for ioc_id, indicator in enumerate(indicators):
+            kind, value = indicator["type"], str(indicator["value"]).strip()
+            if kind == "ip":
+                ip_values.append(value)
+                ip_ids.append(ioc_id)
+            elif kind == "cidr":
+                try:
+                    network = ipaddress.ip_network(value, strict=False)
+                except ValueError:
+                    continue
+                if network.version == 4:
+                    cidrs.append((int(network.network_address), int(network.broadcast_address), ioc_id))
+            elif kind == "domain":
+                self.domains[value.lower().rstrip(".")] = ioc_id
+            elif kind == "hash":
+                self.hashes[value.lower()] = ioc_id
+            elif kind == "url" and value:
+                url_patterns.append((value, ioc_id))
+
+        # IPv6 indicators are skipped; flow addresses are IPv4 only
+        keys, positions, _ = pack_ip_values(ip_values)
+        order = np.argsort(keys, kind="stable")
+        self.ip_keys = keys[order]
+        self.ip_ids = np.asarray(ip_ids, dtype=np.int64)[positions][order]
+        self.segment_starts, self.segment_ends, self.segment_ids = self._build_segments(cidrs)
+        self.urls = AhoCorasick(url_patterns) if url_patterns else None
+
+    @staticmethod
+    def _build_segments(cidrs: List[Tuple[int, int, int]]):
+        """Flatten nested CIDRs into disjoint [start, end] segments owned by the most specific range"""
+        segments: List[Tuple[int, int, int]] = []
+        stack: List[Tuple[int, int, int]] = []
+        cursor = 0
+
+        def emit_until(limit: int):
+            nonlocal cursor
+            while stack and stack[-1][1] < limit:
+                start, end, ioc_id = stack.pop()
+                if cursor <= end:
+                    segments.append((max(cursor, start), end, ioc_id))
+                    cursor = end + 1
+            if stack and cursor < limit:
+                segments.append((max(cursor, stack[-1][0]), limit - 1, stack[-1][2]))
+                cursor = limit
+
+        for start, end, ioc_id in sorted(cidrs, key=lambda c: (c[0], -c[1])):
+            emit_until(start)
+            cursor = max(cursor, start)
+            if stack and (stack[-1][0], stack[-1][1]) == (start, end):
+                continue  # duplicate range, first indicator wins
+            stack.append((start, end, ioc_id))
+        emit_until(1 << 33)
+        segments = [segment for segment in segments if segment[0] <= segment[1]]
+        starts = np.asarray([s[0] for s in segments], dtype=np.uint64)
+        ends = np.asarray([s[1] for s in segments], dtype=np.uint64)
+        ids = np.asarray([s[2] for s in segments], dtype=np.int64)
+        return starts, ends, ids
+
+    def __len__(self) -> int:
+        return len(self.indicators)
+
+    def match_ips(self, ips: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, indicator ids) of packed IPv4 addresses hitting an IP or CIDR indicator"""
+        ips = np.asarray(ips, dtype=np.uint32)
+        positions, ids = [], []
+        if len(self.ip_keys):
+            slot = np.searchsorted(self.ip_keys, ips)
+            slot[slot == len(self.ip_keys)] = 0
+            hit = self.ip_keys[slot] == ips
+            positions.append(np.flatnonzero(hit))
+            ids.append(self.ip_ids[slot[hit]])
+        if len(self.segment_starts):
+            wide = ips.astype(np.uint64)
+            slot = np.searchsorted(self.segment_starts, wide, side="right") - 1
+            valid = slot >= 0
+            hit = np.zeros(len(ips), dtype=bool)
+            hit[valid] = wide[valid] <= self.segment_ends[slot[valid]]
+            positions.append(np.flatnonzero(hit))
+            ids.append(self.segment_ids[slot[hit]])
+        if not positions:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(positions), np.concatenate(ids)
+
+    def match_domain(self, domain: str) -> Optional[int]:
+        labels = domain.lower().rstrip(".").split(".")
+        for index in range(len(labels) - 1):
+            ioc_id = self.domains.get(".".join(labels[index:]))
+            if ioc_id is not None:
+                return ioc_id
+        return None
+
+    def match_record(self, record: Dict[str, Any]) -> List[int]:
+        """Indicator ids hit by the string fields of one record"""
+        hits = []
+        if self.domains:
+            for field in DOMAIN_RECORD_FIELDS:
+                value = record.get(field)
+                if value:
+                    ioc_id = self.match_domain(str(value))
+                    if ioc_id is not None:
+                        hits.append(ioc_id)
+        if self.hashes:
+            for field in HASH_RECORD_FIELDS:
+                value = record.get(field)
+                if value:
+                    ioc_id = self.hashes.get(str(value).lower())
+                    if ioc_id is not None:
+                        hits.append(ioc_id)
+        if self.urls is not None:
+            for field in TEXT_RECORD_FIELDS:
+                value = record.get(field)
+                if value:
+                    hits.extend(self.urls.search(str(value)))
+        return hits
+
+
+def load_indicator_file(path: str) -> List[Dict[str, Any]]:
+    """Read indicators from NDJSON or CSV (type,value[,threat[,severity]])"""
+    indicators = []
+    with open(path, encoding="utf-8") as handle:
+        if path.endswith((".json", ".ndjson", ".jsonl")):
+            for line in handle:
+                line = line.strip()
+                if line:
+                    indicators.append(json.loads(line))
+        else:
+            for row in csv.reader(handle):
+                if not row or row[0].startswith("#") or row[0] == "type":
+                    continue
+                indicators.append({
+                    "type": row[0].strip().lower(),
+                    "value": row[1].strip(),
+                    "threat": row[2].strip() if len(row) > 2 else "Unknown",
+                    "severity": row[3].strip().upper() if len(row) > 3 else "HIGH",
+                })
+    return [indicator for indicator in indicators if indicator.get("type") in IOC_TYPES]
+
+
+class IOCEngine:
+    """Matches flow and alert batches against a hot-swappable compiled IOC set"""
+
+    def __init__(self):
+        self._compiled = IOCSet([])
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.matches_total = 0
+        self.version = 0
+
+    @property
+    def compiled(self) -> IOCSet:
+        return self._compiled
+
+    def load(self, indicators: List[Dict[str, Any]]):
+        """Compile and swap in a new indicator set"""
+        with self._reload_lock:
+            compiled = IOCSet(indicators)
+            # A single reference assignment; in-flight matches keep the set they started with
+            self._compiled = compiled
+            self.version += 1
+
+    def reload_async(self, loader: Callable[[], List[Dict[str, Any]]]) -> threading.Thread:
+        thread = threading.Thread(target=lambda: self.load(loader()), daemon=True, name="soc-ioc-reload")
+        thread.start()
+        return thread
+
+    def watch(self, path: str, interval: float = 5.0):
+        """Reload from an indicator file whenever its modification time changes"""
+        if self._watcher is not None:
+            return
+
+        def poll():
+            last_mtime = None
+            while not self._stop.is_set():
+                try:
+                    mtime = os.stat(path).st_mtime
+                except FileNotFoundError:
+                    mtime = None
+                if mtime is not None and mtime != last_mtime:
+                    try:
+                        self.load(load_indicator_file(path))
+                        last_mtime = mtime
+                    except (OSError, ValueError):
+                        pass
+                self._stop.wait(interval)
+
+        self._watcher = threading.Thread(target=poll, daemon=True, name="soc-ioc-watch")
+        self._watcher.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop watching the indicator file and wait for the watcher to exit"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+            self._watcher = None
+        self._stop.clear()
+
+    def match_batch(self, flow_columns: Optional[Dict[str, np.ndarray]] = None,
+                    records: List[Dict[str, Any]] = ()) -> List[Dict[str, Any]]:
+        """Indicators hit by a flow column batch and/or dict records, with hit counts"""
+        # One snapshot for the whole batch so ids resolve against the set that produced them
+        compiled = self._compiled
+        hits: Counter = Counter()
+        if not len(compiled):
+            return []
+        if flow_columns is not None:
+            for field in ("source_ip", "dest_ip"):
+                self._count_ips(compiled, flow_columns[field], hits)
+        if records:
+            for field in IP_RECORD_FIELDS:
+                values = [record[field] for record in records if record.get(field)]
+                if values:
+                    keys, _, _ = pack_ip_values(values)
+                    self._count_ips(compiled, keys, hits)
+            if compiled.domains or compiled.hashes or compiled.urls is not None:
+                for record in records:
+                    hits.update(compiled.match_record(record))
+        self.matches_total += sum(hits.values())
+        return [dict(compiled.indicators[ioc_id], count=count) for ioc_id, count in hits.most_common()]
+
+    @staticmethod
+    def _count_ips(compiled: IOCSet, ips: np.ndarray, hits: Counter):
+        _, ids = compiled.match_ips(ips)
+        if len(ids):
+            values, counts = np.unique(ids, return_counts=True)
+            hits.update(dict(zip(values.tolist(), counts.tolist())))
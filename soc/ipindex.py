@@ -0,0 +1,187 @@
+"""Packed-integer IP indexes.
+
+Every IP-bearing field of the platform datasets is indexed as sorted runs of
+packed addresses (``uint32`` for IPv4, Python ints for the rare IPv6 value)
+paired with row ids. Exact, CIDR and set-membership lookups are binary
+searches over each run. Appends create a new sorted run and runs of similar
+size are merged, so there are only O(log n) runs to search at any time.
+"""
+
+import bisect
+import ipaddress
+import socket
+import threading
+from typing import Dict, Iterable, List, Any, Optional, Tuple, Union
+
+import numpy as np
+
+from soc.flows import FlowTable
+
+# Dataset -> fields holding IP addresses
+IP_FIELDS = {
+    "network_activity": ("source_ip", "dest_ip"),
+    "ids_alerts": ("source_ip", "dest_ip"),
+    "endpoint_telemetry": ("ip_address",),
+    "iot_devices": ("ip_address",),
+    "honeypot_data": ("attacker_ip",),
+}
+
+IPQuery = Union[str, ipaddress.IPv4Network, ipaddress.IPv6Network, Iterable[str]]
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+def pack_ip_values(values: List[Any]) -> Tuple[np.ndarray, np.ndarray, List[Tuple[int, int]]]:
+    """Split IP strings into packed IPv4 keys with their positions, plus (int, position) IPv6 pairs"""
+    try:
+        packed = np.frombuffer(b"".join(socket.inet_aton(value) for value in values), dtype=">u4")
+        return packed.astype(np.uint32), np.arange(len(values), dtype=np.int64), []
+    except (OSError, TypeError, AttributeError):
+        pass
+    # Slow path for mixed, IPv6 or malformed values
+    v4_keys, v4_positions, v6 = [], [], []
+    for position, value in enumerate(values):
+        try:
+            address = ipaddress.ip_address(str(value).strip())
+        except ValueError:
+            continue
+        if address.version == 4:
+            v4_keys.append(int(address))
+            v4_positions.append(position)
+        else:
+            v6.append((int(address), position))
+    return np.asarray(v4_keys, dtype=np.uint32), np.asarray(v4_positions, dtype=np.int64), v6
+
+
+def parse_ip_query(query: IPQuery) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    """Normalize an address, CIDR or collection of them into networks"""
+    if isinstance(query, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+        return [query]
+    if isinstance(query, str):
+        items = [item for item in query.replace(",", " ").split() if item]
+    else:
+        items = [str(item) for item in query]
+    return [ipaddress.ip_network(item, strict=False) for item in items]
+
+
+class SortedIPColumn:
+    """IP -> row id index kept as a few sorted runs"""
+
+    def __init__(self):
+        self._runs: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._v6: List[Tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys, _ in self._runs) + len(self._v6)
+
+    @property
+    def run_count(self) -> int:
+        return len(self._runs)
+
+    def add(self, keys: np.ndarray, rows: np.ndarray, v6: Optional[List[Tuple[int, int]]] = None):
+        if len(keys):
+            order = np.argsort(keys, kind="stable")
+            self._runs.append((keys[order], rows[order]))
+            # Merge while the newest run is at least half the size of the one before it
+            while len(self._runs) > 1 and len(self._runs[-1][0]) * 2 >= len(self._runs[-2][0]):
+                newer, older = self._runs.pop(), self._runs.pop()
+                merged_keys = np.concatenate([older[0], newer[0]])
+                merged_rows = np.concatenate([older[1], newer[1]])
+                order = np.argsort(merged_keys, kind="stable")
+                self._runs.append((merged_keys[order], merged_rows[order]))
+        for pair in v6 or ():
+            bisect.insort(self._v6, pair)
+
+    def range(self, low: int, high: int, version: int = 4) -> np.ndarray:
+        """Row ids with low <= ip <= high"""
+        if version == 6:
+            start = bisect.bisect_left(self._v6, (low, -1))
+            stop = bisect.bisect_right(self._v6, (high, float("inf")))
+            return np.asarray([row for _, row in self._v6[start:stop]], dtype=np.int64)
+        if low > 0xFFFFFFFF:
+            return _EMPTY_ROWS
+        high = min(high, 0xFFFFFFFF)
+        found = []
+        for keys, rows in self._runs:
+            start = np.searchsorted(keys, low, side="left")
+            stop = np.searchsorted(keys, high, side="right")
+            if stop > start:
+                found.append(rows[start:stop])
+        return np.concatenate(found) if found else _EMPTY_ROWS
+
+    def members(self, ips: np.ndarray) -> np.ndarray:
+        """Row ids whose IPv4 address is in a set, one vectorized search per run"""
+        ips = np.unique(np.asarray(ips, dtype=np.uint32))
+        found = []
+        for keys, rows in self._runs:
+            starts = np.searchsorted(keys, ips, side="left")
+            stops = np.searchsorted(keys, ips, side="right")
+            for start, stop in zip(starts[stops > starts], stops[stops > starts]):
+                found.append(rows[start:stop])
+        return np.concatenate(found) if found else _EMPTY_ROWS
+
+
+class PlatformIPIndex:
+    """IP indexes for every dataset, caught up lazily with appended rows"""
+
+    def __init__(self, fields: Dict[str, Tuple[str, ...]] = None):
+        self.fields = IP_FIELDS if fields is None else fields
+        self._columns: Dict[str, Dict[str, SortedIPColumn]] = {}
+        self._state: Dict[str, Tuple[Any, int, int]] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def invalidate(self, dataset: str):
+        """Force a rebuild, e.g. after records were edited or removed in place"""
+        with self._lock:
+            self._dirty.add(dataset)
+
+    def sync(self, dataset: str, data: Union[FlowTable, List[Dict[str, Any]]]):
+        """Index rows appended to a dataset since the last sync"""
+        with self._lock:
+            generation = getattr(data, "generation", 0)
+            indexed_source, indexed_generation, indexed_rows = self._state.get(dataset, (None, None, 0))
+            if (dataset in self._dirty or indexed_source is not data or indexed_generation != generation
+                    or indexed_rows > len(data)):
+                self._columns[dataset] = {field: SortedIPColumn() for field in self.fields[dataset]}
+                indexed_rows = 0
+                self._dirty.discard(dataset)
+            total = len(data)
+            if total > indexed_rows:
+                for field, column in self._columns[dataset].items():
+                    if isinstance(data, FlowTable):
+                        keys = data.column(field)[indexed_rows:total]
+                        column.add(keys, np.arange(indexed_rows, total, dtype=np.int64))
+                    else:
+                        keys, positions, v6 = pack_ip_values([record.get(field) for record in data[indexed_rows:total]])
+                        column.add(keys, positions + indexed_rows, [(ip, row + indexed_rows) for ip, row in v6])
+            self._state[dataset] = (data, generation, total)
+
+    def indexed_rows(self, dataset: str, data: Union[FlowTable, List[Dict[str, Any]]]) -> int:
+        """Rows of ``data`` the index already covers (0 when it would be rebuilt)"""
+        with self._lock:
+            indexed_source, indexed_generation, indexed_rows = self._state.get(dataset, (None, None, 0))
+            if (dataset in self._dirty or indexed_source is not data or indexed_generation != getattr(data, "generation", 0)
+                    or indexed_rows > len(data)):
+                return 0
+            return indexed_rows
+
+    def lookup(self, dataset: str, query: IPQuery, fields: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Sorted unique row ids of a dataset matching an IP, CIDR or set of them"""
+        networks = parse_ip_query(query)
+        singles = np.asarray([int(net.network_address) for net in networks if net.version == 4 and net.num_addresses == 1], dtype=np.uint32)
+        ranges = [net for net in networks if not (net.version == 4 and net.num_addresses == 1)]
+        found = []
+        with self._lock:
+            columns = self._columns.get(dataset, {})
+            for field in fields or columns:
+                column = columns.get(field)
+                if column is None:
+                    continue
+                if len(singles):
+                    found.append(column.members(singles))
+                for net in ranges:
+                    found.append(column.range(int(net.network_address), int(net.broadcast_address), net.version))
+        if not found:
+            return _EMPTY_ROWS
+        return np.unique(np.concatenate(found))
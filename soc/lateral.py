@@ -0,0 +1,305 @@
+"""Host-communication graph for lateral-movement analysis.
+
+Internal flows (both ends in private address space) are folded into a
+``networkx`` DiGraph of hosts keyed by packed IPv4 address. An edge
+aggregates the sessions and bytes sent from source to destination and counts
+sessions per destination port, so SSH/SMB/RDP reachability shows on the
+edge. The graph follows the flow table incrementally: a sync aggregates only
+the rows appended since the last one with numpy and touches each distinct
+(source, destination, port) once. Expired rows are subtracted the same way,
+dropping edges and hosts that lose their last session. The cyclic garbage
+collector is paused while a batch is applied: the edge dicts it creates hold
+no cycles, and collections triggered by them would otherwise rescan the
+whole graph, several times per batch once it holds 100k hosts.
+
+Queries are cached against the graph version:
+
+* ``reachable``: hosts within k hops of a host (BFS with a depth cutoff)
+* ``attack_paths``: fewest-hop paths from compromised hosts to target hosts,
+  one multi-source BFS that stops at the hop limit or the last target
+* ``pivots``: betweenness estimated from sampled sources (Brandes
+  accumulation, as in ``networkx.betweenness_centrality(k=...)``), drawn
+  only from hosts that have outgoing edges and added one at a time until
+  a time budget is spent. The accumulation walks the adjacency dicts so a source
+  costs only what it reaches; networkx sets up state for every node of the
+  graph per source, which dominates on sparse 100k-host graphs. The
+  estimate is the slow query, so it is reused for ``PIVOT_TTL`` seconds
+  while the graph keeps changing.
+"""
+
+import gc
+import ipaddress
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import networkx as nx
+import numpy as np
+
+from soc.flows import FlowTable, int_to_ip
+from soc.geoip import is_private
+
+# Ports whose sessions mark an edge as a lateral-movement channel
+LATERAL_PORTS = {22: "SSH", 135: "RPC", 445: "SMB", 3389: "RDP", 5985: "WinRM", 5986: "WinRM"}
+
+# Seconds a pivot estimate is reused while the graph changes
+PIVOT_TTL = 60.0
+
+# Time the betweenness sampling may take, and the fewest sources it samples
+PIVOT_BUDGET_S = 0.5
+PIVOT_MIN_SOURCES = 32
+
+
+def pack_hosts(hosts: Iterable[str]) -> List[int]:
+    """Dotted IPv4 addresses as the graph's packed node keys"""
+    packed = []
+    for host in hosts:
+        try:
+            packed.append(int(ipaddress.IPv4Address(str(host).strip())))
+        except ipaddress.AddressValueError:
+            raise ValueError(f"not an IPv4 address: {host!r}") from None
+    return packed
+
+
+@contextmanager
+def _collector_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class LateralMovementGraph:
+    """Incrementally maintained host graph with cached reachability, path and pivot queries"""
+
+    def __init__(self, cache_size: int = 64, seed: int = 0):
+        self.graph = nx.DiGraph()
+        self.version = 0
+        self.cache_size = cache_size
+        self.seed = seed
+        # (flow table, its generation, rows folded in)
+        self._state: Tuple[Any, int, int] = (None, -1, 0)
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._pivots: Optional[Tuple[int, float, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.graph.number_of_nodes()
+
+    def sync(self, table: FlowTable, batch_rows: int = 250000):
+        """Fold flows appended since the last sync into the graph; a cleared or compacted table is rebuilt"""
+        with self._lock:
+            source, generation, rows = self._state
+            if source is not table or generation != table.generation or rows > len(table):
+                self.graph = nx.DiGraph()
+                self.version += 1
+                rows = 0
+            total = len(table)
+            with _collector_paused():
+                for start in range(rows, total, batch_rows):
+                    stop = min(start + batch_rows, total)
+                    self._apply(table, slice(start, stop), 1)
+            self._state = (table, table.generation, total)
+
+    def retain(self, table: FlowTable, keep: np.ndarray):
+        """Subtract the rows about to be dropped by ``table.retain(keep)``; call it just before"""
+        with self._lock:
+            source, generation, rows = self._state
+            if source is not table or generation != table.generation:
+                return
+            keep = np.asarray(keep, dtype=bool)
+            if keep.all():
+                return
+            dropped = np.flatnonzero(~keep[:rows])
+            if len(dropped):
+                with _collector_paused():
+                    self._apply(table, dropped, -1)
+            # retain() bumps the generation when it drops rows
+            self._state = (table, table.generation + 1, int(np.count_nonzero(keep[:rows])))
+
+    def stats(self) -> Dict[str, int]:
+        key = ("stats", self.version)
+        with self._lock:
+            if key not in self._cache:
+                lateral = sum(1 for _, _, ports in self.graph.edges(data="ports") if any(port in LATERAL_PORTS for port in ports))
+                self._remember(key, {"hosts": self.graph.number_of_nodes(), "edges": self.graph.number_of_edges(),
+                                     "lateral_edges": lateral, "version": self.version})
+            return self._cache[key]
+
+    def reachable(self, host: int, hops: int) -> Dict[int, int]:
+        """Hosts reachable from ``host`` within ``hops`` hops -> hop count (the host itself excluded)"""
+        key = ("reachable", host, hops, self.version)
+        with self._lock:
+            if key not in self._cache:
+                distances = nx.single_source_shortest_path_length(self.graph, host, cutoff=hops) if host in self.graph else {}
+                distances.pop(host, None)
+                self._remember(key, distances)
+            return self._cache[key]
+
+    def attack_paths(self, sources: Iterable[int], targets: Set[int], max_hops: int = 6) -> List[List[int]]:
+        """Fewest-hop path to each reachable target from the nearest source, shortest first"""
+        sources = tuple(sorted({source for source in sources}))
+        key = ("paths", sources, hash(frozenset(targets)), max_hops, self.version)
+        with self._lock:
+            if key not in self._cache:
+                self._remember(key, self._bfs_paths(sources, targets, max_hops))
+            return self._cache[key]
+
+    def pivots(self, top: int = 20, budget_s: float = PIVOT_BUDGET_S) -> Dict[str, Any]:
+        """Hosts with the highest estimated betweenness, with the sample it was estimated from"""
+        with self._lock:
+            if self._pivots is not None:
+                version, computed, result = self._pivots
+                if version == self.version or time.monotonic() - computed < PIVOT_TTL:
+                    return {**result, "hosts": result["hosts"][:top], "stale": version != self.version}
+            started = time.perf_counter()
+            scores, sampled, candidates = self._sampled_betweenness(budget_s)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:max(top, 100)]
+            result = {
+                "hosts": [(host, score) for host, score in ranked if score > 0],
+                "sampled": sampled,
+                "candidates": candidates,
+                "exact": sampled == candidates,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+            self._pivots = (self.version, time.monotonic(), result)
+            return {**result, "hosts": result["hosts"][:top], "stale": False}
+
+    def edge(self, source: int, dest: int) -> Dict[str, Any]:
+        """Sessions, bytes and per-port sessions of an edge"""
+        with self._lock:
+            data = self.graph.get_edge_data(source, dest) or {"sessions": 0, "bytes": 0, "ports": {}}
+            return {"sessions": data["sessions"], "bytes": data["bytes"], "ports": dict(data["ports"])}
+
+    def describe_path(self, path: List[int]) -> str:
+        """A path as addresses joined by the ports used on each hop"""
+        parts = [int_to_ip(path[0])]
+        for source, dest in zip(path, path[1:]):
+            ports = self.edge(source, dest)["ports"]
+            labels = sorted({LATERAL_PORTS.get(port, str(port)) for port in ports})
+            parts.append(f" -[{'/'.join(labels)}]-> {int_to_ip(dest)}")
+        return "".join(parts)
+
+    def _remember(self, key: Tuple, value: Any):
+        self._cache[key] = value
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _apply(self, table: FlowTable, rows, sign: int):
+        source = table.column("source_ip")[rows]
+        dest = table.column("dest_ip")[rows]
+        internal = is_private(source) & is_private(dest) & (source != dest)
+        if not internal.any():
+            return
+        source, dest = source[internal], dest[internal]
+        ports = table.column("dest_port")[rows][internal]
+        volume = (table.column("bytes_sent")[rows][internal].astype(np.int64)
+                  + table.column("bytes_received")[rows][internal].astype(np.int64))
+        edges, inverse = np.unique((source.astype(np.uint64) << np.uint64(32)) | dest.astype(np.uint64), return_inverse=True)
+        inverse = inverse.ravel()
+        sessions = np.bincount(inverse, minlength=len(edges)) * sign
+        volume = np.bincount(inverse, weights=volume, minlength=len(edges)).astype(np.int64) * sign
+        edge_ports, port_sessions = np.unique(inverse.astype(np.int64) * 65536 + ports, return_counts=True)
+
+        adjacency = self.graph.succ
+        pairs = [(int(key >> 32), int(key & 0xFFFFFFFF)) for key in edges.tolist()]
+        for (u, v), count, size in zip(pairs, sessions.tolist(), volume.tolist()):
+            data = adjacency.get(u, {}).get(v)
+            if data is None:
+                if sign > 0:
+                    self.graph.add_edge(u, v, sessions=count, bytes=size, ports={})
+            else:
+                data["sessions"] += count
+                data["bytes"] += size
+        for edge_port, count in zip(edge_ports.tolist(), (port_sessions * sign).tolist()):
+            u, v = pairs[edge_port >> 16]
+            data = adjacency.get(u, {}).get(v)
+            if data is None:
+                continue
+            port = edge_port & 0xFFFF
+            data["ports"][port] = data["ports"].get(port, 0) + count
+            if data["ports"][port] <= 0:
+                del data["ports"][port]
+        if sign < 0:
+            emptied = [(u, v) for u, v in pairs if v in adjacency.get(u, {}) and adjacency[u][v]["sessions"] <= 0]
+            self.graph.remove_edges_from(emptied)
+            self.graph.remove_nodes_from([node for edge in emptied for node in edge if self.graph.degree(node) == 0])
+        self.version += 1
+
+    def _bfs_paths(self, sources: Tuple[int, ...], targets: Set[int], max_hops: int) -> List[List[int]]:
+        adjacency = self.graph.succ
+        parents: Dict[int, Optional[int]] = {source: None for source in sources if source in adjacency}
+        frontier = list(parents)
+        found = []
+        remaining = len(targets)
+        for _ in range(max_hops):
+            if not frontier or not remaining:
+                break
+            following = []
+            for node in frontier:
+                for neighbor in adjacency[node]:
+                    if neighbor not in parents:
+                        parents[neighbor] = node
+                        following.append(neighbor)
+                        if neighbor in targets:
+                            found.append(neighbor)
+                            remaining -= 1
+            frontier = following
+        paths = []
+        # Found in BFS order, so shortest paths come first
+        for target in found:
+            path = [target]
+            while parents[path[-1]] is not None:
+                path.append(parents[path[-1]])
+            paths.append(path[::-1])
+        return paths
+
+    def _sampled_betweenness(self, budget_s: float) -> Tuple[Dict[int, float], int, int]:
+        # Only hosts with outgoing edges start paths, so only they are worth sampling
+        candidates = [node for node, degree in self.graph.out_degree() if degree]
+        rng = np.random.default_rng(self.seed)
+        order = [candidates[index] for index in rng.permutation(len(candidates)).tolist()]
+        scores: Dict[int, float] = {}
+        sampled = 0
+        deadline = time.perf_counter() + budget_s
+        for source in order:
+            if sampled >= PIVOT_MIN_SOURCES and time.perf_counter() >= deadline:
+                break
+            self._accumulate(source, scores)
+            sampled += 1
+        # Scale the sampled dependencies up to every candidate source
+        factor = len(candidates) / sampled if sampled else 0.0
+        return {node: score * factor for node, score in scores.items()}, sampled, len(candidates)
+
+    def _accumulate(self, source: int, scores: Dict[int, float]):
+        adjacency = self.graph.succ
+        order = []
+        parents: Dict[int, List[int]] = {source: []}
+        paths = {source: 1}
+        depth = {source: 0}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            following = depth[node] + 1
+            for neighbor in adjacency[node]:
+                if neighbor not in depth:
+                    depth[neighbor] = following
+                    paths[neighbor] = 0
+                    parents[neighbor] = []
+                    queue.append(neighbor)
+                if depth[neighbor] == following:
+                    paths[neighbor] += paths[node]
+                    parents[neighbor].append(node)
+        dependency = dict.fromkeys(order, 0.0)
+        for node in reversed(order):
+            share = (1.0 + dependency[node]) / paths[node]
+            for parent in parents[node]:
+                dependency[parent] += paths[parent] * share
+            if node != source and dependency[node]:
+                scores[node] = scores.get(node, 0.0) + dependency[node]
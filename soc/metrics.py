@@ -0,0 +1,179 @@
+"""Lightweight timers and counters.
+
+Latencies go into fixed-size histograms: geometric buckets from 10 us to
+100 s (each bucket ~15% wider than the last), kept per time slot so that
+percentiles cover a rolling window. Recording is a bisect and an integer
+increment, memory per timer is constant, and p50/p95/p99 are read from the
+merged bucket counts without storing any samples.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Any, Optional
+
+import numpy as np
+
+# Upper bucket edges in seconds; the final bucket takes everything slower
+BUCKET_BOUNDS = np.geomspace(1e-5, 100.0, 116).tolist()
+
+
+def bucket_percentiles_ms(counts: np.ndarray, quantiles: Iterable[float] = (0.5, 0.95, 0.99)) -> List[float]:
+    """Bucket upper edges (in ms) at the given quantiles of a bucket count vector"""
+    total = counts.sum()
+    if not total:
+        return [0.0 for _ in quantiles]
+    cumulative = np.cumsum(counts)
+    edges = BUCKET_BOUNDS + [BUCKET_BOUNDS[-1]]
+    return [round(edges[int(np.searchsorted(cumulative, q * total))] * 1000, 3) for q in quantiles]
+
+
+def bucket_fraction_within(counts: np.ndarray, budget_ms: float) -> float:
+    """Fraction of counted calls that finished within a latency budget"""
+    total = counts.sum()
+    if not total:
+        return 1.0
+    return float(counts[:bisect.bisect_right(BUCKET_BOUNDS, budget_ms / 1000)].sum() / total)
+
+
+class LatencyHistogram:
+    """Rolling latency histogram made of per-slot bucket counts"""
+
+    def __init__(self, window_seconds: float = 300.0, slots: int = 10):
+        self.slot_seconds = window_seconds / slots
+        self.slots = slots
+        self._counts = np.zeros((slots, len(BUCKET_BOUNDS) + 1), dtype=np.int64)
+        self._epochs = np.full(slots, -1, dtype=np.int64)
+        self._sums = np.zeros(slots)
+        self.total_calls = 0
+
+    def record(self, seconds: float, now: Optional[float] = None):
+        epoch = int((time.monotonic() if now is None else now) // self.slot_seconds)
+        slot = epoch % self.slots
+        if self._epochs[slot] != epoch:
+            # The slot last held data from a whole window ago
+            self._counts[slot] = 0
+            self._sums[slot] = 0.0
+            self._epochs[slot] = epoch
+        self._counts[slot, bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self._sums[slot] += seconds
+        self.total_calls += 1
+
+    def _live(self, now: Optional[float] = None) -> np.ndarray:
+        epoch = int((time.monotonic() if now is None else now) // self.slot_seconds)
+        return self._epochs > epoch - self.slots
+
+    def window_counts(self, now: Optional[float] = None) -> np.ndarray:
+        """Bucket counts summed over the rolling window"""
+        return self._counts[self._live(now)].sum(axis=0)
+
+    def count(self, now: Optional[float] = None) -> int:
+        return int(self._counts[self._live(now)].sum())
+
+    def mean_ms(self, now: Optional[float] = None) -> float:
+        live = self._live(now)
+        calls = self._counts[live].sum()
+        return float(self._sums[live].sum() / calls * 1000) if calls else 0.0
+
+    def percentiles_ms(self, quantiles: Iterable[float] = (0.5, 0.95, 0.99), now: Optional[float] = None) -> List[float]:
+        """Bucket upper edges (in ms) at the given quantiles of the rolling window"""
+        return bucket_percentiles_ms(self.window_counts(now), quantiles)
+
+    def within_ms(self, budget_ms: float, now: Optional[float] = None) -> float:
+        """Fraction of calls in the window that finished within a latency budget"""
+        return bucket_fraction_within(self.window_counts(now), budget_ms)
+
+
+class Instrumentation:
+    """Named latency histograms and event counters"""
+
+    def __init__(self, window_seconds: float = 300.0):
+        self.window_seconds = window_seconds
+        self.timers: Dict[str, LatencyHistogram] = {}
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self.timers.get(name)
+            if histogram is None:
+                histogram = self.timers[name] = LatencyHistogram(self.window_seconds)
+            histogram.record(seconds)
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    @contextmanager
+    def timer(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.increment(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """Decorator recording every call of a function under ``name`` (default: its own name)"""
+        def decorate(func: Callable) -> Callable:
+            label = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def summary(self, names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Rolling-window stats per timer, slowest p95 first"""
+        rows = []
+        with self._lock:
+            for name in sorted(self.timers if names is None else names):
+                histogram = self.timers.get(name)
+                if histogram is None:
+                    continue
+                p50, p95, p99 = histogram.percentiles_ms()
+                rows.append({
+                    "name": name,
+                    "calls": histogram.count(),
+                    "total_calls": histogram.total_calls,
+                    "errors": self.counters.get(f"{name}.errors", 0),
+                    "mean_ms": round(histogram.mean_ms(), 3),
+                    "p50_ms": p50,
+                    "p95_ms": p95,
+                    "p99_ms": p99,
+                })
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+    def combined(self, names: Iterable[str], budget_ms: float) -> Dict[str, Any]:
+        """Rolling-window stats over several timers, as if they were one"""
+        counts = np.zeros(len(BUCKET_BOUNDS) + 1, dtype=np.int64)
+        with self._lock:
+            for name in names:
+                histogram = self.timers.get(name)
+                if histogram is not None:
+                    counts += histogram.window_counts()
+        p50, p95, p99 = bucket_percentiles_ms(counts)
+        return {
+            "calls": int(counts.sum()),
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            "within_budget": bucket_fraction_within(counts, budget_ms),
+        }
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+
+# Process-wide registry; the shared platform and every session render report here
+METRICS = Instrumentation()
+timed = METRICS.timed
@@ -0,0 +1,221 @@
+"""Shared-memory rings between ingest worker processes and the platform.
+
+Each worker process owns one ``SharedRing`` per record layout (flows,
+alerts) and is its only writer; the platform process is its only reader.
+A ring is a ``multiprocessing.shared_memory`` block holding a small header
+of counters and a structured NumPy array of fixed-width rows. The writer
+copies rows in and then advances the write counter; the reader gets NumPy
+views of the rows between its read counter and the write counter (two views
+when the range wraps), consumes them in place and then advances the read
+counter. A writer that finds the ring full waits, so a slow reader throttles
+its workers instead of losing rows.
+
+Flow rows carry categorical codes from the worker's own label registry.
+Labels a worker registers beyond the built-in vocabularies are published in
+a ``SharedVocabulary`` before any row that uses them, and the reader maps
+worker codes to its own codes with a lookup table.
+"""
+
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from soc.flows import CATEGORIES, CATEGORY_LIMITS, FLOW_SCHEMA, encode_labels
+
+# Header slots (uint64)
+WRITE, READ, BATCHES, ERRORS, CAPACITY = range(5)
+_HEADER_SLOTS = 8
+_HEADER_BYTES = _HEADER_SLOTS * 8
+
+# Every row records when it was written, for queue-to-commit lag
+FLOW_ROW = np.dtype([(name, dtype) for name, dtype in FLOW_SCHEMA.items()] + [("written_ns", np.int64)])
+ALERT_ROW = np.dtype([
+    ("alert_id", "U40"), ("timestamp", "datetime64[ms]"), ("attack_type", "U48"), ("source_ip", "U45"),
+    ("dest_ip", "U45"), ("severity", "U8"), ("signature", "U32"), ("action_taken", "U16"), ("confidence", np.uint8),
+    ("protocol", "U8"), ("payload_info", "U128"), ("mitre_technique", "U16"), ("sensor_location", "U32"),
+    ("false_positive", np.bool_), ("written_ns", np.int64),
+])
+
+_LABEL_WIDTH = 64
+
+
+class SharedRing:
+    """Single-writer, single-reader ring of structured rows in shared memory"""
+
+    def __init__(self, dtype: np.dtype, capacity: int = 0, name: Optional[str] = None):
+        self.dtype = np.dtype(dtype)
+        self.owner = name is None
+        size = _HEADER_BYTES + self.dtype.itemsize * capacity
+        self._shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.header = np.ndarray(_HEADER_SLOTS, dtype=np.uint64, buffer=self._shm.buf)
+        if self.owner:
+            self.header[:] = 0
+            self.header[CAPACITY] = capacity
+        # An attaching process takes the capacity the owner recorded (the block may be page-rounded)
+        self.capacity = int(self.header[CAPACITY])
+        self.rows = np.ndarray(self.capacity, dtype=self.dtype, buffer=self._shm.buf, offset=_HEADER_BYTES)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __len__(self) -> int:
+        """Rows written and not yet consumed"""
+        return int(self.header[WRITE] - self.header[READ])
+
+    def write(self, rows: np.ndarray, wait: float = 0.01, should_stop=None) -> bool:
+        """Copy rows in, waiting while the ring is too full; False if stopped while waiting"""
+        offset = 0
+        while offset < len(rows):
+            free = self.capacity - len(self)
+            if not free:
+                if should_stop is not None and should_stop():
+                    return False
+                time.sleep(wait)
+                continue
+            chunk = rows[offset:offset + free]
+            start = int(self.header[WRITE]) % self.capacity
+            first = min(len(chunk), self.capacity - start)
+            self.rows[start:start + first] = chunk[:first]
+            self.rows[:len(chunk) - first] = chunk[first:]
+            # Rows are in place before the counter makes them visible
+            self.header[WRITE] += np.uint64(len(chunk))
+            offset += len(chunk)
+        self.header[BATCHES] += np.uint64(1)
+        return True
+
+    def peek(self, limit: Optional[int] = None) -> List[np.ndarray]:
+        """Views of unconsumed rows, oldest first; valid until ``consume``"""
+        read, written = int(self.header[READ]), int(self.header[WRITE])
+        count = written - read if limit is None else min(limit, written - read)
+        if count <= 0:
+            return []
+        start = read % self.capacity
+        first = min(count, self.capacity - start)
+        views = [self.rows[start:start + first]]
+        if count > first:
+            views.append(self.rows[:count - first])
+        return views
+
+    def consume(self, count: int):
+        """Release rows returned by ``peek`` back to the writer"""
+        self.header[READ] += np.uint64(count)
+
+    def count_error(self, count: int = 1):
+        self.header[ERRORS] += np.uint64(count)
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self.header = None
+        self.rows = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+class SharedVocabulary:
+    """Categorical labels a worker has registered, published for the reader"""
+
+    def __init__(self, name: Optional[str] = None):
+        self.fields = list(CATEGORIES)
+        slots = max(CATEGORY_LIMITS.values())
+        size = len(self.fields) * (8 + slots * _LABEL_WIDTH * 4)
+        self.owner = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.counts = np.ndarray(len(self.fields), dtype=np.uint64, buffer=self._shm.buf)
+        self.labels = np.ndarray((len(self.fields), slots), dtype=f"U{_LABEL_WIDTH}", buffer=self._shm.buf,
+                                 offset=self.counts.nbytes)
+        if self.owner:
+            self.counts[:] = 0
+        # Reader side: worker code -> local code per field
+        self._lookup = {field: np.arange(CATEGORY_LIMITS[field], dtype=FLOW_SCHEMA[field]) for field in self.fields}
+        self._seen = {field: 0 for field in self.fields}
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def publish(self):
+        """Writer side: copy labels registered since the last call into shared memory"""
+        for index, field in enumerate(self.fields):
+            labels = CATEGORIES[field]
+            published = int(self.counts[index])
+            if len(labels) > published:
+                self.labels[index, published:len(labels)] = labels[published:]
+                self.counts[index] = len(labels)
+
+    def lookup(self) -> Dict[str, Optional[np.ndarray]]:
+        """Reader side: code translation per field, None where worker and local codes agree"""
+        tables = {}
+        for index, field in enumerate(self.fields):
+            count = int(self.counts[index])
+            if count > self._seen[field]:
+                new = self.labels[index, self._seen[field]:count].tolist()
+                self._lookup[field][self._seen[field]:count] = encode_labels(field, new)
+                self._seen[field] = count
+            table = self._lookup[field]
+            tables[field] = None if np.array_equal(table[:self._seen[field]], np.arange(self._seen[field])) else table
+        return tables
+
+    def close(self):
+        self.counts = None
+        self.labels = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def flow_rows(columns: Dict[str, np.ndarray], written_ns: int) -> np.ndarray:
+    """Pack a flow column batch into ring rows"""
+    rows = np.empty(len(columns["timestamp"]), dtype=FLOW_ROW)
+    for name in FLOW_SCHEMA:
+        rows[name] = columns[name]
+    rows["written_ns"] = written_ns
+    return rows
+
+
+def flow_columns(rows: np.ndarray, lookup: Dict[str, Optional[np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Column views over ring rows; only remapped categorical columns are copied"""
+    columns = {name: rows[name] for name in FLOW_SCHEMA}
+    for name, table in lookup.items():
+        if table is not None:
+            columns[name] = table[columns[name]]
+    return columns
+
+
+def _to_int(value) -> int:
+    try:
+        return int(float(value or 0))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def alert_rows(alerts: List[Dict], written_ns: int) -> np.ndarray:
+    """Pack normalized IDS alerts into ring rows
+
+    Only ``ALERT_ROW`` fields are carried: text longer than its column is
+    truncated, other fields are dropped and a confidence that is not a number
+    becomes 0.
+    """
+    rows = np.empty(len(alerts), dtype=ALERT_ROW)
+    for name in ALERT_ROW.names[:-1]:
+        kind = ALERT_ROW[name].kind
+        if kind == "U":
+            width = ALERT_ROW[name].itemsize // 4
+            rows[name] = [str(alert.get(name, ""))[:width] for alert in alerts]
+        elif kind == "M":
+            rows[name] = [alert.get(name) for alert in alerts]
+        elif kind == "b":
+            rows[name] = [bool(alert.get(name)) for alert in alerts]
+        else:
+            rows[name] = [min(255, max(0, _to_int(alert.get(name)))) for alert in alerts]
+    rows["written_ns"] = written_ns
+    return rows
+
+
+def alert_records(rows: np.ndarray) -> List[Dict]:
+    """IDS alert dicts from ring rows"""
+    names = ALERT_ROW.names[:-1]
+    return [dict(zip(names, values)) for values in rows[list(names)].tolist()]
@@ -0,0 +1,290 @@
+"""Time-partitioned on-disk event store.
+
+Each dataset is written as hourly Parquet partitions::
+
+    <root>/<dataset>/date=YYYY-MM-DD/hour=HH/part-<id>.parquet
+
+Reads prune partitions by time range before opening any file, project only
+the requested columns and push the timestamp predicate down to Parquet row
+group statistics. Retention deletes whole partitions past the configured
+age, and compaction merges the small part files written by periodic
+checkpoints into one file per closed hour.
+
+Flows have a fixed layout (``FLOW_SCHEMA``). Dict records are cast to the
+dataset's ``RECORD_SCHEMAS`` entry before they are written, so every part
+file of a dataset has the same schema however the values arrived: a value
+that does not convert (an ingested ``confidence: "high"``) is stored as
+null and fields outside the schema are dropped.
+"""
+
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from soc.flows import CATEGORIES, FLOW_SCHEMA, FlowTable, encode_labels
+
+TIME_COLUMN = "timestamp"
+
+# Stored layout of the dict-record datasets, matching the types earlier pandas-inferred files got
+RECORD_SCHEMAS = {
+    "ids_alerts": pa.schema([
+        ("alert_id", pa.string()), ("timestamp", pa.timestamp("ns")), ("attack_type", pa.string()),
+        ("source_ip", pa.string()), ("dest_ip", pa.string()), ("severity", pa.string()),
+        ("signature", pa.string()), ("action_taken", pa.string()), ("confidence", pa.int64()),
+        ("protocol", pa.string()), ("payload_info", pa.string()), ("mitre_technique", pa.string()),
+        ("sensor_location", pa.string()), ("false_positive", pa.bool_()),
+    ]),
+    "honeypot_data": pa.schema([
+        ("honeypot_id", pa.string()), ("timestamp", pa.timestamp("ns")), ("attacker_ip", pa.string()),
+        ("attacker_country", pa.string()), ("attack_type", pa.string()), ("credentials_tried", pa.int64()),
+        ("malware_dropped", pa.bool_()), ("data_captured", pa.int64()), ("threat_level", pa.string()),
+        ("campaign_id", pa.string()), ("asn_organization", pa.string()),
+    ]),
+}
+
+_ARROW_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, OverflowError, TypeError, ValueError)
+
+
+def _coerce_value(value: Any, kind: pa.DataType) -> Any:
+    """One value converted to an Arrow type's Python form, None when it does not convert"""
+    if value is None:
+        return None
+    try:
+        if pa.types.is_integer(kind):
+            number = int(float(value))
+            return number if -2 ** 63 <= number < 2 ** 63 else None
+        if pa.types.is_floating(kind):
+            return float(value)
+        if pa.types.is_boolean(kind):
+            return value if isinstance(value, bool) else str(value).strip().lower() in ("true", "1", "yes")
+        if pa.types.is_timestamp(kind):
+            stamp = pd.Timestamp(value).to_pydatetime()
+            # Aware times are stored as naive local time, like every other timestamp here
+            return stamp.astimezone().replace(tzinfo=None) if stamp.tzinfo is not None else stamp
+        return str(value)
+    except _ARROW_ERRORS:
+        return None
+
+
+def _record_column(values: List[Any], kind: pa.DataType) -> pa.Array:
+    try:
+        return pa.array(values, kind, from_pandas=True)
+    except _ARROW_ERRORS:
+        # Only a batch holding a bad value pays for the per-value path
+        return pa.array([_coerce_value(value, kind) for value in values], kind, from_pandas=True)
+
+
+def records_to_arrow(dataset: str, records: List[Dict[str, Any]]) -> pa.Table:
+    """Dict records as an Arrow table in the dataset's stored layout"""
+    schema = RECORD_SCHEMAS.get(dataset)
+    if schema is None:
+        return pa.Table.from_pandas(pd.DataFrame.from_records(records), preserve_index=False)
+    return pa.table([_record_column([record.get(field.name) for record in records], field.type) for field in schema],
+                    schema=schema)
+
+
+def conform(dataset: str, table: pa.Table) -> pa.Table:
+    """A stored table cast to the dataset's record schema (for part files written before there was one)"""
+    schema = RECORD_SCHEMAS.get(dataset)
+    if schema is None or table.schema.equals(schema):
+        return table
+    columns = {name: table.column(name).to_pylist() for name in table.column_names}
+    return pa.table([_record_column(columns.get(field.name, [None] * table.num_rows), field.type) for field in schema],
+                    schema=schema)
+
+
+def flow_table_to_arrow(flows: FlowTable, start: int = 0, stop: Optional[int] = None) -> pa.Table:
+    """Flow rows as an Arrow table with dictionary-encoded categoricals"""
+    stop = len(flows) if stop is None else min(stop, len(flows))
+    arrays = {}
+    for name in FLOW_SCHEMA:
+        values = flows.column(name)[start:stop]
+        if name in CATEGORIES:
+            # Labels rather than process-local codes are persisted
+            arrays[name] = pa.DictionaryArray.from_arrays(pa.array(values, pa.from_numpy_dtype(values.dtype)), pa.array(list(CATEGORIES[name]), pa.string()))
+        else:
+            arrays[name] = pa.array(values)
+    return pa.table(arrays)
+
+
+def flow_columns_from_arrow(table: pa.Table) -> Dict[str, np.ndarray]:
+    """Column arrays for FlowTable.append_batch from a stored flow table"""
+    columns = {}
+    for name, dtype in FLOW_SCHEMA.items():
+        column = table.column(name).combine_chunks()
+        if name in CATEGORIES:
+            dictionary = column.dictionary.to_pylist() if pa.types.is_dictionary(column.type) else None
+            if dictionary is None:
+                columns[name] = encode_labels(name, column.to_pylist())
+            else:
+                # Remap the stored dictionary onto this process's codes
+                remap = encode_labels(name, dictionary)
+                columns[name] = remap[column.indices.to_numpy(zero_copy_only=False)]
+        else:
+            columns[name] = column.to_numpy(zero_copy_only=False).astype(dtype, copy=False)
+    return columns
+
+
+class EventStore:
+    """Hourly-partitioned Parquet store with pruning, projection and retention"""
+
+    def __init__(self, root: str, retention_days: int = 30, compact_min_files: int = 2):
+        self.root = root
+        self.retention_days = retention_days
+        self.compact_min_files = compact_min_files
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _partition_hour(path: str) -> Optional[datetime]:
+        date_part, hour_part = path.split(os.sep)[-2:]
+        try:
+            return datetime.strptime(f"{date_part[5:]} {hour_part[5:]}", "%Y-%m-%d %H")
+        except ValueError:
+            return None
+
+    def _partition_dir(self, dataset: str, hour: datetime) -> str:
+        return os.path.join(self.root, dataset, f"date={hour:%Y-%m-%d}", f"hour={hour:%H}")
+
+    def partitions(self, dataset: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Tuple[datetime, str]]:
+        """Hour partitions overlapping [start, end), oldest first"""
+        base = os.path.join(self.root, dataset)
+        if not os.path.isdir(base):
+            return []
+        found = []
+        for date_dir in os.listdir(base):
+            # Whole days outside the range are skipped without listing their hours
+            try:
+                day = datetime.strptime(date_dir[5:], "%Y-%m-%d")
+            except ValueError:
+                continue
+            if (start is not None and day + timedelta(days=1) <= start) or (end is not None and day >= end):
+                continue
+            for hour_dir in os.listdir(os.path.join(base, date_dir)):
+                path = os.path.join(base, date_dir, hour_dir)
+                hour = self._partition_hour(path)
+                if hour is None:
+                    continue
+                if start is not None and hour + timedelta(hours=1) <= start:
+                    continue
+                if end is not None and hour >= end:
+                    continue
+                found.append((hour, path))
+        return sorted(found)
+
+    def write(self, dataset: str, table: pa.Table) -> int:
+        """Append rows, split into hourly partitions by timestamp; returns rows written"""
+        if table.num_rows == 0:
+            return 0
+        timestamps = table.column(TIME_COLUMN).to_numpy(zero_copy_only=False).astype("datetime64[h]")
+        hours, inverse = np.unique(timestamps, return_inverse=True)
+        with self._lock:
+            for index, hour in enumerate(hours):
+                rows = table.take(pa.array(np.flatnonzero(inverse == index)))
+                directory = self._partition_dir(dataset, hour.astype(datetime))
+                os.makedirs(directory, exist_ok=True)
+                pq.write_table(rows, os.path.join(directory, f"part-{uuid.uuid4().hex[:12]}.parquet"))
+        return table.num_rows
+
+    def write_records(self, dataset: str, records: List[Dict[str, Any]]) -> int:
+        """Append dict records such as ids_alerts or honeypot_data"""
+        if not records:
+            return 0
+        return self.write(dataset, records_to_arrow(dataset, records))
+
+    def read(self, dataset: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             columns: Optional[List[str]] = None) -> pa.Table:
+        """Rows with start <= timestamp < end, limited to the requested columns"""
+        filters = []
+        if start is not None:
+            filters.append((TIME_COLUMN, ">=", pd.Timestamp(start)))
+        if end is not None:
+            filters.append((TIME_COLUMN, "<", pd.Timestamp(end)))
+        tables = []
+        for hour, path in self.partitions(dataset, start, end):
+            # Partitions fully inside the range need no row filter
+            inside = (start is None or hour >= start) and (end is None or hour + timedelta(hours=1) <= end)
+            for name in sorted(os.listdir(path)):
+                if not name.endswith(".parquet"):
+                    continue
+                file_path = os.path.join(path, name)
+                wanted = columns
+                if columns is not None:
+                    available = set(pq.read_schema(file_path).names)
+                    wanted = [column for column in columns if column in available]
+                    if not inside and TIME_COLUMN not in wanted:
+                        wanted = wanted + [TIME_COLUMN]
+                part = pq.read_table(file_path, columns=wanted, filters=None if inside else (filters or None))
+                if columns is not None and TIME_COLUMN not in columns and TIME_COLUMN in part.column_names:
+                    part = part.drop_columns([TIME_COLUMN])
+                tables.append(part)
+        if not tables:
+            return pa.table({})
+        try:
+            return pa.concat_tables(tables, promote_options="permissive")
+        except _ARROW_ERRORS:
+            if columns is None:
+                return pa.concat_tables([conform(dataset, table) for table in tables])
+            return pa.concat_tables([conform(dataset, table).select([name for name in columns if name in table.column_names])
+                                     for table in tables], promote_options="permissive")
+
+    def read_frame(self, dataset: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return self.read(dataset, start, end, columns).to_pandas()
+
+    def apply_retention(self, now: Optional[datetime] = None) -> int:
+        """Delete partitions older than the retention window; returns partitions removed"""
+        cutoff = (now or datetime.now()) - timedelta(days=self.retention_days)
+        removed = 0
+        with self._lock:
+            for dataset in self.datasets():
+                for hour, path in self.partitions(dataset, end=cutoff):
+                    if hour + timedelta(hours=1) <= cutoff:
+                        shutil.rmtree(path, ignore_errors=True)
+                        removed += 1
+                base = os.path.join(self.root, dataset)
+                for date_dir in os.listdir(base):
+                    date_path = os.path.join(base, date_dir)
+                    if os.path.isdir(date_path) and not os.listdir(date_path):
+                        os.rmdir(date_path)
+        return removed
+
+    def compact(self, now: Optional[datetime] = None) -> int:
+        """Merge part files of closed hour partitions; returns partitions compacted"""
+        current_hour = (now or datetime.now()).replace(minute=0, second=0, microsecond=0)
+        compacted = 0
+        with self._lock:
+            for dataset in self.datasets():
+                for hour, path in self.partitions(dataset, end=current_hour):
+                    parts = sorted(name for name in os.listdir(path) if name.endswith(".parquet"))
+                    if len(parts) < self.compact_min_files:
+                        continue
+                    tables = [pq.read_table(os.path.join(path, name)) for name in parts]
+                    try:
+                        merged = pa.concat_tables(tables, promote_options="permissive")
+                    except _ARROW_ERRORS:
+                        merged = pa.concat_tables([conform(dataset, table) for table in tables])
+                    merged = merged.sort_by(TIME_COLUMN)
+                    target = os.path.join(path, f"part-{uuid.uuid4().hex[:12]}.parquet")
+                    pq.write_table(merged, target + ".tmp")
+                    os.replace(target + ".tmp", target)
+                    for name in parts:
+                        os.remove(os.path.join(path, name))
+                    compacted += 1
+        return compacted
+
+    def maintain(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Run the retention and compaction policies"""
+        return {"expired": self.apply_retention(now), "compacted": self.compact(now)}
+
+    def datasets(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
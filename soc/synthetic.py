@@ -0,0 +1,817 @@
+"""Seeded synthetic telemetry and load generation.
+
+Every synthetic dataset the platform shows is drawn by ``SyntheticGenerator``.
+Each dataset (and each regeneration of it) gets its own NumPy generator
+derived from one seed, so a seed, scale and start time always reproduce the
+same records, whatever order the datasets are built in. Sizes are the
+platform's base sizes times a scale factor.
+
+Event times follow a traffic shape: a daily cycle peaking in business hours
+plus short bursts placed per day from the seed. Snapshots spread a fixed
+number of events over their span by that shape; time windows (live ticks,
+load streams) draw a Poisson count from the shaped rate, so volumes rise
+and fall through the day.
+
+Given a ``soc.geoip.GeoEnricher``, flow locations and attacker countries and
+AS organizations are looked up from the addresses instead of being drawn.
+
+Run as a module to write a dataset to NDJSON files, or to stream it into
+the ingest path (a socket or a tailed file) at a target rate:
+
+    python -m soc.synthetic --seed 7 --scale 100 --duration 3600 --output data/synthetic
+    python -m soc.synthetic --seed 7 --scale 10 --stream udp://127.0.0.1:5514 --eps 5000
+    python -m soc.synthetic --seed 7 --stream logs/replay.ndjson --speed 60
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sys
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from soc.flows import (CATEGORIES, DEST_PORTS, GEO_LOCATIONS, PROTOCOLS, SERVICES, USER_AGENTS, ips_to_strings,
+                       pack_ip_strings, pack_ips)
+
+# Dataset sizes at scale 1
+BASE_SIZES = {
+    "network_activity": 2000,
+    "endpoint_telemetry": 500,
+    "ids_alerts": 300,
+    "honeypot_data": 50,
+    "live_threats": 20,
+    "iot_devices": 100,
+    "cloud_assets": 150,
+}
+
+# Time span of the initial snapshot of each timed dataset; size / span is its average rate
+SPAN_SECONDS = {
+    "network_activity": 600,
+    "ids_alerts": 480 * 60,
+    "honeypot_data": 72 * 3600,
+    "live_threats": 168 * 3600,
+}
+
+# Fixed default start for generated files, so a seed alone identifies a dataset
+DEFAULT_START = datetime(2024, 1, 1)
+
+DAY_MS = 86400000
+
+# Share of flows that are east-west admin sessions between known endpoints, and their ports (SSH, SMB, RDP)
+EAST_WEST_SHARE = 0.08
+EAST_WEST_PORTS = (22, 445, 3389)
+
+# Share of flows that are bulk uploads (exfiltration-sized), far outside normal host behavior
+BULK_TRANSFER_SHARE = 0.001
+
+THREAT_SCENARIOS = [
+    {
+        "type": "APT Campaign",
+        "description": "Suspected nation-state actor conducting reconnaissance",
+        "ttps": ["T1595.001", "T1589.001", "T1592.002"]
+    },
+    {
+        "type": "Ransomware Activity",
+        "description": "Ransomware group scanning for vulnerable services",
+        "ttps": ["T1560.001", "T1486", "T1490"]
+    },
+    {
+        "type": "Insider Threat",
+        "description": "Unusual data access patterns detected",
+        "ttps": ["T1074.001", "T1020", "T1030"]
+    },
+    {
+        "type": "Supply Chain Attack",
+        "description": "Compromised third-party software update",
+        "ttps": ["T1195.002", "T1105", "T1059.003"]
+    }
+]
+
+ATTACK_TYPES = [
+    "Port Scan", "Brute Force", "SQL Injection", "XSS", "DDoS",
+    "Malware Download", "Data Theft", "Zero-Day Exploit", "Credential Stuffing",
+    "Lateral Movement", "Privilege Escalation", "Command Injection"
+]
+DEPARTMENTS = ["HR", "Finance", "IT", "Sales", "Marketing", "Engineering", "Executive"]
+OS_VERSIONS = ["Windows 10 Enterprise", "Windows 11 Enterprise", "macOS 13.4", "Ubuntu 22.04 LTS", "RHEL 8.6"]
+IOT_TYPES = ["Smart Camera", "Thermostat", "Smart Lock", "Industrial Sensor", "Medical Device", "Vehicle System", "Printer", "VoIP Phone"]
+CLOUD_SERVICES = ["EC2", "S3", "RDS", "Lambda", "Azure VM", "Cloud Storage", "Kubernetes", "Container Registry", "Load Balancer", "Database"]
+IOC_TLDS = ["ru", "cn", "top", "xyz", "info", "biz"]
+IOC_PATTERNS = ["ransomware", "backdoor", "/wp-admin/setup-config.php", "powershell -enc", "cmd.exe /c", "${jndi:"]
+
+# Country -> (share of address space, [(asn, organization)]) of the synthetic geo/ASN range database
+GEO_NETWORKS = {
+    "USA": (0.34, [(16509, "Amazon.com"), (14061, "Digital Ocean"), (15169, "Google LLC"), (8075, "Microsoft Corporation")]),
+    "China": (0.14, [(4134, "China Telecom"), (4837, "China Unicom")]),
+    "Japan": (0.07, [(2516, "KDDI Corporation"), (4713, "NTT Communications")]),
+    "Germany": (0.07, [(3320, "Deutsche Telekom AG"), (24940, "Hetzner Online GmbH")]),
+    "United Kingdom": (0.05, [(2856, "British Telecommunications")]),
+    "France": (0.05, [(16276, "OVH SAS")]),
+    "Brazil": (0.05, [(18881, "Telefonica Brasil")]),
+    "India": (0.05, [(9829, "Bharat Sanchar Nigam"), (55836, "Reliance Jio")]),
+    "Russia": (0.05, [(12389, "Rostelecom"), (8359, "MTS PJSC")]),
+    "Netherlands": (0.04, [(60781, "LeaseWeb Netherlands")]),
+    "Vietnam": (0.04, [(45899, "VNPT Corp")]),
+    "Iran": (0.03, [(58224, "Iran Telecommunication Company")]),
+    "North Korea": (0.02, [(131279, "Star JV")]),
+}
+
+
+def _pick(rng: np.random.Generator, options: List[Any], size: int) -> List[Any]:
+    return np.asarray(options, dtype=object)[rng.integers(0, len(options), size)].tolist()
+
+
+def _random_ips(rng: np.random.Generator, size: int) -> List[str]:
+    return ips_to_strings(pack_ips(*(rng.integers(1, 256, size) for _ in range(4)))).tolist()
+
+
+def _public_ips(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Packed unicast addresses outside 10/8 (other private blocks are rare enough to keep)"""
+    return pack_ips(rng.integers(11, 224, size), *(rng.integers(0, 256, size) for _ in range(2)), rng.integers(1, 255, size))
+
+
+def _mac_addresses(rng: np.random.Generator, size: int) -> List[str]:
+    octets = rng.integers(0, 256, (size, 5))
+    return ["02:" + ":".join(f"{octet:02x}" for octet in row) for row in octets.tolist()]
+
+
+def _to_ms(moment: datetime) -> int:
+    return int(np.datetime64(moment, "ms").astype(np.int64))
+
+
+def _datetimes(times_ms: np.ndarray) -> List[datetime]:
+    return np.asarray(times_ms, dtype=np.int64).astype("datetime64[ms]").tolist()
+
+
+class TrafficShape:
+    """Relative event rate over the day, with short bursts on top
+
+    The daily cycle is a cosine around ``peak_hour`` with mean 1, so the
+    average rate of a dataset is unchanged by it; bursts multiply the rate
+    by ``burst_factor`` for ``burst_minutes``.
+    """
+
+    def __init__(self, peak_hour: float = 13.0, amplitude: float = 0.6, bursts_per_day: float = 4.0,
+                 burst_minutes: float = 5.0, burst_factor: float = 6.0):
+        self.peak_hour = peak_hour
+        self.amplitude = amplitude
+        self.bursts_per_day = bursts_per_day
+        self.burst_ms = int(burst_minutes * 60000)
+        self.burst_factor = burst_factor
+
+    def diurnal(self, times_ms: np.ndarray) -> np.ndarray:
+        hours = (np.asarray(times_ms, dtype=np.int64) % DAY_MS) / 3600000
+        return 1 + self.amplitude * np.cos(2 * np.pi * (hours - self.peak_hour) / 24)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"peak_hour": self.peak_hour, "amplitude": self.amplitude, "bursts_per_day": self.bursts_per_day,
+                "burst_minutes": self.burst_ms / 60000, "burst_factor": self.burst_factor}
+
+
+class SyntheticGenerator:
+    """Reproducible synthetic records for every platform dataset"""
+
+    def __init__(self, seed: Optional[int] = None, scale: float = 1.0, shape: Optional[TrafficShape] = None, geo=None):
+        # Without a seed one is drawn, and kept so the run can be replayed
+        self.seed = int(np.random.SeedSequence().entropy if seed is None else seed)
+        self.scale = scale
+        self.shape = shape or TrafficShape()
+        # soc.geoip.GeoEnricher; without one, countries and AS organizations are drawn at random
+        self.geo = geo
+        self._generations: Dict[str, int] = {}
+        self._bursts: Dict[int, List[Tuple[int, int]]] = {}
+        self._packed_endpoints: Tuple[Any, np.ndarray] = (None, np.empty(0, dtype=np.uint32))
+
+    def size(self, dataset: str) -> int:
+        """Snapshot size of a dataset at this scale"""
+        return max(1, int(BASE_SIZES[dataset] * self.scale))
+
+    def rate(self, dataset: str) -> float:
+        """Average events per second of a timed dataset at this scale"""
+        return BASE_SIZES[dataset] * self.scale / SPAN_SECONDS[dataset]
+
+    def rng(self, name: str, *key: int) -> np.random.Generator:
+        """Generator for a named stream, fully determined by the seed, name and key"""
+        sequence = np.random.SeedSequence(self.seed, spawn_key=(zlib.crc32(name.encode()), *key))
+        return np.random.default_rng(sequence)
+
+    def next_rng(self, name: str) -> np.random.Generator:
+        """Generator for the next regeneration of a dataset"""
+        generation = self._generations.get(name, 0)
+        self._generations[name] = generation + 1
+        return self.rng(name, generation)
+
+    # Traffic shape
+
+    def bursts(self, day: int) -> List[Tuple[int, int]]:
+        """Burst intervals (ms) of one day since the epoch"""
+        bursts = self._bursts.get(day)
+        if bursts is None:
+            rng = self.rng("bursts", day)
+            starts = day * DAY_MS + rng.integers(0, DAY_MS, rng.poisson(self.shape.bursts_per_day))
+            bursts = self._bursts[day] = [(start, start + self.shape.burst_ms) for start in sorted(starts.tolist())]
+        return bursts
+
+    def intensity(self, times_ms: np.ndarray) -> np.ndarray:
+        """Relative event rate at each time"""
+        times_ms = np.asarray(times_ms, dtype=np.int64)
+        rate = self.shape.diurnal(times_ms)
+        if times_ms.size:
+            for day in range(int(times_ms.min()) // DAY_MS, int(times_ms.max()) // DAY_MS + 1):
+                for start, end in self.bursts(day):
+                    rate[(times_ms >= start) & (times_ms < end)] *= self.shape.burst_factor
+        return rate
+
+    def expected(self, dataset: str, start_ms: int, end_ms: int) -> float:
+        """Expected event count of a timed dataset in [start, end)"""
+        if end_ms <= start_ms:
+            return 0.0
+        grid = np.linspace(start_ms, end_ms, min(4096, max(2, (end_ms - start_ms) // 1000 + 1))).astype(np.int64)
+        return self.rate(dataset) * (end_ms - start_ms) / 1000 * float(self.intensity(grid).mean())
+
+    def snapshot_times(self, rng: np.random.Generator, dataset: str, now: datetime, count: Optional[int] = None) -> np.ndarray:
+        """Shaped event times for a dataset's snapshot, spread over its span up to now"""
+        end_ms = _to_ms(now)
+        return self.timestamps(rng, self.size(dataset) if count is None else count,
+                               end_ms - SPAN_SECONDS[dataset] * 1000, end_ms)
+
+    def timestamps(self, rng: np.random.Generator, count: int, start_ms: int, end_ms: int) -> np.ndarray:
+        """Sorted event times (ms) in [start, end), distributed by the traffic shape"""
+        span = max(1, end_ms - start_ms)
+        bins = int(min(4096, max(1, span // 1000)))
+        edges = start_ms + span * np.arange(bins + 1, dtype=np.int64) // bins
+        widths = np.diff(edges)
+        weights = self.intensity(edges[:-1] + widths // 2) * widths
+        chosen = rng.choice(bins, count, p=weights / weights.sum())
+        return np.sort(edges[chosen] + (rng.random(count) * widths[chosen]).astype(np.int64))
+
+    # Records
+
+    def _origins(self, rng: np.random.Generator, ips: List[str], countries: List[str],
+                 organizations: Optional[List[str]] = None) -> Tuple[List[str], List[str]]:
+        """Country and AS organization of each address: from the geo database, else drawn from the given lists"""
+        if self.geo is not None:
+            matches = self.geo.lookup_many(ips)
+            return [match[0] for match in matches], [match[2] for match in matches]
+        return _pick(rng, countries, len(ips)), _pick(rng, organizations or ["Unknown"], len(ips))
+
+    def flows(self, rng: np.random.Generator, times_ms: np.ndarray, endpoint_ips: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """Flow column batch (FlowTable layout) at the given times; volume follows the daily cycle.
+        With endpoint addresses, a share of the flows are admin sessions between endpoints"""
+        size = len(times_ms)
+        traffic_multiplier = self.shape.diurnal(times_ms) * rng.uniform(1.0, 2.0, size)
+        source_ips = pack_ips(10, rng.integers(1, 256, size), rng.integers(1, 256, size), rng.integers(1, 256, size))
+        # About a third of the traffic leaves the network
+        dest_ips = np.where(rng.random(size) < 0.35, _public_ips(rng, size),
+                            pack_ips(192, 168, rng.integers(1, 256, size), rng.integers(1, 256, size)))
+        dest_ports = np.asarray(DEST_PORTS, dtype=np.uint16)[rng.integers(0, len(DEST_PORTS), size)]
+        if endpoint_ips:
+            if self._packed_endpoints[0] is not endpoint_ips:
+                self._packed_endpoints = (endpoint_ips, pack_ip_strings(endpoint_ips))
+            endpoints = self._packed_endpoints[1]
+            east_west = np.flatnonzero(rng.random(size) < EAST_WEST_SHARE)
+            source_ips[east_west] = endpoints[rng.integers(0, len(endpoints), len(east_west))]
+            dest_ips[east_west] = endpoints[rng.integers(0, len(endpoints), len(east_west))]
+            dest_ports[east_west] = np.asarray(EAST_WEST_PORTS, dtype=np.uint16)[rng.integers(0, len(EAST_WEST_PORTS), len(east_west))]
+        bytes_sent = (rng.integers(100, 1000001, size) * traffic_multiplier).astype(np.uint32)
+        bulk = np.flatnonzero(rng.random(size) < BULK_TRANSFER_SHARE)
+        bytes_sent[bulk] = rng.integers(500_000_000, 4_000_000_000, len(bulk), dtype=np.uint32)
+        if self.geo is None:
+            locations = rng.integers(0, len(GEO_LOCATIONS), size, dtype=np.uint16)
+        else:
+            locations = self.geo.flow_locations(source_ips, dest_ips)
+        return {
+            "timestamp": np.asarray(times_ms, dtype=np.int64).astype("datetime64[ms]"),
+            "session_id": rng.integers(100000, 1000000, size, dtype=np.uint32),
+            "source_ip": source_ips,
+            "dest_ip": dest_ips,
+            "source_port": rng.integers(1024, 65536, size, dtype=np.uint16),
+            "dest_port": dest_ports,
+            "protocol": rng.integers(0, len(PROTOCOLS), size, dtype=np.uint8),
+            "service": rng.integers(0, len(SERVICES), size, dtype=np.uint8),
+            "bytes_sent": bytes_sent,
+            "bytes_received": (rng.integers(100, 500001, size) * traffic_multiplier).astype(np.uint32),
+            "duration_seconds": rng.integers(1, 301, size, dtype=np.uint16),
+            # threat_score and flagged are filled in by the anomaly scoring stage
+            "threat_score": np.zeros(size, dtype=np.uint8),
+            "geo_location": locations,
+            "user_agent": rng.integers(0, len(USER_AGENTS), size, dtype=np.uint8),
+            "encrypted": rng.random(size) < 0.8,
+            "flagged": np.zeros(size, dtype=bool),
+        }
+
+    def alerts(self, rng: np.random.Generator, times_ms: np.ndarray, endpoint_ips: List[str],
+               counters: Dict[str, int]) -> List[Dict[str, Any]]:
+        """IDS alerts at the given times; about 30% target a known endpoint"""
+        size = len(times_ms)
+        first = counters.get("ids_alerts", 0)
+        counters["ids_alerts"] = first + size
+        timestamps = _datetimes(times_ms)
+        internal = ips_to_strings(pack_ips(10, 0, rng.integers(1, 256, size), rng.integers(1, 256, size))).tolist()
+        to_endpoint = (rng.random(size) < 0.3) & bool(endpoint_ips)
+        targets = _pick(rng, endpoint_ips or ["0.0.0.0"], size)
+        columns = zip(
+            timestamps, _pick(rng, ATTACK_TYPES, size), _random_ips(rng, size),
+            [target if hit else ip for target, hit, ip in zip(targets, to_endpoint.tolist(), internal)],
+            _pick(rng, ["Low", "Medium", "High", "Critical"], size), rng.integers(10000, 100000, size).tolist(),
+            _pick(rng, ["Allowed", "Blocked", "Alerted", "Quarantined"], size), rng.integers(70, 100, size).tolist(),
+            _pick(rng, ["TCP", "UDP", "HTTP", "HTTPS"], size), _pick(rng, ["Exploit kit", "Ransomware", "Trojan", "Backdoor"], size),
+            _pick(rng, ["T1055", "T1068", "T1071", "T1082", "T1105"], size), _pick(rng, ["DMZ", "Internal", "Cloud", "Branch"], size),
+            (rng.random(size) < 0.15).tolist(),
+        )
+        return [{
+            "alert_id": f"IDS-{timestamp.strftime('%Y%m%d')}-{first + index + 1:05d}",
+            "timestamp": timestamp,
+            "attack_type": attack_type,
+            "source_ip": source_ip,
+            "dest_ip": dest_ip,
+            "severity": severity,
+            "signature": f"SIG-{signature}",
+            "action_taken": action,
+            "confidence": confidence,
+            "protocol": protocol,
+            "payload_info": f"Malicious payload detected: {payload}",
+            "mitre_technique": technique,
+            "sensor_location": sensor,
+            "false_positive": false_positive
+        } for index, (timestamp, attack_type, source_ip, dest_ip, severity, signature, action, confidence,
+                      protocol, payload, technique, sensor, false_positive) in enumerate(columns)]
+
+    def interactions(self, rng: np.random.Generator, times_ms: np.ndarray, counters: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Honeypot interactions at the given times"""
+        size = len(times_ms)
+        first = counters.get("honeypot_data", 0)
+        counters["honeypot_data"] = first + size
+        campaigns = rng.integers(10000, 100000, size).tolist()
+        in_campaign = (rng.random(size) < 0.3).tolist()
+        attacker_ips = _random_ips(rng, size)
+        countries, organizations = self._origins(rng, attacker_ips, ["China", "Russia", "USA", "Brazil", "Vietnam", "Iran"],
+                                                 ["China Telecom", "OVH SAS", "Amazon.com", "Digital Ocean", "Unknown"])
+        columns = zip(
+            _datetimes(times_ms), attacker_ips, countries,
+            _pick(rng, ["SSH Brute Force", "Web Exploit", "Database Attack", "Service Scan"], size),
+            rng.integers(1, 101, size).tolist(), (rng.random(size) < 0.4).tolist(), rng.integers(0, 10001, size).tolist(),
+            _pick(rng, ["Low", "Medium", "High", "Critical"], size),
+            [f"CAMP-{campaign}" if hit else None for campaign, hit in zip(campaigns, in_campaign)],
+            organizations,
+        )
+        return [{
+            "honeypot_id": f"HONEY-{first + index + 1:03d}",
+            "timestamp": timestamp,
+            "attacker_ip": attacker_ip,
+            "attacker_country": country,
+            "attack_type": attack_type,
+            "credentials_tried": credentials,
+            "malware_dropped": malware,
+            "data_captured": captured,
+            "threat_level": level,
+            "campaign_id": campaign,
+            "asn_organization": organization
+        } for index, (timestamp, attacker_ip, country, attack_type, credentials, malware, captured,
+                      level, campaign, organization) in enumerate(columns)]
+
+    def threats(self, rng: np.random.Generator, size: int, now: datetime, team: List[str], counters: Dict[str, int],
+                last_activity: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Live threats built from the threat scenarios, last active at last_activity or up to two hours ago"""
+        first = counters.get("live_threats", 0)
+        counters["live_threats"] = first + size
+        now_ms = _to_ms(now)
+        if last_activity is None:
+            last_activity_ms = now_ms - rng.integers(1, 121, size) * 60000
+        else:
+            last_activity_ms = np.full(size, _to_ms(last_activity), dtype=np.int64)
+        source_ips = ips_to_strings(_public_ips(rng, size)).tolist()
+        countries, _ = self._origins(rng, source_ips, ["Russia", "China", "North Korea", "Iran", "Unknown"])
+        columns = zip(
+            _datetimes(last_activity_ms), _pick(rng, THREAT_SCENARIOS, size), _pick(rng, ["High", "Critical"], size),
+            rng.integers(75, 96, size).tolist(), _datetimes(now_ms - rng.integers(1, 169, size) * 3600000),
+            source_ips, countries, rng.integers(3, 9, size).tolist(),
+            _pick(rng, ["Active", "Contained", "Investigating"], size), _pick(rng, team or ["unassigned"], size),
+            rng.integers(6, 11, size).tolist(),
+            _pick(rng, ["Data Theft", "Service Disruption", "Financial Loss", "Reputation Damage"], size),
+        )
+        return [{
+            "threat_id": f"THREAT-{now.strftime('%Y%m%d')}-{first + index + 1:04d}",
+            "type": scenario["type"],
+            "description": scenario["description"],
+            "severity": severity,
+            "confidence": confidence,
+            "first_detected": first_detected,
+            "last_activity": last_activity,
+            "source_ip": source_ip,
+            "source_country": country,
+            "target_sector": "Enterprise",
+            "mitre_techniques": scenario["ttps"],
+            "indicators": [f"IOC-{j}" for j in range(indicators)],
+            "status": status,
+            "assigned_to": assignee,
+            "impact_score": impact,
+            "business_impact": business_impact
+        } for index, (last_activity, scenario, severity, confidence, first_detected, source_ip, country, indicators,
+                      status, assignee, impact, business_impact) in enumerate(columns)]
+
+    def endpoints(self, rng: np.random.Generator, size: int, now: datetime) -> List[Dict[str, Any]]:
+        """Endpoint inventory with security posture"""
+        now_ms = _to_ms(now)
+        processes = _pick(rng, ["powershell.exe", "cmd.exe", "wmic.exe", "regsvr32.exe"], size)
+        has_process = (rng.random(size) < 0.5).tolist()
+        columns = zip(
+            _pick(rng, ["NYC", "LON", "TOK", "SF"], size),
+            ips_to_strings(pack_ips(10, 1, rng.integers(1, 51, size), rng.integers(1, 255, size))).tolist(),
+            _mac_addresses(rng, size), _pick(rng, OS_VERSIONS, size), _pick(rng, DEPARTMENTS, size),
+            _datetimes(now_ms - rng.integers(1, 61, size) * 60000),
+            _pick(rng, ["Enabled", "Enabled", "Enabled", "Outdated"], size), rng.integers(0, 3, size).tolist(),
+            [[process] if hit else [] for process, hit in zip(processes, has_process)],
+            rng.integers(5, 51, size).tolist(), rng.integers(0, 101, size).tolist(),
+            _pick(rng, ["Current", "1-2 weeks behind", "Critical updates missing"], size),
+            _pick(rng, ["Enabled", "Enabled", "Partial"], size), _datetimes(now_ms - rng.integers(0, 8, size) * DAY_MS),
+            _pick(rng, ["Active", "Idle", "Offline"], size), _pick(rng, ["Compliant", "At Risk", "Non-Compliant"], size),
+            _pick(rng, ["Low", "Medium", "High", "Critical"], size),
+        )
+        return [{
+            "endpoint_id": f"EP-{i+1:05d}",
+            "hostname": f"WS-{site}-{i+1:04d}",
+            "ip_address": ip_address,
+            "mac_address": mac_address,
+            "os_version": os_version,
+            "department": department,
+            "last_seen": last_seen,
+            "antivirus_status": antivirus,
+            "threats_detected": threats,
+            "suspicious_processes": suspicious,
+            "network_connections": connections,
+            "risk_score": risk_score,
+            "patch_level": patch_level,
+            "encryption_status": encryption,
+            "last_scan": last_scan,
+            "user_activity": activity,
+            "compliance_status": compliance,
+            "criticality": criticality
+        } for i, (site, ip_address, mac_address, os_version, department, last_seen, antivirus, threats, suspicious,
+                  connections, risk_score, patch_level, encryption, last_scan, activity, compliance,
+                  criticality) in enumerate(columns)]
+
+    def iot_devices(self, rng: np.random.Generator, size: int, now: datetime) -> List[Dict[str, Any]]:
+        """IoT device inventory"""
+        now_ms = _to_ms(now)
+        firmware = rng.integers([1, 0, 0], [6, 10, 10], (size, 3))
+        columns = zip(
+            _pick(rng, IOT_TYPES, size),
+            ips_to_strings(pack_ips(10, 2, rng.integers(1, 51, size), rng.integers(1, 255, size))).tolist(),
+            _mac_addresses(rng, size), [f"v{major}.{minor}.{patch}" for major, minor, patch in firmware.tolist()],
+            _datetimes(now_ms - rng.integers(1, 25, size) * 3600000),
+            _pick(rng, ["Secure", "Vulnerable", "Compromised", "Unknown"], size), rng.integers(0, 6, size).tolist(),
+            rng.integers(10, 1001, size).tolist(), rng.integers(0, 101, size).tolist(),
+            _pick(rng, ["Facilities", "IT", "Operations", "Medical"], size), _pick(rng, ["Low", "Medium", "High"], size),
+        )
+        return [{
+            "device_id": f"IOT-{i+1:04d}",
+            "type": device_type,
+            "ip_address": ip_address,
+            "mac_address": mac_address,
+            "firmware_version": firmware_version,
+            "last_seen": last_seen,
+            "security_status": status,
+            "vulnerabilities": vulnerabilities,
+            "network_traffic": traffic,
+            "risk_score": risk_score,
+            "department": department,
+            "criticality": criticality
+        } for i, (device_type, ip_address, mac_address, firmware_version, last_seen, status, vulnerabilities,
+                  traffic, risk_score, department, criticality) in enumerate(columns)]
+
+    def cloud_assets(self, rng: np.random.Generator, size: int, now: datetime) -> List[Dict[str, Any]]:
+        """Cloud asset inventory"""
+        now_ms = _to_ms(now)
+        columns = zip(
+            _pick(rng, CLOUD_SERVICES, size), _pick(rng, ["AWS", "Azure", "GCP"], size),
+            _pick(rng, ["us-east-1", "eu-west-1", "ap-southeast-1", "us-west-2"], size),
+            _pick(rng, ["Secure", "Misconfigured", "Public Exposure", "Encrypted"], size),
+            _pick(rng, ["Compliant", "Non-Compliant", "At Risk"], size), _datetimes(now_ms - rng.integers(1, 91, size) * DAY_MS),
+            rng.integers(0, 4, size).tolist(), _pick(rng, ["Enabled", "Disabled", "Partial"], size),
+            np.round(rng.uniform(50, 5000, size), 2).tolist(), _pick(rng, ["IT", "Development", "Marketing", "Finance"], size),
+            _pick(rng, ["Low", "Medium", "High", "Critical"], size),
+        )
+        return [{
+            "asset_id": f"CLOUD-{i+1:05d}",
+            "service": service,
+            "provider": provider,
+            "region": region,
+            "security_status": status,
+            "compliance": compliance,
+            "last_audit": last_audit,
+            "threats_detected": threats,
+            "encryption_status": encryption,
+            "cost_monthly": cost,
+            "owner": owner,
+            "criticality": criticality
+        } for i, (service, provider, region, status, compliance, last_audit, threats, encryption, cost, owner,
+                  criticality) in enumerate(columns)]
+
+    def threat_indicators(self, rng: np.random.Generator, count: int, threats: List[str]) -> List[Dict[str, Any]]:
+        """IOC feed attributed to the given threat names"""
+        # Payload and URL fragments seen in exploit traffic
+        indicators = [{"type": "url", "value": pattern, "threat": threat, "severity": "HIGH"}
+                      for pattern, threat in zip(IOC_PATTERNS, _pick(rng, threats, len(IOC_PATTERNS)))]
+        size = max(0, count - len(indicators))
+        kinds = np.asarray(["ip", "cidr", "domain", "hash"], dtype=object)[rng.choice(4, size, p=[0.60, 0.02, 0.19, 0.19])]
+        octets = rng.integers([1, 0, 0, 1], [224, 256, 256, 255], (size, 4))
+        digests = rng.bytes(32 * size)
+        domain_lengths = rng.integers(6, 13, size).tolist()
+        tlds = _pick(rng, IOC_TLDS, size)
+        for index, (kind, (a, b, c, d), threat, severity) in enumerate(zip(
+                kinds.tolist(), octets.tolist(), _pick(rng, threats, size), _pick(rng, ["HIGH", "CRITICAL"], size))):
+            if kind == "ip":
+                value = f"{a}.{b}.{c}.{d}"
+            elif kind == "cidr":
+                value = f"{a}.{b}.{c}.0/24"
+            elif kind == "domain":
+                value = f"{digests[32 * index:32 * index + 16].hex()[:domain_lengths[index]]}.{tlds[index]}"
+            else:
+                value = digests[32 * index:32 * index + 32].hex()
+            indicators.append({"type": kind, "value": value, "threat": threat, "severity": severity})
+        return indicators
+
+    def geo_ranges(self, rng: np.random.Generator, count: int = 200000) -> Dict[str, Any]:
+        """Disjoint IPv4 ranges over the unicast space with a country and AS each (soc.geoip columns)"""
+        starts = np.unique(rng.integers(1 << 24, 224 << 24, count, dtype=np.int64))
+        ends = np.append(starts[1:], 224 << 24) - 1
+        # About 5% of the space is left unallocated
+        allocated = rng.random(len(starts)) >= 0.05
+        starts, ends = starts[allocated], ends[allocated]
+        names = list(GEO_NETWORKS)
+        shares = np.asarray([GEO_NETWORKS[name][0] for name in names])
+        country_index = rng.choice(len(names), len(starts), p=shares / shares.sum())
+        networks = [GEO_NETWORKS[names[index]][1] for index in country_index.tolist()]
+        picks = (rng.random(len(starts)) * np.asarray([len(choices) for choices in networks])).astype(int).tolist()
+        return {
+            "start": starts,
+            "end": ends,
+            "country": [names[index] for index in country_index.tolist()],
+            "asn": [choices[pick][0] for choices, pick in zip(networks, picks)],
+            "organization": [choices[pick][1] for choices, pick in zip(networks, picks)],
+        }
+
+    def window(self, rng: np.random.Generator, start_ms: int, end_ms: int, endpoint_ips: List[str],
+               counters: Dict[str, int], datasets=("network_activity", "ids_alerts", "honeypot_data")) -> Dict[str, Any]:
+        """Events of the timed datasets in [start, end), with Poisson counts from the shaped rate"""
+        events = {}
+        for dataset in datasets:
+            count = int(rng.poisson(self.expected(dataset, start_ms, end_ms)))
+            times = self.timestamps(rng, count, start_ms, end_ms) if count else np.zeros(0, dtype=np.int64)
+            if dataset == "network_activity":
+                events[dataset] = self.flows(rng, times, endpoint_ips)
+            elif dataset == "ids_alerts":
+                events[dataset] = self.alerts(rng, times, endpoint_ips, counters)
+            else:
+                events[dataset] = self.interactions(rng, times, counters)
+        return events
+
+    def chunks(self, start: datetime, duration_seconds: float, endpoint_ips: List[str], counters: Dict[str, int],
+               chunk_seconds: int = 60, datasets=("network_activity", "ids_alerts", "honeypot_data")) -> Iterator[Dict[str, Any]]:
+        """Consecutive windows from start; each chunk draws from its own generator, keyed by its index"""
+        start_ms = _to_ms(start)
+        end_ms = start_ms + int(duration_seconds * 1000)
+        for index, chunk_start in enumerate(range(start_ms, end_ms, chunk_seconds * 1000)):
+            chunk_end = min(end_ms, chunk_start + chunk_seconds * 1000)
+            yield self.window(self.rng("chunk", index), chunk_start, chunk_end, endpoint_ips, counters, datasets)
+
+
+# NDJSON output
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="milliseconds")
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def flow_lines(flows: Dict[str, np.ndarray], kind: bool = False) -> List[str]:
+    """NDJSON lines in the ingested network_activity layout"""
+    if not len(flows["timestamp"]):
+        return []
+    frame = pd.DataFrame({
+        "timestamp": np.datetime_as_string(flows["timestamp"], unit="ms"),
+        "session_id": np.char.add("SESS-", flows["session_id"].astype(str)),
+        "source_ip": ips_to_strings(flows["source_ip"]),
+        "dest_ip": ips_to_strings(flows["dest_ip"]),
+        **{name: flows[name] for name in ("source_port", "dest_port", "bytes_sent", "bytes_received", "duration_seconds", "encrypted")},
+        **{name: np.asarray(CATEGORIES[name], dtype=object)[flows[name]] for name in CATEGORIES},
+    })
+    if kind:
+        frame.insert(0, "kind", "network_activity")
+    return frame.to_json(orient="records", lines=True).splitlines()
+
+
+def record_lines(records: List[Dict[str, Any]], kind: Optional[str] = None) -> List[str]:
+    if kind:
+        return [json.dumps({"kind": kind, **record}, default=_json_default) for record in records]
+    return [json.dumps(record, default=_json_default) for record in records]
+
+
+def build_inventory(generator: SyntheticGenerator, now: datetime, team: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Snapshot datasets that are not event streams"""
+    counters: Dict[str, int] = {}
+    return {
+        "endpoint_telemetry": generator.endpoints(generator.next_rng("endpoint_telemetry"), generator.size("endpoint_telemetry"), now),
+        "iot_devices": generator.iot_devices(generator.next_rng("iot_devices"), generator.size("iot_devices"), now),
+        "cloud_assets": generator.cloud_assets(generator.next_rng("cloud_assets"), generator.size("cloud_assets"), now),
+        "live_threats": generator.threats(generator.next_rng("live_threats"), generator.size("live_threats"), now, team, counters),
+    }
+
+
+def write_dataset(generator: SyntheticGenerator, directory: str, start: datetime, duration_seconds: float,
+                  chunk_seconds: int = 60) -> Dict[str, Any]:
+    """Write inventories and the event timeline as one NDJSON file per dataset, plus a manifest"""
+    os.makedirs(directory, exist_ok=True)
+    inventory = build_inventory(generator, start, team=[])
+    endpoint_ips = [endpoint["ip_address"] for endpoint in inventory["endpoint_telemetry"]]
+    counts: Dict[str, int] = {}
+    handles = {}
+
+    def write(dataset: str, lines: List[str]):
+        if dataset not in handles:
+            handles[dataset] = open(os.path.join(directory, f"{dataset}.ndjson"), "w", encoding="utf-8")
+        if lines:
+            handles[dataset].write("\n".join(lines) + "\n")
+        counts[dataset] = counts.get(dataset, 0) + len(lines)
+
+    try:
+        for dataset, records in inventory.items():
+            write(dataset, record_lines(records))
+        for chunk in generator.chunks(start, duration_seconds, endpoint_ips, {}, chunk_seconds):
+            write("network_activity", flow_lines(chunk["network_activity"]))
+            write("ids_alerts", record_lines(chunk["ids_alerts"]))
+            write("honeypot_data", record_lines(chunk["honeypot_data"]))
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    checksums = {}
+    for dataset in counts:
+        digest = hashlib.sha256()
+        with open(os.path.join(directory, f"{dataset}.ndjson"), "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        checksums[dataset] = digest.hexdigest()
+    manifest = {
+        "seed": generator.seed,
+        "scale": generator.scale,
+        "start": start.isoformat(),
+        "duration_seconds": duration_seconds,
+        "chunk_seconds": chunk_seconds,
+        "shape": generator.shape.to_dict(),
+        "counts": counts,
+        "sha256": checksums,
+    }
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+# Streaming into the ingest path
+
+class LineSink:
+    """Newline-delimited output to a UDP/TCP listener or an appended file"""
+
+    # UDP sources split datagrams into lines, so several lines share a datagram up to this size
+    DATAGRAM_BYTES = 8192
+
+    def __init__(self, target: str):
+        self.target = target
+        self._socket = None
+        self._file = None
+        if target.startswith(("udp://", "tcp://")):
+            protocol, _, address = target.partition("://")
+            host, _, port = address.rpartition(":")
+            self._address = (host or "127.0.0.1", int(port))
+            self.protocol = protocol
+            kind = socket.SOCK_DGRAM if protocol == "udp" else socket.SOCK_STREAM
+            self._socket = socket.socket(socket.AF_INET, kind)
+            if protocol == "tcp":
+                self._socket.connect(self._address)
+        else:
+            self.protocol = "file"
+            self._file = open(target, "a", encoding="utf-8")
+
+    def send(self, lines: List[str]):
+        if self._file is not None:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+        elif self.protocol == "tcp":
+            self._socket.sendall(("\n".join(lines) + "\n").encode())
+        else:
+            datagram, size = [], 0
+            for line in lines:
+                encoded = line.encode()
+                if datagram and size + len(encoded) + 1 > self.DATAGRAM_BYTES:
+                    self._socket.sendto(b"\n".join(datagram), self._address)
+                    datagram, size = [], 0
+                datagram.append(encoded)
+                size += len(encoded) + 1
+            if datagram:
+                self._socket.sendto(b"\n".join(datagram), self._address)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._socket is not None:
+            self._socket.close()
+
+
+def stream_dataset(generator: SyntheticGenerator, sink: LineSink, start: datetime, duration_seconds: float,
+                   eps: Optional[float] = None, speed: Optional[float] = None, batch_size: int = 200,
+                   chunk_seconds: int = 60) -> Dict[str, Any]:
+    """Send endpoints, then flows and alerts in time order, paced at ``eps`` events/sec or ``speed`` x real time"""
+    endpoints = build_inventory(generator, start, team=[])["endpoint_telemetry"]
+    endpoint_ips = [endpoint["ip_address"] for endpoint in endpoints]
+    start_ms = _to_ms(start)
+    sent = 0
+    started = time.monotonic()
+
+    def pace(events: int, event_ms: Optional[int]):
+        nonlocal sent
+        sent += events
+        if eps:
+            due = sent / eps
+        elif speed and event_ms is not None:
+            due = (event_ms - start_ms) / 1000 / speed
+        else:
+            return
+        delay = due - (time.monotonic() - started)
+        if delay > 0:
+            time.sleep(delay)
+
+    lines = record_lines(endpoints, kind="endpoint_telemetry")
+    for offset in range(0, len(lines), batch_size):
+        sink.send(lines[offset:offset + batch_size])
+        pace(len(lines[offset:offset + batch_size]), None)
+    for chunk in generator.chunks(start, duration_seconds, endpoint_ips, {}, chunk_seconds,
+                                  datasets=("network_activity", "ids_alerts")):
+        flows, alerts = chunk["network_activity"], chunk["ids_alerts"]
+        # Merge both datasets by event time so the stream reads like live telemetry
+        times = np.concatenate([flows["timestamp"].astype(np.int64),
+                                np.asarray([_to_ms(alert["timestamp"]) for alert in alerts], dtype=np.int64)])
+        lines = flow_lines(flows, kind=True) + record_lines(alerts, kind="ids_alerts")
+        order = np.argsort(times, kind="stable")
+        for offset in range(0, len(order), batch_size):
+            selected = order[offset:offset + batch_size]
+            sink.send([lines[index] for index in selected.tolist()])
+            pace(len(selected), int(times[selected[-1]]))
+    elapsed = time.monotonic() - started
+    return {"events": sent, "seconds": round(elapsed, 3), "events_per_second": round(sent / elapsed, 1) if elapsed else 0.0}
+
+
+def parse_start(value: str) -> datetime:
+    return datetime.now().replace(microsecond=0) if value == "now" else datetime.fromisoformat(value)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on every dataset size and event rate")
+    parser.add_argument("--start", type=parse_start, default=DEFAULT_START,
+                        help=f"ISO start time of the event timeline, or 'now' (default {DEFAULT_START.isoformat()})")
+    parser.add_argument("--duration", type=float, default=600.0, help="simulated seconds of events")
+    parser.add_argument("--chunk-seconds", type=int, default=60)
+    parser.add_argument("--peak-hour", type=float, default=13.0)
+    parser.add_argument("--amplitude", type=float, default=0.6, help="daily swing around the mean rate (0-1)")
+    parser.add_argument("--bursts-per-day", type=float, default=4.0)
+    parser.add_argument("--burst-minutes", type=float, default=5.0)
+    parser.add_argument("--burst-factor", type=float, default=6.0)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="directory for NDJSON files and manifest.json")
+    target.add_argument("--stream", help="udp://host:port, tcp://host:port or a file tailed by the ingest pipeline")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--eps", type=float, help="target events per second when streaming")
+    pacing.add_argument("--speed", type=float, help="replay event times at this multiple of real time when streaming")
+    args = parser.parse_args(argv)
+
+    shape = TrafficShape(args.peak_hour, args.amplitude, args.bursts_per_day, args.burst_minutes, args.burst_factor)
+    generator = SyntheticGenerator(args.seed, args.scale, shape)
+    if args.output:
+        manifest = write_dataset(generator, args.output, args.start, args.duration, args.chunk_seconds)
+        print(json.dumps(manifest, indent=2))
+        return 0
+    sink = LineSink(args.stream)
+    try:
+        stats = stream_dataset(generator, sink, args.start, args.duration, args.eps, args.speed,
+                               chunk_seconds=args.chunk_seconds)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        sink.close()
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,598 @@
+"""Inverted full-text index over free-text alert fields.
+
+IDS alert payloads, live threat descriptions and security event messages are
+tokenized (lowercase alphanumeric runs) into one index. Every document gets
+an increasing integer id, and each term keeps a postings list of
+``doc id << POSITION_BITS | position`` keys, so one list answers both plain
+terms and phrases. Postings are stored as blocks of deltas in the narrowest
+unsigned dtype that holds them, decoded with a single ``cumsum``. Blocks of
+similar size are merged on append, leaving O(log n) blocks per term.
+
+Queries combine words (implicitly AND-ed), ``"quoted phrases"``, ``OR``,
+``NOT``/``-word`` and parentheses::
+
+    ransomware OR "exploit kit" -blocked
+    "10.0.4.17" AND (trojan OR backdoor)
+
+A word with punctuation in it (an address, a technique id) is matched as the
+phrase of its tokens. Matching documents can be restricted to datasets and a
+time range.
+
+The index follows its datasets lazily, like the IP index: ``sync`` indexes
+records appended since the last sync and rebuilds a dataset that was
+replaced or invalidated. ``retain`` drops expired records without a rebuild.
+Removed documents are tombstoned, and once they outnumber the live ones the
+index is compacted and documents are renumbered.
+"""
+
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from soc.alerts import AlertRingBuffer
+
+# Dataset -> (text fields, time field) of the indexed records
+TEXT_FIELDS = {
+    "ids_alerts": (("payload_info",), "timestamp"),
+    "live_threats": (("description",), "last_activity"),
+    "alert_history": (("message",), "timestamp"),
+}
+
+# Low key bits holding a token's position; tokens past the first 2**POSITION_BITS are not indexed
+POSITION_BITS = 8
+MAX_POSITIONS = 1 << POSITION_BITS
+
+# Keys a term buffers unencoded before they are delta-encoded as a block
+BLOCK_MIN = 128
+
+# Terms in at least 1/DENSE_FRACTION of the documents, once there are DENSE_MIN_DOCS, also keep a
+# document bitmap, so AND and NOT against them are lookups instead of decodes
+DENSE_FRACTION = 8
+DENSE_MIN_DOCS = 1 << 16
+
+# Compact once tombstoned documents outnumber live ones and there are at least this many
+COMPACT_MIN_DEAD = 4096
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+_QUERY_TOKEN = re.compile(r'\s*(?:(?P<phrase>"[^"]*"?)|(?P<paren>[()])|(?P<word>[^\s()"]+))')
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def tokenize(text: Any) -> List[str]:
+    """Lowercase alphanumeric tokens of a text value"""
+    if text is None:
+        return []
+    return _TOKEN.findall(str(text).lower())
+
+
+def _delta_dtype(largest: int) -> type:
+    if largest <= 0xFF:
+        return np.uint8
+    if largest <= 0xFFFF:
+        return np.uint16
+    return np.uint32 if largest <= 0xFFFFFFFF else np.uint64
+
+
+def _intersect(a: np.ndarray, b: np.ndarray, universe: int = 0) -> np.ndarray:
+    """Sorted unique values in both sorted unique arrays of ids below ``universe``"""
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    if len(b) * 16 > universe > 0:
+        # A dense list is cheaper to mark in a bitmap than to binary-search into
+        marked = np.zeros(universe, dtype=bool)
+        marked[b] = True
+        return a[marked[a]]
+    positions = np.searchsorted(b, a)
+    positions[positions == len(b)] = 0
+    return a[b[positions] == a]
+
+
+def _difference(a: np.ndarray, b: np.ndarray, universe: int = 0) -> np.ndarray:
+    """Sorted values of a that are not in b, both sorted unique arrays of ids below ``universe``"""
+    if not len(a) or not len(b):
+        return a
+    if len(b) * 16 > universe > 0:
+        marked = np.zeros(universe, dtype=bool)
+        marked[b] = True
+        return a[~marked[a]]
+    positions = np.searchsorted(b, a)
+    positions[positions == len(b)] = 0
+    return a[b[positions] != a]
+
+
+def _key_docs(keys: np.ndarray) -> np.ndarray:
+    """Distinct document ids of sorted postings keys"""
+    docs = keys >> POSITION_BITS
+    if len(docs) > 1:
+        docs = docs[np.concatenate(([True], docs[1:] != docs[:-1]))]
+    return docs
+
+
+class Postings:
+    """A term's sorted keys: delta-encoded blocks followed by a short unencoded tail"""
+
+    __slots__ = ("blocks", "tail", "count")
+
+    def __init__(self):
+        # (first key, last key, deltas after the first key)
+        self.blocks: List[Tuple[int, int, np.ndarray]] = []
+        self.tail: List[int] = []
+        self.count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(deltas.nbytes + 16 for _, _, deltas in self.blocks) + 8 * len(self.tail)
+
+    def extend(self, keys: Union[List[int], np.ndarray]):
+        """Append sorted keys, all greater than the keys already stored"""
+        self.count += len(keys)
+        if len(self.tail) + len(keys) < BLOCK_MIN:
+            self.tail.extend(keys if isinstance(keys, list) else keys.tolist())
+            return
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.tail:
+            keys = np.concatenate([np.asarray(self.tail, dtype=np.int64), keys])
+            self.tail = []
+        deltas = keys[1:] - keys[:-1]
+        self.blocks.append((int(keys[0]), int(keys[-1]), deltas.astype(_delta_dtype(int(deltas.max())))))
+        # Merge while the newest block is at least half the size of the one before it
+        while len(self.blocks) > 1 and len(self.blocks[-1][2]) * 2 >= len(self.blocks[-2][2]):
+            newer, older = self.blocks.pop(), self.blocks.pop()
+            gap = newer[0] - older[1]
+            dtype = max(older[2].dtype, newer[2].dtype, np.dtype(_delta_dtype(gap)), key=lambda dtype: dtype.itemsize)
+            merged = np.empty(len(older[2]) + len(newer[2]) + 1, dtype=dtype)
+            merged[:len(older[2])] = older[2]
+            merged[len(older[2])] = gap
+            merged[len(older[2]) + 1:] = newer[2]
+            self.blocks.append((older[0], newer[1], merged))
+
+    def keys(self) -> np.ndarray:
+        """All keys, decoded"""
+        decoded = []
+        for first, _, deltas in self.blocks:
+            keys = np.empty(len(deltas) + 1, dtype=np.int64)
+            keys[0] = 0
+            np.cumsum(deltas, dtype=np.int64, out=keys[1:])
+            keys += first
+            decoded.append(keys)
+        if self.tail:
+            decoded.append(np.asarray(self.tail, dtype=np.int64))
+        if not decoded:
+            return _EMPTY
+        return decoded[0] if len(decoded) == 1 else np.concatenate(decoded)
+
+
+class _Node:
+    """Parsed query: a term, phrase, AND, OR or NOT"""
+
+    def __init__(self, op: str, tokens: Sequence[str] = (), children: Sequence["_Node"] = ()):
+        self.op = op
+        self.tokens = list(tokens)
+        self.children = list(children)
+
+    def __repr__(self) -> str:
+        if self.op == "term":
+            return self.tokens[0]
+        if self.op == "phrase":
+            return '"' + " ".join(self.tokens) + '"'
+        if self.op == "not":
+            return f"NOT {self.children[0]!r}"
+        return "(" + f" {self.op.upper()} ".join(repr(child) for child in self.children) + ")"
+
+
+class _Parser:
+    """Recursive-descent parser: or := and (OR and)*, and := unary (AND? unary)*, unary := NOT unary | atom"""
+
+    def __init__(self, text: str):
+        self.items = []
+        position = 0
+        text = text.strip()
+        while position < len(text):
+            match = _QUERY_TOKEN.match(text, position)
+            if match is None or match.end() == position:
+                break
+            position = match.end()
+            if match.group("phrase") is not None:
+                self.items.append(("phrase", match.group("phrase").strip('"')))
+            elif match.group("paren") is not None:
+                self.items.append((match.group("paren"), match.group("paren")))
+            else:
+                word = match.group("word")
+                keyword = word.upper()
+                if keyword in ("AND", "OR", "NOT"):
+                    self.items.append((keyword, word))
+                elif word.startswith("-"):
+                    # -word, or - before a quoted phrase or parenthesis
+                    self.items.append(("NOT", "-"))
+                    if len(word) > 1:
+                        self.items.append(("word", word[1:]))
+                else:
+                    self.items.append(("word", word))
+        self.index = 0
+
+    def peek(self) -> Optional[str]:
+        return self.items[self.index][0] if self.index < len(self.items) else None
+
+    def take(self) -> Tuple[str, str]:
+        item = self.items[self.index]
+        self.index += 1
+        return item
+
+    def parse(self) -> _Node:
+        if not self.items:
+            raise ValueError("Empty search")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected {self.items[self.index][1]!r}")
+        return node
+
+    def parse_or(self) -> _Node:
+        children = [self.parse_and()]
+        while self.peek() == "OR":
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else _Node("or", children=children)
+
+    def parse_and(self) -> _Node:
+        children = [self.parse_unary()]
+        while self.peek() not in (None, "OR", ")"):
+            if self.peek() == "AND":
+                self.take()
+            children.append(self.parse_unary())
+        return children[0] if len(children) == 1 else _Node("and", children=children)
+
+    def parse_unary(self) -> _Node:
+        if self.peek() == "NOT":
+            self.take()
+            return _Node("not", children=[self.parse_unary()])
+        if self.peek() is None:
+            raise ValueError("Search ends early")
+        kind, value = self.take()
+        if kind == "(":
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise ValueError("Missing closing parenthesis")
+            self.take()
+            return node
+        if kind in ("phrase", "word"):
+            tokens = tokenize(value)[:MAX_POSITIONS]
+            if not tokens:
+                raise ValueError(f"Nothing to search for in {value!r}")
+            return _Node("term" if len(tokens) == 1 else "phrase", tokens)
+        raise ValueError(f"Unexpected {value!r}")
+
+
+def parse_search(text: str) -> _Node:
+    """Parse a full-text query, raising ValueError with the problem"""
+    return _Parser(text).parse()
+
+
+class TextSearchResult:
+    """Matching documents of a full-text search, decoded newest first a page at a time"""
+
+    def __init__(self, query: _Node, docs: np.ndarray, times: np.ndarray, codes: np.ndarray,
+                 dataset_names: List[str], records: List[Any], terms: Dict[str, int], elapsed_ms: float):
+        self.query = query
+        self.elapsed_ms = elapsed_ms
+        # Postings read per query token, for showing what the search touched
+        self.terms = terms
+        # Ids come out in indexing order, which is time order unless records arrived late
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind="stable")
+            docs, codes = docs[order], codes[order]
+        self.docs = docs
+        self._codes = codes
+        self._dataset_names = dataset_names
+        # The index's document list as of this search; compaction replaces it rather than reordering it
+        self._records = records
+
+    @property
+    def total(self) -> int:
+        return len(self.docs)
+
+    def pages(self, page_size: int) -> int:
+        return max(1, -(-self.total // page_size))
+
+    def counts(self) -> Dict[str, int]:
+        """Matches per dataset"""
+        counts = np.bincount(self._codes, minlength=len(self._dataset_names))
+        return {name: int(count) for name, count in zip(self._dataset_names, counts.tolist()) if count}
+
+    def page(self, number: int, page_size: int = 100) -> pd.DataFrame:
+        """Matching records of a page (1-based), newest first, with their dataset"""
+        stop = self.total - (number - 1) * page_size
+        start = max(0, stop - page_size)
+        rows = []
+        for doc, code in zip(self.docs[start:stop][::-1].tolist(), self._codes[start:stop][::-1].tolist()):
+            record = self._records[doc]
+            # None when the record expired after the search
+            if record is not None:
+                rows.append({"dataset": self._dataset_names[code], **record})
+        return pd.DataFrame(rows)
+
+
+class TextIndex:
+    """Incrementally maintained inverted index over the platform's free-text fields"""
+
+    def __init__(self, fields: Dict[str, Tuple[Tuple[str, ...], str]] = None):
+        self.fields = TEXT_FIELDS if fields is None else fields
+        self.dataset_names = list(self.fields)
+        self._terms: Dict[str, Postings] = {}
+        self._dense: Dict[str, np.ndarray] = {}
+        # Per document id: dataset code, time, liveness and the record itself
+        self._dataset_codes = np.empty(0, dtype=np.uint8)
+        self._times = np.empty(0, dtype="datetime64[ms]")
+        self._alive = np.empty(0, dtype=bool)
+        self._records: List[Any] = []
+        self._dead = 0
+        # Per dataset: (source object, rows indexed) and the document id of each indexed row
+        self._state: Dict[str, Tuple[Any, int]] = {}
+        self._row_docs: Dict[str, np.ndarray] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records) - self._dead
+
+    def invalidate(self, dataset: str):
+        """Force a rebuild, e.g. after records were edited or removed in place"""
+        with self._lock:
+            self._dirty.add(dataset)
+
+    def sync(self, dataset: str, data: Any):
+        """Index records appended to a dataset (a list or the alert ring) since the last sync"""
+        with self._lock:
+            source, indexed = self._state.get(dataset, (None, 0))
+            ring = isinstance(data, AlertRingBuffer)
+            total = data.total_logged if ring else len(data)
+            if dataset in self._dirty or source is not data or indexed > total:
+                self._tombstone(self._row_docs.get(dataset, _EMPTY))
+                self._row_docs[dataset] = _EMPTY
+                self._dirty.discard(dataset)
+                indexed = 0
+            if total > indexed:
+                if ring:
+                    records = data.latest(min(total - indexed, len(data)))
+                else:
+                    records = data[indexed:total]
+                docs = self._add(dataset, records)
+                self._row_docs[dataset] = np.concatenate([self._row_docs[dataset], docs])
+            if ring and len(self._row_docs[dataset]) > len(data):
+                # Events pushed out of the ring leave the index with it
+                evicted = len(self._row_docs[dataset]) - len(data)
+                self._tombstone(self._row_docs[dataset][:evicted])
+                self._row_docs[dataset] = self._row_docs[dataset][evicted:]
+            self._state[dataset] = (data, total)
+            self._maybe_compact()
+
+    def retain(self, dataset: str, previous: List[Any], keep: Sequence[bool], data: List[Any]):
+        """Follow a dataset list replaced by ``data``, the rows of ``previous`` whose keep flag is set"""
+        with self._lock:
+            source, indexed = self._state.get(dataset, (None, 0))
+            if source is not previous or dataset in self._dirty or len(keep) < indexed:
+                # Not what was indexed; the next sync rebuilds
+                return
+            keep = np.asarray(keep, dtype=bool)[:indexed]
+            self._tombstone(self._row_docs[dataset][~keep])
+            self._row_docs[dataset] = self._row_docs[dataset][keep]
+            self._state[dataset] = (data, int(np.count_nonzero(keep)))
+            self._maybe_compact()
+
+    def search(self, query: str, datasets: Optional[Sequence[str]] = None, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> TextSearchResult:
+        """Documents matching a query, optionally within datasets and a time range"""
+        started = time.perf_counter()
+        tree = parse_search(query)
+        with self._lock:
+            terms: Dict[str, int] = {}
+            docs = self._evaluate(tree, terms)
+            docs = docs[self._alive[docs]]
+            codes = self._dataset_codes[docs]
+            if datasets is not None:
+                wanted = [self.dataset_names.index(dataset) for dataset in datasets if dataset in self.fields]
+                keep = np.isin(codes, wanted)
+                docs, codes = docs[keep], codes[keep]
+            times = self._times[docs]
+            if start is not None or end is not None:
+                keep = np.ones(len(docs), dtype=bool)
+                if start is not None:
+                    keep &= times >= np.datetime64(start, "ms")
+                if end is not None:
+                    keep &= times <= np.datetime64(end, "ms")
+                docs, codes, times = docs[keep], codes[keep], times[keep]
+            records = self._records
+        return TextSearchResult(tree, docs, times, codes, self.dataset_names, records, terms,
+                                round((time.perf_counter() - started) * 1000, 3))
+
+    def stats(self) -> Dict[str, Any]:
+        """Document, term and postings sizes, with the encoded size against plain int64 keys"""
+        with self._lock:
+            postings = sum(entry.count for entry in self._terms.values())
+            encoded = sum(entry.nbytes for entry in self._terms.values())
+            return {
+                "documents": len(self._records) - self._dead,
+                "tombstoned": self._dead,
+                "terms": len(self._terms),
+                "postings": postings,
+                "encoded_bytes": encoded,
+                "compression": round(postings * 8 / encoded, 2) if encoded else 0.0,
+                "blocks": sum(len(entry.blocks) for entry in self._terms.values()),
+                "dense_terms": len(self._dense),
+            }
+
+    def _add(self, dataset: str, records: List[Dict[str, Any]]) -> np.ndarray:
+        text_fields, time_field = self.fields[dataset]
+        first = len(self._records)
+        docs = np.arange(first, first + len(records), dtype=np.int64)
+        for token, bitmap in self._dense.items():
+            self._dense[token] = np.concatenate([bitmap, np.zeros(len(records), dtype=bool)])
+        # Group identical texts so a repeated payload is tokenized once and posted as one array
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for position, record in enumerate(records):
+            text = " ".join(str(record.get(field) or "") for field in text_fields) if len(text_fields) > 1 \
+                else record.get(text_fields[0])
+            groups[text].append(position)
+        chunks: Dict[str, List[np.ndarray]] = defaultdict(list)
+        single_tokens: List[str] = []
+        single_keys: List[int] = []
+        for text, positions in groups.items():
+            tokens = tokenize(text)[:MAX_POSITIONS]
+            if len(positions) == 1:
+                base = (first + positions[0]) << POSITION_BITS
+                single_tokens.extend(tokens)
+                single_keys.extend(range(base, base + len(tokens)))
+            else:
+                bases = (first + np.asarray(positions, dtype=np.int64)) << POSITION_BITS
+                for offset, token in enumerate(tokens):
+                    chunks[token].append(bases + offset)
+        if single_tokens:
+            # Texts seen once: factorize their tokens and cut the keys, already ascending, into one run per token
+            codes, tokens = pd.factorize(np.asarray(single_tokens, dtype=object))
+            order = np.argsort(codes, kind="stable")
+            keys = np.asarray(single_keys, dtype=np.int64)[order].tolist()
+            bounds = np.searchsorted(codes[order], np.arange(len(tokens) + 1)).tolist()
+            for code, token in enumerate(tokens.tolist()):
+                run = keys[bounds[code]:bounds[code + 1]]
+                parts = chunks.pop(token, None)
+                if parts:
+                    run = np.sort(np.concatenate(parts + [np.asarray(run, dtype=np.int64)]))
+                self._post(token, run, first + len(records))
+        for token, parts in chunks.items():
+            self._post(token, np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0], first + len(records))
+
+        now = datetime.now()
+        times = [record.get(time_field, now) for record in records]
+        try:
+            times = pd.to_datetime(times).to_numpy(dtype="datetime64[ms]")
+        except (TypeError, ValueError):
+            times = pd.to_datetime(pd.Series(times), errors="coerce", utc=True).dt.tz_localize(None).to_numpy(dtype="datetime64[ms]")
+        self._dataset_codes = np.concatenate([self._dataset_codes, np.full(len(records), self.dataset_names.index(dataset), dtype=np.uint8)])
+        self._times = np.concatenate([self._times, times])
+        self._alive = np.concatenate([self._alive, np.ones(len(records), dtype=bool)])
+        self._records.extend(records)
+        return docs
+
+    def _post(self, token: str, keys: Union[List[int], np.ndarray], total: int):
+        postings = self._terms.setdefault(token, Postings())
+        postings.extend(keys)
+        bitmap = self._dense.get(token)
+        if bitmap is not None:
+            bitmap[np.asarray(keys, dtype=np.int64) >> POSITION_BITS] = True
+        elif total >= DENSE_MIN_DOCS and postings.count * DENSE_FRACTION >= total:
+            bitmap = self._dense[token] = np.zeros(total, dtype=bool)
+            bitmap[postings.keys() >> POSITION_BITS] = True
+
+    def _tombstone(self, docs: np.ndarray):
+        if len(docs):
+            self._alive[docs] = False
+            self._dead += len(docs)
+            for doc in docs.tolist():
+                self._records[doc] = None
+
+    def _maybe_compact(self):
+        if self._dead < max(COMPACT_MIN_DEAD, len(self._records) - self._dead):
+            return
+        # New ids keep the old order, so renumbered postings stay sorted
+        renumber = np.cumsum(self._alive, dtype=np.int64) - 1
+        for token in list(self._terms):
+            keys = self._terms[token].keys()
+            docs = keys >> POSITION_BITS
+            live = self._alive[docs]
+            if not live.any():
+                del self._terms[token]
+                continue
+            postings = Postings()
+            postings.extend((renumber[docs[live]] << POSITION_BITS) | (keys[live] & (MAX_POSITIONS - 1)))
+            self._terms[token] = postings
+        for dataset, docs in self._row_docs.items():
+            self._row_docs[dataset] = renumber[docs]
+        self._dense = {token: bitmap[self._alive] for token, bitmap in self._dense.items()
+                       if token in self._terms and self._terms[token].count * DENSE_FRACTION >= len(self._records) - self._dead}
+        self._dataset_codes = self._dataset_codes[self._alive]
+        self._times = self._times[self._alive]
+        self._records = [record for record, live in zip(self._records, self._alive.tolist()) if live]
+        self._alive = np.ones(len(self._records), dtype=bool)
+        self._dead = 0
+
+    def _keys(self, token: str, terms: Dict[str, int]) -> np.ndarray:
+        postings = self._terms.get(token)
+        terms[token] = postings.count if postings else 0
+        return postings.keys() if postings else _EMPTY
+
+    def _bitmap(self, node: _Node, terms: Dict[str, int]) -> Optional[np.ndarray]:
+        """Document bitmap of a dense single-term node"""
+        if node.op != "term" or node.tokens[0] not in self._dense:
+            return None
+        terms[node.tokens[0]] = self._terms[node.tokens[0]].count
+        return self._dense[node.tokens[0]]
+
+    def _estimate(self, node: _Node) -> int:
+        """Postings a positive node would read, to order AND terms"""
+        if node.op in ("term", "phrase"):
+            return min(self._terms[token].count if token in self._terms else 0 for token in node.tokens)
+        if node.op == "and":
+            return min(self._estimate(child) for child in node.children if child.op != "not") \
+                if any(child.op != "not" for child in node.children) else len(self._records)
+        if node.op == "or":
+            return sum(self._estimate(child) for child in node.children)
+        return len(self._records)
+
+    def _evaluate(self, node: _Node, terms: Dict[str, int]) -> np.ndarray:
+        """Sorted document ids matching a node"""
+        if node.op == "term":
+            bitmap = self._bitmap(node, terms)
+            return _key_docs(self._keys(node.tokens[0], terms)) if bitmap is None else np.flatnonzero(bitmap)
+        if node.op == "phrase":
+            # Align every token's keys on the first token's position, rarest list first
+            order = sorted(range(len(node.tokens)), key=lambda i: self._terms[node.tokens[i]].count
+                           if node.tokens[i] in self._terms else 0)
+            matched = None
+            for index in order:
+                keys = self._keys(node.tokens[index], terms)
+                # Shift each key back to where the phrase would start, dropping keys too early in their document
+                keys = keys[(keys & (MAX_POSITIONS - 1)) >= index] - index
+                matched = keys if matched is None else _intersect(matched, keys)
+                if not len(matched):
+                    break
+            return _key_docs(matched)
+        if node.op == "or":
+            parts = [self._evaluate(child, terms) for child in node.children]
+            if sum(len(part) for part in parts) * 64 < len(self._records):
+                return np.unique(np.concatenate(parts))
+            # Large unions mark a document bitmap instead of sorting
+            marked = np.zeros(len(self._records), dtype=bool)
+            for part in parts:
+                marked[part] = True
+            return np.flatnonzero(marked)
+        if node.op == "not":
+            return _difference(np.flatnonzero(self._alive), self._evaluate(node.children[0], terms), len(self._records))
+        # The rarest positive term sets the candidates; the other terms, then the NOTs, only narrow them
+        children = sorted(node.children, key=lambda child: (child.op == "not", self._estimate(child)))
+        if children[0].op == "not":
+            return self._restrict(node, np.flatnonzero(self._alive), terms)
+        return self._restrict(_Node("and", children=children[1:]), self._evaluate(children[0], terms), terms)
+
+    def _restrict(self, node: _Node, matched: np.ndarray, terms: Dict[str, int]) -> np.ndarray:
+        """The documents of ``matched`` that also match a node, looking dense terms up in their bitmaps"""
+        if not len(matched):
+            return matched
+        bitmap = self._bitmap(node, terms)
+        if bitmap is not None:
+            return matched[bitmap[matched]]
+        if node.op == "and":
+            for child in node.children:
+                matched = self._restrict(child, matched, terms)
+            return matched
+        if node.op == "or":
+            return np.unique(np.concatenate([self._restrict(child, matched, terms) for child in node.children]))
+        if node.op == "not":
+            return _difference(matched, self._restrict(node.children[0], matched, terms))
+        return _intersect(matched, self._evaluate(node, terms), len(self._records))
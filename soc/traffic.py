@@ -0,0 +1,274 @@
+"""Windowed traffic analytics over flow batches.
+
+Flows are folded into one-minute buckets keyed by event time. A bucket holds
+dense per-code byte and session totals for protocol, service and geo (one
+slot per possible code, see ``CATEGORY_LIMITS``) and fixed-size sketches for
+the high-cardinality keys:
+
+* Space-Saving summaries track the heaviest source IPs and destination ports
+  with a bounded number of counters
+* Count-Min sketches estimate any key's weight and, being linear, add up
+  across buckets
+
+Buckets close as the event-time watermark moves past them (tumbling
+windows) and the sliding window is the sum of the most recent buckets. The
+published ``snapshot`` is rebuilt from bucket summaries, never from flows,
+and readers only take the reference.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from soc.flows import CATEGORIES, CATEGORY_LIMITS, int_to_ip
+
+DIMENSIONS = ("protocol", "service", "geo_location")
+_BUCKET_COLUMNS = ("bytes_sent", "bytes_received", "source_ip", "dest_port") + DIMENSIONS
+
+_MINUTE_MS = 60000
+
+
+class CountMinSketch:
+    """Linear frequency sketch over uint64 keys"""
+
+    def __init__(self, width: int = 2048, depth: int = 4, seed: int = 0x50C):
+        if width & (width - 1):
+            raise ValueError("width must be a power of two")
+        self.width = width
+        self.depth = depth
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: odd multipliers, top bits select the column
+        self._multipliers = rng.integers(1, 1 << 63, depth, dtype=np.uint64) | np.uint64(1)
+        self._shift = np.uint64(64 - width.bit_length() + 1)
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, keys: np.ndarray) -> np.ndarray:
+        keys = np.asarray(keys, dtype=np.uint64)
+        return ((self._multipliers[:, None] * keys[None, :]) >> self._shift).astype(np.int64)
+
+    def add(self, keys: np.ndarray, weights: np.ndarray):
+        columns = self._columns(keys)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], weights=weights, minlength=self.width).astype(np.int64)
+
+    def estimate(self, keys: np.ndarray) -> np.ndarray:
+        columns = self._columns(keys)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def merged(self, others: List["CountMinSketch"]) -> "CountMinSketch":
+        """A sketch equal to this one plus others built with the same hashing"""
+        result = CountMinSketch.__new__(CountMinSketch)
+        result.__dict__.update(self.__dict__)
+        result.table = self.table + sum(other.table for other in others) if others else self.table.copy()
+        return result
+
+
+class SpaceSaving:
+    """Top-k summary with at most ``capacity`` counters
+
+    Batches are merged as summaries: a key new to the summary starts from the
+    current minimum counter, which is also its error bound.
+    """
+
+    def __init__(self, capacity: int = 200):
+        self.capacity = capacity
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.errors = np.empty(0, dtype=np.int64)
+
+    def update(self, keys: np.ndarray, weights: np.ndarray):
+        batch_keys, inverse = np.unique(np.asarray(keys, dtype=np.uint64), return_inverse=True)
+        batch_counts = np.bincount(inverse, weights=weights, minlength=len(batch_keys)).astype(np.int64)
+        floor = int(self.counts.min()) if len(self.counts) >= self.capacity else 0
+        all_keys = np.concatenate([self.keys, batch_keys])
+        merged_keys, slots = np.unique(all_keys, return_inverse=True)
+        counts = np.zeros(len(merged_keys), dtype=np.int64)
+        errors = np.zeros(len(merged_keys), dtype=np.int64)
+        known = np.zeros(len(merged_keys), dtype=bool)
+        summary_slots, batch_slots = slots[:len(self.keys)], slots[len(self.keys):]
+        counts[summary_slots] = self.counts
+        errors[summary_slots] = self.errors
+        known[summary_slots] = True
+        counts[batch_slots] += batch_counts
+        counts[~known] += floor
+        errors[~known] = floor
+        if len(merged_keys) > self.capacity:
+            keep = np.argpartition(-counts, self.capacity - 1)[:self.capacity]
+            merged_keys, counts, errors = merged_keys[keep], counts[keep], errors[keep]
+        self.keys, self.counts, self.errors = merged_keys, counts, errors
+
+    def top(self, n: int) -> List[Tuple[int, int, int]]:
+        order = np.argsort(-self.counts, kind="stable")[:n]
+        return list(zip(self.keys[order].tolist(), self.counts[order].tolist(), self.errors[order].tolist()))
+
+
+class TrafficBucket:
+    """Aggregates for one minute of flows"""
+
+    def __init__(self, minute: int, sketch_width: int, summary_capacity: int):
+        self.minute = minute
+        self.bytes = {name: np.zeros(CATEGORY_LIMITS[name], dtype=np.int64) for name in DIMENSIONS}
+        self.sessions = {name: np.zeros(CATEGORY_LIMITS[name], dtype=np.int64) for name in DIMENSIONS}
+        self.talkers = SpaceSaving(summary_capacity)
+        self.ports = SpaceSaving(summary_capacity)
+        self.talker_sketch = CountMinSketch(sketch_width)
+        self.port_sketch = CountMinSketch(sketch_width)
+
+    def add(self, columns: Dict[str, np.ndarray]):
+        total_bytes = columns["bytes_sent"].astype(np.int64) + columns["bytes_received"]
+        ones = np.ones(len(total_bytes), dtype=np.int64)
+        for name in DIMENSIONS:
+            self.bytes[name] += np.bincount(columns[name], weights=total_bytes, minlength=CATEGORY_LIMITS[name]).astype(np.int64)
+            self.sessions[name] += np.bincount(columns[name], minlength=CATEGORY_LIMITS[name])
+        self.talkers.update(columns["source_ip"], total_bytes)
+        self.talker_sketch.add(columns["source_ip"], total_bytes)
+        self.ports.update(columns["dest_port"], ones)
+        self.port_sketch.add(columns["dest_port"], ones)
+
+    @property
+    def total_bytes(self) -> int:
+        return int(self.bytes["protocol"].sum())
+
+    @property
+    def total_sessions(self) -> int:
+        return int(self.sessions["protocol"].sum())
+
+
+class TrafficAnalytics:
+    """Tumbling one-minute buckets and a sliding window over the latest of them"""
+
+    def __init__(self, window_minutes: int = 15, retain_minutes: int = 60, top_k: int = 10,
+                 sketch_width: int = 2048, summary_capacity: int = 200, publish_interval: float = 1.0):
+        self.window_minutes = window_minutes
+        self.retain_minutes = max(retain_minutes, window_minutes)
+        self.top_k = top_k
+        self.sketch_width = sketch_width
+        self.summary_capacity = summary_capacity
+        self.publish_interval = publish_interval
+        self._buckets: Dict[int, TrafficBucket] = {}
+        self._watermark: Optional[int] = None
+        self._published_at = 0.0
+        self._lock = threading.Lock()
+        self.closed: deque = deque(maxlen=self.retain_minutes)
+        self.late_flows = 0
+        self.snapshot: Dict[str, Any] = self._empty_snapshot()
+
+    def reset(self):
+        with self._lock:
+            self._buckets = {}
+            self._watermark = None
+            self.closed.clear()
+            self.late_flows = 0
+            self.snapshot = self._empty_snapshot()
+
+    def add_batch(self, columns: Dict[str, np.ndarray]):
+        """Fold a flow column batch into its minute buckets"""
+        if not len(columns["timestamp"]):
+            return
+        minutes = columns["timestamp"].astype("datetime64[ms]").astype(np.int64) // _MINUTE_MS
+        with self._lock:
+            latest = int(minutes.max())
+            advanced = self._watermark is None or latest > self._watermark
+            if advanced:
+                self._advance(latest)
+            oldest = self._watermark - self.retain_minutes + 1
+            unique_minutes, inverse = np.unique(minutes, return_inverse=True)
+            for index, minute in enumerate(unique_minutes.tolist()):
+                rows = np.flatnonzero(inverse == index)
+                if minute < oldest:
+                    self.late_flows += len(rows)
+                    continue
+                bucket = self._buckets.get(minute)
+                if bucket is None:
+                    bucket = self._buckets[minute] = TrafficBucket(minute, self.sketch_width, self.summary_capacity)
+                bucket.add(columns if len(unique_minutes) == 1 else {name: columns[name][rows] for name in _BUCKET_COLUMNS})
+            if advanced or time.monotonic() - self._published_at >= self.publish_interval:
+                self._publish()
+
+    def _advance(self, latest: int):
+        """Move the watermark, emit closed minutes and drop expired buckets"""
+        previous = self._watermark
+        self._watermark = latest
+        if previous is not None:
+            for minute in range(max(previous, latest - self.retain_minutes), latest):
+                bucket = self._buckets.get(minute)
+                if bucket is not None:
+                    self.closed.append(self._bucket_row(bucket))
+        oldest = latest - self.retain_minutes + 1
+        for minute in [minute for minute in self._buckets if minute < oldest]:
+            del self._buckets[minute]
+
+    @staticmethod
+    def _bucket_row(bucket: TrafficBucket) -> Dict[str, Any]:
+        return {
+            "minute": np.datetime64(bucket.minute, "m"),
+            "bytes": bucket.total_bytes,
+            "sessions": bucket.total_sessions,
+        }
+
+    def _publish(self):
+        """Rebuild the snapshot from bucket summaries and swap it in"""
+        start = self._watermark - self.window_minutes + 1
+        window = [bucket for minute, bucket in sorted(self._buckets.items()) if minute >= start]
+        snapshot = self._empty_snapshot()
+        if window:
+            snapshot["window_start"] = np.datetime64(window[0].minute, "m")
+            snapshot["window_end"] = np.datetime64(self._watermark + 1, "m")
+            for name in DIMENSIONS:
+                labels = CATEGORIES[name]
+                byte_totals = sum(bucket.bytes[name] for bucket in window)
+                session_totals = sum(bucket.sessions[name] for bucket in window)
+                snapshot["by_" + name] = [
+                    {name: labels[code], "bytes": int(byte_totals[code]), "sessions": int(session_totals[code])}
+                    for code in np.flatnonzero(session_totals).tolist() if code < len(labels)
+                ]
+            snapshot["bytes"] = sum(bucket.total_bytes for bucket in window)
+            snapshot["sessions"] = sum(bucket.total_sessions for bucket in window)
+            snapshot["top_talkers"] = [
+                {"source_ip": int_to_ip(key), "bytes": estimate}
+                for key, estimate in self._top(window, "talkers", "talker_sketch")
+            ]
+            snapshot["top_ports"] = [
+                {"dest_port": key, "sessions": estimate}
+                for key, estimate in self._top(window, "ports", "port_sketch")
+            ]
+        snapshot["per_minute"] = [self._bucket_row(bucket) for _, bucket in sorted(self._buckets.items())]
+        snapshot["watermark"] = None if self._watermark is None else np.datetime64(self._watermark, "m")
+        self.snapshot = snapshot
+        self._published_at = time.monotonic()
+
+    def _top(self, window: List[TrafficBucket], summary: str, sketch: str) -> List[Tuple[int, int]]:
+        """Heavy hitters over the window: Space-Saving candidates ranked by the summed Count-Min estimate"""
+        candidates = np.unique(np.concatenate([getattr(bucket, summary).keys for bucket in window]))
+        if not len(candidates):
+            return []
+        first = getattr(window[0], sketch)
+        estimates = first.merged([getattr(bucket, sketch) for bucket in window[1:]]).estimate(candidates)
+        order = np.argsort(-estimates, kind="stable")[:self.top_k]
+        return list(zip(candidates[order].tolist(), estimates[order].tolist()))
+
+    def _empty_snapshot(self) -> Dict[str, Any]:
+        snapshot = {
+            "window_minutes": self.window_minutes,
+            "window_start": None,
+            "window_end": None,
+            "watermark": None,
+            "bytes": 0,
+            "sessions": 0,
+            "top_talkers": [],
+            "top_ports": [],
+            "per_minute": [],
+        }
+        for name in DIMENSIONS:
+            snapshot["by_" + name] = []
+        return snapshot
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate sketch memory, independent of how many distinct keys were seen"""
+        per_bucket = 2 * 4 * self.sketch_width * 8 + 2 * 3 * self.summary_capacity * 8 + 2 * sum(CATEGORY_LIMITS[name] for name in DIMENSIONS) * 8
+        return per_bucket * len(self._buckets)
+
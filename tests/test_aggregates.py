@@ -0,0 +1,163 @@
+"""Incremental aggregates agree with the full-scan formulas they replaced."""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.aggregates import PlatformAggregates
+
+
+def full_scan_kpis(platform):
+    """KPI tile values as the dashboard computed them before aggregates"""
+    return {
+        "critical_threats": len([t for t in platform.live_threats if t.get("severity") == "Critical"]),
+        "active_incidents": len([t for t in platform.live_threats if t.get("status") == "Active"]),
+        "endpoints_at_risk": len([e for e in platform.endpoint_telemetry if e.get("risk_score", 0) > 70]),
+        "open_vulnerabilities": sum([asset.get("vulnerabilities", 0) for asset in platform.cloud_assets + platform.iot_devices]),
+    }
+
+
+def full_scan_risk_score(platform) -> float:
+    """Enterprise risk score as calculate_enterprise_risk_score computed it by rescanning"""
+    critical_threats = len([t for t in platform.live_threats if t.get("severity") == "Critical"])
+    high_threats = len([t for t in platform.live_threats if t.get("severity") == "High"])
+    active_incidents = len([t for t in platform.live_threats if t.get("status") == "Active"])
+    system_health_score = sum([health.get("performance", 0) for health in platform.system_health.values()]) / len(platform.system_health)
+    compliance_score = sum([framework.get("score", 0) for framework in platform.compliance_data.values()]) / len(platform.compliance_data)
+    score = 100
+    score -= (critical_threats * 8) + (high_threats * 4) + (active_incidents * 3)
+    score -= (100 - system_health_score) * 0.1
+    score -= (100 - compliance_score) * 0.1
+    return max(0, min(100, score))
+
+
+def incremental_kpis(platform):
+    return {
+        "critical_threats": platform.aggregates.get("live_threats", "critical_threats"),
+        "active_incidents": platform.aggregates.get("live_threats", "active_incidents"),
+        "endpoints_at_risk": platform.aggregates.get("endpoint_telemetry", "endpoints_at_risk"),
+        "open_vulnerabilities": platform.aggregates.total("open_vulnerabilities"),
+    }
+
+
+def assert_matches_full_scan(platform):
+    assert incremental_kpis(platform) == full_scan_kpis(platform)
+    assert platform.calculate_enterprise_risk_score()[2] == full_scan_risk_score(platform)
+
+
+def random_threat(rng):
+    return {
+        "type": rng.choice(["Ransomware", "Phishing", "C2 Beacon"]),
+        "severity": rng.choice(["Critical", "High", "Medium", "Low"]),
+        "status": rng.choice(["Active", "Contained", "Investigating"]),
+        "source_ip": f"203.0.113.{rng.randint(1, 254)}",
+        "source_country": "NL",
+        "confidence": rng.randint(50, 99),
+    }
+
+
+@pytest.fixture
+def platform(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SOC_DATA_SCALE", "0.05")
+    import app
+    return app.EnterpriseSOCPlatform()
+
+
+def test_generated_datasets_match_full_scan(platform):
+    platform.materialize("live_threats", "endpoint_telemetry", "cloud_assets", "iot_devices", "compliance_data")
+    assert_matches_full_scan(platform)
+
+
+def test_add_update_remove_sequence_matches_full_scan(platform):
+    rng = random.Random(7)
+    platform.materialize("live_threats", "endpoint_telemetry", "cloud_assets", "iot_devices", "compliance_data")
+    for step in range(200):
+        action = rng.random()
+        if action < 0.4 or not platform.live_threats:
+            platform.add_record("live_threats", random_threat(rng))
+        elif action < 0.7:
+            platform.update_record("live_threats", rng.choice(platform.live_threats),
+                                   severity=rng.choice(["Critical", "High", "Low"]),
+                                   status=rng.choice(["Active", "Contained"]))
+        elif action < 0.85:
+            platform.remove_record("live_threats", rng.choice(platform.live_threats))
+        elif platform.endpoint_telemetry:
+            platform.update_record("endpoint_telemetry", rng.choice(platform.endpoint_telemetry),
+                                   risk_score=rng.randint(0, 100))
+        if step % 20 == 0:
+            dataset = rng.choice(["cloud_assets", "iot_devices"])
+            if getattr(platform, dataset):
+                platform.update_record(dataset, rng.choice(getattr(platform, dataset)),
+                                       vulnerabilities=rng.randint(0, 12))
+        assert_matches_full_scan(platform)
+
+
+def test_system_health_updates_match_full_scan(platform):
+    rng = random.Random(11)
+    platform.materialize("live_threats", "endpoint_telemetry", "cloud_assets", "iot_devices", "compliance_data")
+    systems = list(platform.system_health)
+    for _ in range(100):
+        platform.update_system_health(rng.choice(systems), performance=round(rng.uniform(40, 100), 1))
+        assert_matches_full_scan(platform)
+    platform.update_system_health("new_collector", performance=55.5, status="online")
+    assert_matches_full_scan(platform)
+
+
+def test_rebuild_after_regeneration_matches_full_scan(platform):
+    rng = random.Random(3)
+    platform.materialize("live_threats", "endpoint_telemetry", "cloud_assets", "iot_devices", "compliance_data")
+    for _ in range(30):
+        platform.add_record("live_threats", random_threat(rng))
+    platform.generate_enterprise_data()
+    assert_matches_full_scan(platform)
+    platform.add_record("live_threats", random_threat(rng))
+    platform.remove_record("live_threats", platform.live_threats[0])
+    assert_matches_full_scan(platform)
+
+
+def test_counters_and_group_mean_track_rescan():
+    rng = random.Random(5)
+    aggregates = PlatformAggregates()
+    threats = []
+    health = {}
+    for _ in range(500):
+        action = rng.random()
+        if action < 0.4 or not threats:
+            threat = random_threat(rng)
+            threats.append(threat)
+            aggregates.add("live_threats", threat)
+        elif action < 0.7:
+            threat = rng.choice(threats)
+            before = dict(threat)
+            threat.update(severity=rng.choice(["Critical", "High", "Low"]), status=rng.choice(["Active", "Closed"]))
+            aggregates.update("live_threats", before, threat)
+        elif action < 0.85:
+            threat = threats.pop(rng.randrange(len(threats)))
+            aggregates.remove("live_threats", threat)
+        else:
+            system = f"system-{rng.randint(0, 9)}"
+            health[system] = round(rng.uniform(0, 100), 2)
+            aggregates.set_group_value("system_health", system, health[system])
+        assert aggregates.get("live_threats", "critical_threats") == len([t for t in threats if t["severity"] == "Critical"])
+        assert aggregates.get("live_threats", "high_threats") == len([t for t in threats if t["severity"] == "High"])
+        assert aggregates.get("live_threats", "active_incidents") == len([t for t in threats if t["status"] == "Active"])
+        if health:
+            assert aggregates.group_mean("system_health") == sum([value for value in health.values()]) / len(health)
+    aggregates.rebuild("live_threats", threats[:10])
+    assert aggregates.get("live_threats", "critical_threats") == len([t for t in threats[:10] if t["severity"] == "Critical"])
+
+
+def test_set_group_value_noop_keeps_version():
+    aggregates = PlatformAggregates()
+    aggregates.set_group("compliance", {"SOC 2": 90, "ISO 27001": 80})
+    version = aggregates.version
+    aggregates.set_group_value("compliance", "SOC 2", 90)
+    assert aggregates.version == version
+    aggregates.set_group_value("compliance", "SOC 2", 70)
+    assert aggregates.version == version + 1
+    assert aggregates.group_mean("compliance") == 75
@@ -0,0 +1,79 @@
+"""Per-host anomaly baselines: cold start, host baselines and the host cap."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.anomaly import HostBaselines
+
+START = np.datetime64("2024-01-01T12:00:00", "ms")
+
+
+def host(index):
+    """10.0.x.y address of the index-th internal host"""
+    return (np.uint32(10 << 24) + np.asarray(index, dtype=np.uint32)).astype(np.uint32)
+
+
+def flow_batch(rng, size: int, hosts: int = 200, offset_minutes: int = 0):
+    """Ordinary traffic from ``hosts`` internal sources over ten minutes"""
+    return {
+        "timestamp": START + np.timedelta64(offset_minutes, "m") + rng.integers(0, 600_000, size).astype("timedelta64[ms]"),
+        "source_ip": host(rng.integers(1, hosts + 1, size)),
+        "bytes_sent": rng.integers(10_000, 20_000, size).astype(np.uint32),
+        "bytes_received": rng.integers(5_000, 10_000, size).astype(np.uint32),
+        "duration_seconds": rng.integers(10, 20, size).astype(np.uint16),
+    }
+
+
+def test_seeded_outlier_in_first_batch_is_flagged():
+    rng = np.random.default_rng(1)
+    batch = flow_batch(rng, 50_000)
+    batch["bytes_sent"][1234] = 3_000_000_000
+    baselines = HostBaselines()
+    threat_score, flagged = baselines.score(batch)
+    assert flagged[1234]
+    assert threat_score[1234] >= 70
+    assert np.count_nonzero(flagged) == 1
+    assert baselines.flows_flagged == 1
+
+
+def test_warm_host_is_scored_against_its_own_baseline():
+    rng = np.random.default_rng(2)
+    baselines = HostBaselines()
+    heavy = host(7)
+    for minute in range(0, 60, 10):
+        batch = flow_batch(rng, 5_000, offset_minutes=minute)
+        # One backup server routinely sends a hundred times what the rest of the fleet does
+        from_heavy = batch["source_ip"] == heavy
+        batch["bytes_sent"][from_heavy] = rng.integers(1_000_000, 2_000_000, np.count_nonzero(from_heavy))
+        baselines.score(batch)
+    batch = flow_batch(rng, 1_000, offset_minutes=60)
+    batch["source_ip"][:2] = [heavy, host(8)]
+    batch["bytes_sent"][:2] = 1_500_000
+    _, flagged = baselines.score(batch)
+    assert not flagged[0]
+    assert flagged[1]
+
+
+def test_small_first_batches_wait_for_warmup():
+    rng = np.random.default_rng(3)
+    baselines = HostBaselines(warmup=100)
+    batch = flow_batch(rng, 10)
+    batch["bytes_sent"][0] = 3_000_000_000
+    threat_score, flagged = baselines.score(batch)
+    assert not flagged.any() and not threat_score.any()
+    baselines.score(flow_batch(rng, 200))
+    assert baselines.flows_scored == 210
+
+
+def test_hosts_past_the_cap_are_scored_globally():
+    rng = np.random.default_rng(4)
+    baselines = HostBaselines(max_hosts=50)
+    batch = flow_batch(rng, 20_000, hosts=1_000)
+    batch["bytes_sent"][-1] = 3_000_000_000
+    _, flagged = baselines.score(batch)
+    assert len(baselines) == 50
+    assert flagged[-1]
@@ -0,0 +1,32 @@
+"""Authentication: scrypt security floor, logins and lockout."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.auth import SCRYPT_MIN_N, AuthService
+
+
+def test_cost_below_the_security_floor_is_refused():
+    with pytest.raises(ValueError):
+        AuthService(workers=1, n=SCRYPT_MIN_N // 2)
+
+
+def test_logins_lockout_and_burst_estimate():
+    service = AuthService(workers=1, user_limit=2)
+    try:
+        service.register("analyst", "correct horse")
+        assert service.authenticate("analyst", "correct horse", "10.0.0.1") == "ok"
+        assert service.authenticate("ghost", "anything", "10.0.0.1") == "invalid"
+        assert service.authenticate("analyst", "wrong", "10.0.0.1") == "invalid"
+        assert service.authenticate("analyst", "wrong", "10.0.0.1") == "locked"
+        assert service.authenticate("analyst", "correct horse", "10.0.0.2") == "locked"
+        assert service.n >= SCRYPT_MIN_N
+        # One worker queues the whole burst: the estimate is linear in its size
+        assert service.burst_seconds(10) == pytest.approx(10 * service.burst_seconds(1))
+        assert service.burst_seconds(1) > 0
+    finally:
+        service.shutdown()
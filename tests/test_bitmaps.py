@@ -0,0 +1,84 @@
+"""Roaring bitmaps against NumPy set operations, over sparse and dense chunks."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc import bitmaps
+from soc.bitmaps import ARRAY_MAX, CHUNK_SIZE, RoaringBitmap
+
+
+def random_ids(rng) -> np.ndarray:
+    """Ids spread over a few chunks, each sparse (array container) or dense (bitset)"""
+    parts = []
+    for key in rng.choice(8, size=rng.integers(1, 6), replace=False):
+        count = int(rng.choice([rng.integers(1, ARRAY_MAX), rng.integers(ARRAY_MAX + 1, CHUNK_SIZE)]))
+        parts.append(int(key) * CHUNK_SIZE + rng.choice(CHUNK_SIZE, size=count, replace=False))
+    return np.concatenate(parts).astype(np.uint32)
+
+
+@pytest.fixture(params=["native", "table"])
+def popcount(request, monkeypatch):
+    """Run every check with NumPy's popcount and with the NumPy < 2.0 fallback"""
+    if request.param == "native" and not hasattr(np, "bitwise_count"):
+        pytest.skip("np.bitwise_count needs NumPy 2.0")
+    monkeypatch.setattr(bitmaps, "_popcount", getattr(bitmaps, f"_popcount_{request.param}"))
+
+
+def test_popcount_fallback_matches_bit_count():
+    words = np.random.default_rng(0).integers(0, 2**64, 1024, dtype=np.uint64)
+    expected = sum(bin(int(word)).count("1") for word in words)
+    assert bitmaps._popcount_table(words) == expected
+    assert bitmaps._popcount_table(words[::3]) == sum(bin(int(word)).count("1") for word in words[::3])
+
+
+def test_operations_match_numpy_sets(popcount):
+    rng = np.random.default_rng(42)
+    for _ in range(15):
+        left, right = random_ids(rng), random_ids(rng)
+        a, b = RoaringBitmap.from_ids(left), RoaringBitmap.from_ids(right)
+        assert np.array_equal(a.to_array(), np.unique(left))
+        assert len(a) == len(np.unique(left))
+        assert np.array_equal((a & b).to_array(), np.intersect1d(left, right))
+        assert np.array_equal((a | b).to_array(), np.union1d(left, right))
+        assert np.array_equal((a - b).to_array(), np.setdiff1d(left, right))
+        assert a.intersection_len(b) == len(np.intersect1d(left, right))
+        assert len(a - b) == len(np.setdiff1d(left, right))
+        # Operations return new bitmaps and leave their operands alone
+        assert np.array_equal(a.to_array(), np.unique(left))
+
+
+def test_union_and_add_many_match_numpy(popcount):
+    rng = np.random.default_rng(7)
+    for _ in range(5):
+        parts = [random_ids(rng) for _ in range(rng.integers(2, 6))]
+        merged = RoaringBitmap.union(RoaringBitmap.from_ids(part) for part in parts)
+        assert np.array_equal(merged.to_array(), np.unique(np.concatenate(parts)))
+
+        bitmap = RoaringBitmap.from_ids(parts[0])
+        shared = bitmap.containers.copy()
+        for part in parts[1:]:
+            # Unsorted, duplicated and appended-above-max ids all go through add_many
+            bitmap.add_many(np.concatenate([part, part[:10]])[rng.permutation(len(part) + 10)])
+        bitmap.add_many(np.arange(8 * CHUNK_SIZE, 8 * CHUNK_SIZE + 100, dtype=np.uint32))
+        expected = np.union1d(np.concatenate(parts), np.arange(8 * CHUNK_SIZE, 8 * CHUNK_SIZE + 100))
+        assert np.array_equal(bitmap.to_array(), expected)
+        assert len(bitmap) == len(expected)
+        # add_many copies containers it changes, so bitmaps sharing them are unaffected
+        assert np.array_equal(RoaringBitmap(shared).to_array(), np.unique(parts[0]))
+
+
+def test_containers_switch_kind_at_array_max(popcount):
+    dense = RoaringBitmap.from_ids(np.arange(ARRAY_MAX + 1))
+    assert dense.containers[0].dtype == np.uint64
+    thinned = dense - RoaringBitmap.from_ids(np.arange(10))
+    assert thinned.containers[0].dtype == np.uint16
+    assert len(thinned) == ARRAY_MAX - 9
+    full = RoaringBitmap.from_ids(np.arange(2 * CHUNK_SIZE, 3 * CHUNK_SIZE))
+    assert full.full_chunks() == [2]
+    emptied = full - full
+    assert not emptied and len(emptied) == 0
@@ -0,0 +1,89 @@
+"""HyperLogLog distinct counts: accuracy, merging and the bucketed tracker."""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.cardinality import CardinalityTracker, HyperLogLog
+
+START = datetime(2024, 1, 1, 12)
+# Standard error of a 2**13-register counter is 1.04 / sqrt(8192), about 1.15%
+TOLERANCE = 0.04
+
+
+def test_ranks_match_the_first_set_bit_after_the_index():
+    rng = np.random.default_rng(1)
+    hashes = np.concatenate([rng.integers(0, 2**64, 1000, dtype=np.uint64),
+                             np.asarray([0, 1, 2**51, 2**64 - 1], dtype=np.uint64)])
+    index, rank = HyperLogLog.positions(hashes, 13)
+    for value, got_index, got_rank in zip(hashes.tolist(), index.tolist(), rank.tolist()):
+        rest = (value << 13) & (2**64 - 1)
+        expected = next((bit + 1 for bit in range(51) if rest & (1 << (63 - bit))), 52)
+        assert (got_index, got_rank) == (value >> 51, expected)
+
+
+@pytest.mark.parametrize("distinct", [0, 1, 50, 5000, 200000, 1000000])
+def test_estimates_stay_within_a_few_standard_errors(distinct):
+    counter = HyperLogLog()
+    values = np.arange(distinct, dtype=np.int64) * 7919
+    counter.add(values)
+    # Repeats never move the estimate
+    counter.add(values[:distinct // 2])
+    estimate = counter.estimate()
+    assert abs(estimate - distinct) <= max(1, TOLERANCE * distinct)
+
+
+def test_merge_and_union_equal_counting_the_combined_set():
+    rng = np.random.default_rng(2)
+    parts = [rng.integers(0, 300000, 100000) for _ in range(4)]
+    counters = []
+    for part in parts:
+        counter = HyperLogLog()
+        counter.add(part)
+        counters.append(counter)
+    combined = HyperLogLog()
+    combined.add(np.concatenate(parts))
+    assert np.array_equal(HyperLogLog.union(counters).registers, combined.registers)
+    merged = HyperLogLog()
+    for counter in reversed(counters):
+        merged.merge(counter)
+    assert np.array_equal(merged.registers, combined.registers)
+    distinct = len(np.unique(np.concatenate(parts)))
+    assert abs(merged.estimate() - distinct) <= TOLERANCE * distinct
+    assert HyperLogLog.union([]).estimate() == 0
+
+
+def test_string_and_integer_values_count_alike():
+    counter = HyperLogLog()
+    counter.add(np.asarray([f"10.0.{index // 250}.{index % 250}" for index in range(20000)], dtype=object))
+    assert abs(counter.estimate() - 20000) <= TOLERANCE * 20000
+
+
+def test_tracker_windows_breakdowns_and_retention():
+    tracker = CardinalityTracker(bucket_minutes=10, retain_hours=1, tracked={"ids_alerts": (("source_ip",), ("sensor_location",))})
+    records = []
+    for minute in range(60):
+        for index in range(100):
+            records.append({"timestamp": START + timedelta(minutes=minute), "source_ip": f"203.0.{minute}.{index}",
+                            "sensor_location": "DMZ" if index < 30 else "Core"})
+    tracker.add_records("ids_alerts", records)
+    assert abs(tracker.count("ids_alerts", "source_ip") - 6000) <= TOLERANCE * 6000
+    # Buckets are ten minutes wide, so this window covers minutes 10-29
+    window = tracker.count("ids_alerts", "source_ip", start=START + timedelta(minutes=10), end=START + timedelta(minutes=25))
+    assert abs(window - 2000) <= TOLERANCE * 2000
+    breakdown = tracker.breakdown("ids_alerts", "source_ip", "sensor_location")
+    assert set(breakdown) == {"DMZ", "Core"}
+    assert abs(breakdown["DMZ"] - 1800) <= TOLERANCE * 1800
+    assert abs(tracker.count("ids_alerts", "source_ip", dimension="sensor_location", value="Core") - 4200) <= TOLERANCE * 4200
+
+    # Single records queue until the next query; buckets older than an hour are dropped
+    tracker.add_record("ids_alerts", {"timestamp": START + timedelta(minutes=95), "source_ip": "198.51.100.1",
+                                      "sensor_location": "DMZ"})
+    assert tracker.count("ids_alerts", "source_ip", start=START + timedelta(minutes=90)) == 1
+    assert tracker.count("ids_alerts", "source_ip", end=START + timedelta(minutes=39)) == 0
+    assert abs(tracker.count("ids_alerts", "source_ip") - 2001) <= TOLERANCE * 2001
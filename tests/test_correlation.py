@@ -0,0 +1,71 @@
+"""Alert correlation: incidents follow the alert window and close once idle."""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.correlation import CorrelationEngine
+
+START = datetime(2024, 1, 1, 12)
+ENDPOINT = {"endpoint_id": "EP-1", "hostname": "WS-1", "ip_address": "10.0.0.5"}
+THREAT = {"threat_id": "THR-1", "type": "APT", "severity": "High", "mitre_techniques": ["T1059"]}
+
+
+def alert(index: int, minutes: float, technique: str = "T1059"):
+    return {"alert_id": f"ALT-{index}", "timestamp": START + timedelta(minutes=minutes), "dest_ip": "10.0.0.5",
+            "source_ip": f"203.0.113.{index % 250}", "mitre_technique": technique, "severity": "Medium",
+            "attack_type": "Command Injection"}
+
+
+def engine(**options):
+    events = []
+    correlator = CorrelationEngine(lambda incident, is_new: events.append((incident, is_new)), **options)
+    correlator.load_endpoints([ENDPOINT])
+    correlator.load_threats([THREAT])
+    return correlator, events
+
+
+def test_incident_membership_follows_the_window():
+    correlator, events = engine(window=timedelta(hours=1))
+    correlator.on_alerts([alert(index, minutes=index) for index in range(30)])
+    incident = events[0][0]
+    assert [is_new for _, is_new in events].count(True) == 1
+    assert incident["alert_count"] == 30 and len(incident["alert_ids"]) == 30
+
+    # Ninety minutes in, the first thirty minutes of alerts have left the window
+    correlator.on_alert(alert(30, minutes=90))
+    assert incident["status"] == "Open"
+    assert incident["alert_count"] == 31
+    assert "ALT-0" not in correlator._incident_alerts[("EP-1", "T1059")]
+    assert set(incident["alert_ids"]) == correlator._incident_alerts[("EP-1", "T1059")]
+
+
+def test_idle_incidents_close_and_a_new_alert_reopens():
+    correlator, events = engine(window=timedelta(hours=1))
+    correlator.on_alerts([alert(index, minutes=index) for index in range(5)])
+    incident = events[0][0]
+    correlator.expire(START + timedelta(hours=2))
+    assert incident["status"] == "Closed"
+    assert not correlator._open_incidents and not correlator._incident_alerts and not correlator._alert_incidents
+    assert correlator.window_alerts == 0
+
+    correlator.on_alert(alert(5, minutes=130))
+    reopened = events[-1][0]
+    assert events[-1][1] and reopened is not incident
+    assert reopened["alert_ids"] == ["ALT-5"]
+
+
+def test_state_stays_bounded_under_a_long_running_incident():
+    correlator, events = engine(window_size=50)
+    for index in range(5000):
+        correlator.on_alert(alert(index, minutes=index / 60))
+    incident = events[0][0]
+    assert incident["alert_count"] == 5000
+    assert len(correlator._incident_alerts[("EP-1", "T1059")]) == 50
+    assert len(incident["alert_ids"]) <= 2 * 50 + 1
+    assert len(correlator._alert_incidents) == 50
+    # An unrelated technique never joins a threat, so it opens nothing
+    correlator.on_alert(alert(5000, minutes=90, technique="T1003"))
+    assert len(correlator._open_incidents) == 1
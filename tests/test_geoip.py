@@ -0,0 +1,88 @@
+"""Geo enrichment against a database with a full country list."""
+
+import csv
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.flows import CATEGORIES, FLOW_SCHEMA, FlowTable, flows_from_records, int_to_ip
+from soc.geoip import GeoEnricher, open_database
+from soc.ingest import IngestMetrics
+from soc.store import flow_columns_from_arrow, flow_table_to_arrow
+from soc.traffic import TrafficAnalytics
+
+# About as many countries as a commercial range database carries
+COUNTRY_COUNT = 250
+
+
+@pytest.fixture(scope="module")
+def database_csv(tmp_path_factory):
+    """Ten ranges per country, spread over the public 1.0.0.0-223.255.255.255 space"""
+    path = tmp_path_factory.mktemp("geo") / "ranges.csv"
+    starts = np.linspace(1 << 24, 224 << 24, COUNTRY_COUNT * 10 + 1, dtype=np.int64)
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["start_ip", "end_ip", "country_code", "asn", "organization"])
+        for index, (start, end) in enumerate(zip(starts[:-1], starts[1:] - 1)):
+            writer.writerow([int(start), int(end), f"C{index % COUNTRY_COUNT:03d}", 64512 + index, f"Org {index}"])
+    return str(path)
+
+
+def range_midpoints(database):
+    return ((database.starts.astype(np.uint64) + database.ends) // 2).astype(np.uint32)
+
+
+def test_location_codes_cover_every_country(database_csv):
+    database = open_database(database_csv)
+    assert len(database.country_labels) == COUNTRY_COUNT
+    enricher = GeoEnricher(database)
+    keys = range_midpoints(database)
+    codes = enricher.location_codes(keys)
+    assert codes.dtype == FLOW_SCHEMA["geo_location"]
+    labels = CATEGORIES["geo_location"]
+    assert [labels[code] for code in codes.tolist()] == [country for country, _, _ in enricher.resolve(keys)]
+    # Codes are stable across calls
+    assert np.array_equal(enricher.location_codes(keys[::-1]), codes[::-1])
+
+
+def test_large_codes_survive_table_store_and_traffic(database_csv):
+    database = open_database(database_csv)
+    enricher = GeoEnricher(database)
+    keys = range_midpoints(database)
+    records = [{"timestamp": datetime(2024, 1, 1, 12, 0, index % 60), "source_ip": "10.0.0.5", "dest_ip": int_to_ip(key),
+                "bytes_sent": 1000, "bytes_received": 500, "protocol": "HTTPS"} for index, key in enumerate(keys.tolist())]
+    columns = flows_from_records(records)
+    enricher.fill_flow_locations(columns)
+    assert int(columns["geo_location"].max()) > 255
+
+    table = FlowTable()
+    table.append_batch(columns)
+    assert np.array_equal(table.column("geo_location"), columns["geo_location"])
+    restored = flow_columns_from_arrow(flow_table_to_arrow(table))
+    assert np.array_equal(restored["geo_location"], columns["geo_location"])
+
+    traffic = TrafficAnalytics()
+    traffic.add_batch(columns)
+    countries = {row["geo_location"] for row in traffic.snapshot["by_geo_location"]}
+    assert countries == {country for country, _, _ in enricher.resolve(keys)}
+    assert len(countries) > 250
+
+
+def test_platform_generates_flows_with_full_database(database_csv, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SOC_DATA_SCALE", "0.05")
+    monkeypatch.setenv("SOC_GEOIP_DB", database_csv)
+    import app
+    platform = app.EnterpriseSOCPlatform()
+    platform.materialize("network_activity")
+    assert len(platform.network_activity) > 0
+    records = [{"timestamp": datetime.now(), "source_ip": "10.0.0.7", "dest_ip": int_to_ip(key), "bytes_sent": 10}
+               for key in range_midpoints(platform.geo.database).tolist()]
+    before = len(platform.network_activity)
+    platform.ingest_columns(flows_from_records(records), [], [], IngestMetrics())
+    assert len(platform.network_activity) == before + len(records)
@@ -0,0 +1,150 @@
+"""Ingest normalization: timestamps, field types and per-record rejection."""
+
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.ingest import IngestMetrics, ProcessIngestPipeline, normalize_alert, normalize_endpoint, normalize_records
+
+NOW = datetime(2024, 1, 1, 12)
+
+
+def flow(index: int):
+    return {"source_ip": "10.0.0.5", "dest_ip": f"198.51.100.{index % 250 + 1}", "bytes_sent": 100 + index,
+            "protocol": "HTTPS"}
+
+
+def test_aware_timestamps_become_naive_local_time():
+    expected = datetime(2024, 3, 5, 8, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    for value in ("2024-03-05T08:30:00Z", "2024-03-05T08:30:00+00:00", "2024-03-05T10:30:00+02:00",
+                  datetime(2024, 3, 5, 8, 30, tzinfo=timezone.utc)):
+        alert = normalize_alert({"alert_id": "A-1", "timestamp": value}, NOW)
+        assert alert["timestamp"] == expected
+        assert alert["timestamp"].tzinfo is None
+    endpoint = normalize_endpoint({"endpoint_id": "EP-1", "last_seen": "2024-03-05T08:30:00+00:00"}, NOW)
+    assert endpoint["last_seen"] == expected
+    assert endpoint["last_scan"] == NOW
+
+
+def test_fields_are_coerced_to_their_schema_types():
+    alert = normalize_alert({"alert_id": "A-1", "confidence": "87.0", "dest_port": "443", "false_positive": "false"}, NOW)
+    assert (alert["confidence"], alert["dest_port"], alert["false_positive"]) == (87, 443, False)
+    endpoint = normalize_endpoint({"endpoint_id": "EP-1", "risk_score": "85", "threats_detected": 2.0}, NOW)
+    assert endpoint["risk_score"] == 85 and endpoint["risk_score"] > 70
+    assert endpoint["threats_detected"] == 2
+
+
+@pytest.mark.parametrize("record", [
+    {"alert_id": "A-2", "timestamp": "yesterday"},
+    {"alert_id": "A-3", "confidence": "high"},
+    {"alert_id": "A-4", "confidence": 400},
+    {"alert_id": "A-5", "source_port": 70000},
+])
+def test_unusable_alerts_raise_value_error(record):
+    with pytest.raises(ValueError):
+        normalize_alert(record, NOW)
+
+
+def test_normalize_records_keeps_good_records_and_counts_bad_ones():
+    records = [{"alert_id": "A-1"}, {"alert_id": "A-2", "confidence": "high"}, {"alert_id": "A-3", "timestamp": 1.7e9}]
+    alerts, rejected = normalize_records(records, normalize_alert, NOW)
+    assert [alert["alert_id"] for alert in alerts] == ["A-1", "A-3"]
+    assert rejected == 1
+
+
+def test_platform_batch_survives_a_bad_alert(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SOC_DATA_SCALE", "0.05")
+    import app
+    platform = app.EnterpriseSOCPlatform()
+    platform.materialize("network_activity", "ids_alerts", "endpoint_telemetry")
+    flows, alerts, endpoints = len(platform.network_activity), len(platform.ids_alerts), len(platform.endpoint_telemetry)
+    at_risk = platform.aggregates.get("endpoint_telemetry", "endpoints_at_risk")
+    metrics = IngestMetrics()
+    batch = {
+        "network_activity": [flow(index) for index in range(3)],
+        "ids_alerts": [{"alert_id": "A-1", "timestamp": "2024-01-01T10:00:00+00:00", "severity": "High"},
+                       {"alert_id": "A-2", "confidence": "high"}],
+        "endpoint_telemetry": [{"endpoint_id": "EP-NEW", "hostname": "WS-NEW", "risk_score": "91"}],
+    }
+    platform.ingest_batch(batch, metrics)
+    assert len(platform.network_activity) == flows + 3
+    assert len(platform.ids_alerts) == alerts + 1
+    assert platform.ids_alerts[-1]["timestamp"].tzinfo is None
+    assert len(platform.endpoint_telemetry) == endpoints + 1
+    assert platform.aggregates.get("endpoint_telemetry", "endpoints_at_risk") == at_risk + 1
+    assert metrics.parse_errors == 1
+    # Naive timestamps throughout, so expiry compares without a TypeError
+    platform.expire_records(datetime.now())
+
+
+def test_endpoint_upserts_follow_record_changes_and_regeneration(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SOC_DATA_SCALE", "0.05")
+    import app
+    platform = app.EnterpriseSOCPlatform()
+    metrics = IngestMetrics()
+
+    def upsert(**endpoint):
+        platform.ingest_columns(None, [], [normalize_endpoint(endpoint, NOW)], metrics)
+
+    # An update to a generated endpoint changes it in place
+    existing = platform.endpoint_telemetry[0]
+    count = len(platform.endpoint_telemetry)
+    upsert(endpoint_id=existing["endpoint_id"], hostname=existing["hostname"], risk_score=99)
+    assert len(platform.endpoint_telemetry) == count and existing["risk_score"] == 99
+
+    upsert(endpoint_id="EP-NEW", hostname="WS-NEW", risk_score=10)
+    added = platform.endpoint_telemetry[-1]
+    upsert(endpoint_id="EP-NEW", hostname="WS-NEW", risk_score=20)
+    assert len(platform.endpoint_telemetry) == count + 1 and added["risk_score"] == 20
+
+    # Renamed and removed endpoints are matched by their current ids only
+    platform.update_record("endpoint_telemetry", added, endpoint_id="EP-RENAMED")
+    upsert(endpoint_id="EP-RENAMED", hostname="WS-NEW", risk_score=30)
+    assert len(platform.endpoint_telemetry) == count + 1 and added["risk_score"] == 30
+    platform.remove_record("endpoint_telemetry", added)
+    upsert(endpoint_id="EP-RENAMED", hostname="WS-NEW", risk_score=40)
+    assert len(platform.endpoint_telemetry) == count + 1 and added["risk_score"] == 30
+
+    # A regenerated dataset is a new list of new records
+    platform.generate_endpoint_telemetry()
+    regenerated = platform.endpoint_telemetry[0]
+    upsert(endpoint_id=regenerated["endpoint_id"], hostname=regenerated["hostname"], risk_score=77)
+    assert regenerated["risk_score"] == 77 and len(platform.endpoint_telemetry) == count
+    upsert(endpoint_id="EP-RENAMED", hostname="WS-NEW", risk_score=50)
+    assert len(platform.endpoint_telemetry) == count + 1
+
+
+def test_process_worker_keeps_flows_when_an_alert_is_bad(tmp_path):
+    path = tmp_path / "events.ndjson"
+    records = [flow(index) for index in range(5)] + [
+        {"alert_id": "A-1", "timestamp": "2024-01-01T10:00:00Z", "confidence": "90"},
+        {"alert_id": "A-2", "timestamp": "not a time"},
+    ]
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    received = {"flows": 0, "alerts": []}
+
+    def sink(flows, alerts, endpoints, metrics):
+        received["flows"] += 0 if flows is None else len(flows["bytes_sent"])
+        received["alerts"].extend(alerts)
+
+    pipeline = ProcessIngestPipeline(sink, f"ndjson:{path}", workers=1, flow_capacity=1024, alert_capacity=64,
+                                     from_start=True)
+    pipeline.start()
+    try:
+        deadline = time.monotonic() + 60
+        while (received["flows"] < 5 or not received["alerts"]) and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        pipeline.stop()
+    assert received["flows"] == 5
+    assert [alert["alert_id"] for alert in received["alerts"]] == ["A-1"]
+    assert received["alerts"][0]["confidence"] == 90
+    assert pipeline.metrics.parse_errors == 1
@@ -0,0 +1,110 @@
+"""IOC matching: Aho-Corasick URL patterns, domains, nested CIDRs and the feed watcher."""
+
+import ipaddress
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.flows import pack_ip_strings
+from soc.ioc import AhoCorasick, IOCEngine, IOCSet
+
+
+def naive_search(patterns, text):
+    text = text.lower()
+    return sorted(ioc_id for pattern, ioc_id in patterns
+                  for start in range(len(text)) if text.startswith(pattern.lower(), start))
+
+
+def test_aho_corasick_matches_every_occurrence():
+    patterns = [("he", 0), ("she", 1), ("his", 2), ("hers", 3), ("/wp-admin/", 4), ("${jndi:", 5), ("cmd.exe /c", 6)]
+    automaton = AhoCorasick(patterns)
+    for text in ["ushers", "SHE said HIS hers", "GET /WP-Admin/setup.php", "${jndi:ldap://x}${jndi:", "nothing here",
+                 "Cmd.exe /C whoami", ""]:
+        assert sorted(automaton.search(text)) == naive_search(patterns, text)
+
+
+def test_aho_corasick_against_naive_search_on_random_text():
+    rng = np.random.default_rng(5)
+    alphabet = np.array(list("abc/."))
+    patterns = [("".join(rng.choice(alphabet, rng.integers(1, 5))), ioc_id) for ioc_id in range(40)]
+    automaton = AhoCorasick(patterns)
+    for _ in range(50):
+        text = "".join(rng.choice(alphabet, 60))
+        assert sorted(automaton.search(text)) == naive_search(patterns, text)
+
+
+def test_domains_match_on_parent_domains_only():
+    compiled = IOCSet([{"type": "domain", "value": "Evil.Example.COM."}, {"type": "domain", "value": "bad.ru"}])
+    assert compiled.match_domain("evil.example.com") == 0
+    assert compiled.match_domain("cdn.a.EVIL.example.com.") == 0
+    assert compiled.match_domain("notevil.example.com") is None
+    assert compiled.match_domain("example.com") is None
+    assert compiled.match_domain("bad.ru.example.org") is None
+    assert compiled.match_record({"query": "x.bad.ru", "url": "http://evil.example.com/"}) == [1]
+
+
+def test_cidrs_resolve_to_the_most_specific_range():
+    indicators = [{"type": "cidr", "value": "10.0.0.0/8"}, {"type": "cidr", "value": "10.1.0.0/16"},
+                  {"type": "cidr", "value": "10.1.2.0/24"}, {"type": "cidr", "value": "192.168.0.0/16"},
+                  {"type": "cidr", "value": "10.1.0.0/16"}, {"type": "ip", "value": "172.16.0.9"},
+                  {"type": "cidr", "value": "not a network"}, {"type": "cidr", "value": "2001:db8::/32"}]
+    compiled = IOCSet(indicators)
+    rng = np.random.default_rng(9)
+    ips = np.concatenate([pack_ip_strings(["10.1.2.3", "10.1.9.9", "10.200.0.1", "192.168.255.255", "172.16.0.9",
+                                           "172.16.0.10", "9.255.255.255", "11.0.0.0"]),
+                          rng.integers(0, 2 ** 32, 2000, dtype=np.uint64).astype(np.uint32)])
+    networks = [(ipaddress.ip_network(indicator["value"]), ioc_id) for ioc_id, indicator in enumerate(indicators[:4])]
+    positions, ids = compiled.match_ips(ips)
+    found = dict(zip(positions.tolist(), ids.tolist()))
+    for position, packed in enumerate(ips.tolist()):
+        address = ipaddress.ip_address(packed)
+        containing = [(network.prefixlen, ioc_id) for network, ioc_id in networks if address in network]
+        expected = max(containing)[1] if containing else (5 if str(address) == "172.16.0.9" else None)
+        assert found.get(position) == expected, str(address)
+
+
+def test_match_batch_counts_hits_across_flows_and_records():
+    engine = IOCEngine()
+    engine.load([{"type": "ip", "value": "203.0.113.7", "threat": "APT29"},
+                 {"type": "url", "value": "/shell.php", "threat": "Webshell"},
+                 {"type": "hash", "value": "ABCDEF"}])
+    flows = {"source_ip": pack_ip_strings(["203.0.113.7", "10.0.0.1"]),
+             "dest_ip": pack_ip_strings(["10.0.0.2", "203.0.113.7"])}
+    records = [{"source_ip": "203.0.113.7", "payload_info": "POST /Shell.php?x=/shell.php"}, {"md5": "abcdef"}]
+    hits = {hit["value"]: hit["count"] for hit in engine.match_batch(flows, records)}
+    assert hits == {"203.0.113.7": 3, "/shell.php": 2, "ABCDEF": 1}
+    assert engine.matches_total == 6
+
+
+def test_feed_watcher_reloads_and_stops(tmp_path):
+    feed = tmp_path / "feed.csv"
+    feed.write_text("type,value,threat\nip,198.51.100.1,Botnet\n")
+    engine = IOCEngine()
+    engine.watch(str(feed), interval=0.05)
+    deadline = time.monotonic() + 10
+    while engine.version < 1 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(engine.compiled) == 1
+    watcher = engine._watcher
+    engine.stop()
+    assert not watcher.is_alive()
+    assert engine._watcher is None
+
+
+def test_platform_shutdown_stops_the_feed_watcher(tmp_path, monkeypatch):
+    feed = tmp_path / "feed.csv"
+    feed.write_text("ip,198.51.100.1,Botnet\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SOC_DATA_SCALE", "0.05")
+    monkeypatch.setenv("SOC_IOC_FEED", str(feed))
+    import app
+    platform = app.EnterpriseSOCPlatform()
+    platform.materialize("ioc_engine")
+    watcher = platform.ioc_engine._watcher
+    assert watcher.is_alive()
+    platform.shutdown()
+    assert not watcher.is_alive()
@@ -0,0 +1,109 @@
+"""Packed IP index: exact, CIDR and set lookups against a brute-force scan."""
+
+import ipaddress
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.flows import FlowTable, flows_from_records
+from soc.ipindex import PlatformIPIndex, SortedIPColumn, pack_ip_values
+
+FIELDS = {"ids_alerts": ("source_ip", "dest_ip"), "network_activity": ("source_ip", "dest_ip")}
+
+
+def random_ip(rng) -> str:
+    kind = rng.random()
+    if kind < 0.05:
+        return f"2001:db8::{int(rng.integers(0, 0xFFFF)):x}"
+    if kind < 0.07:
+        return "not-an-ip"
+    return f"10.{int(rng.integers(0, 4))}.{int(rng.integers(0, 256))}.{int(rng.integers(0, 256))}"
+
+
+def brute_force(records, query, fields=("source_ip", "dest_ip")):
+    networks = [ipaddress.ip_network(item, strict=False) for item in query]
+    rows = []
+    for row, record in enumerate(records):
+        for field in fields:
+            try:
+                address = ipaddress.ip_address(record.get(field))
+            except (TypeError, ValueError):
+                continue
+            if any(address.version == network.version and address in network for network in networks):
+                rows.append(row)
+                break
+    return rows
+
+
+def test_record_lookups_match_a_scan_across_incremental_syncs():
+    rng = np.random.default_rng(3)
+    index = PlatformIPIndex(FIELDS)
+    records = []
+    queries = [["10.1.2.3"], ["10.1.0.0/16"], ["10.0.0.0/8"], ["10.2.3.0/24", "10.3.9.9", "10.3.9.10"],
+               ["2001:db8::/112"], ["192.168.0.0/16"]]
+    for batch in range(12):
+        records.extend({"source_ip": random_ip(rng), "dest_ip": random_ip(rng)} for _ in range(int(rng.integers(1, 800))))
+        # Make sure exact lookups have something to find
+        records.append({"source_ip": "10.1.2.3", "dest_ip": "10.3.9.9"})
+        index.sync("ids_alerts", records)
+        assert index.indexed_rows("ids_alerts", records) == len(records)
+        for query in queries:
+            assert index.lookup("ids_alerts", query).tolist() == brute_force(records, query)
+    assert index.lookup("ids_alerts", "10.1.2.3", fields=["dest_ip"]).tolist() == \
+        brute_force(records, ["10.1.2.3"], fields=["dest_ip"])
+    assert index.lookup("ids_alerts", "10.1.2.3, 10.3.9.9").tolist() == brute_force(records, ["10.1.2.3", "10.3.9.9"])
+
+
+def test_replaced_or_edited_datasets_are_reindexed():
+    index = PlatformIPIndex(FIELDS)
+    records = [{"source_ip": "10.0.0.1", "dest_ip": "10.0.0.2"}, {"source_ip": "10.0.0.3", "dest_ip": "10.0.0.4"}]
+    index.sync("ids_alerts", records)
+    assert index.lookup("ids_alerts", "10.0.0.3").tolist() == [1]
+
+    # Edited in place: only an invalidation tells the index
+    records[1]["source_ip"] = "10.9.9.9"
+    index.invalidate("ids_alerts")
+    assert index.indexed_rows("ids_alerts", records) == 0
+    index.sync("ids_alerts", records)
+    assert index.lookup("ids_alerts", "10.0.0.3").tolist() == []
+    assert index.lookup("ids_alerts", "10.9.9.9").tolist() == [1]
+
+    # A new list (as expiry assigns) is rebuilt from scratch
+    kept = records[1:]
+    index.sync("ids_alerts", kept)
+    assert index.lookup("ids_alerts", "10.9.9.9").tolist() == [0]
+
+
+def test_flow_table_lookups_and_run_count():
+    rng = np.random.default_rng(4)
+    index = PlatformIPIndex(FIELDS)
+    table = FlowTable()
+    records = []
+    for _ in range(20):
+        batch = [{"timestamp": "2024-01-01T12:00:00", "source_ip": f"10.0.{int(rng.integers(0, 8))}.{int(rng.integers(0, 256))}",
+                  "dest_ip": f"198.51.100.{int(rng.integers(0, 256))}", "bytes_sent": 1} for _ in range(int(rng.integers(1, 500)))]
+        records.extend(batch)
+        table.append_batch(flows_from_records(batch))
+        index.sync("network_activity", table)
+    for query in (["10.0.3.0/24"], ["198.51.100.7"], ["10.0.0.0/21", "198.51.100.200"]):
+        assert index.lookup("network_activity", query).tolist() == brute_force(records, query)
+    column = index._columns["network_activity"]["source_ip"]
+    assert column.run_count <= math.ceil(math.log2(len(records))) + 1
+
+
+def test_column_range_and_members_with_ipv6():
+    values = ["10.0.0.5", "10.0.0.1", "2001:db8::1", "10.0.0.5", "2001:db8::ff", "bogus"]
+    keys, positions, v6 = pack_ip_values(values)
+    assert keys.tolist() == [int(ipaddress.ip_address(value)) for value in ("10.0.0.5", "10.0.0.1", "10.0.0.5")]
+    assert positions.tolist() == [0, 1, 3]
+    column = SortedIPColumn()
+    column.add(keys, positions, v6)
+    assert len(column) == 5
+    assert sorted(column.members(np.asarray([int(ipaddress.ip_address("10.0.0.5"))])).tolist()) == [0, 3]
+    assert sorted(column.range(int(ipaddress.ip_address("10.0.0.0")), int(ipaddress.ip_address("10.0.0.3"))).tolist()) == [1]
+    network = ipaddress.ip_network("2001:db8::/120")
+    assert column.range(int(network.network_address), int(network.broadcast_address), 6).tolist() == [2, 4]
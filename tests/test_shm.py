@@ -0,0 +1,101 @@
+"""Shared-memory rings: wrap-around, backpressure and row packing."""
+
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.shm import ALERT_ROW, BATCHES, SharedRing, alert_records, alert_rows
+
+ROW = np.dtype([("value", np.int64), ("written_ns", np.int64)])
+
+
+def rows(start: int, count: int) -> np.ndarray:
+    batch = np.zeros(count, dtype=ROW)
+    batch["value"] = np.arange(start, start + count)
+    return batch
+
+
+def drained(ring: SharedRing) -> list:
+    views = ring.peek()
+    values = [value for view in views for value in view["value"].tolist()]
+    ring.consume(len(values))
+    return values
+
+
+def test_reads_wrap_around_the_end_of_the_ring():
+    ring = SharedRing(ROW, capacity=8)
+    reader = SharedRing(ROW, name=ring.name)
+    try:
+        assert reader.capacity == 8
+        ring.write(rows(0, 5))
+        assert drained(reader) == [0, 1, 2, 3, 4]
+        # Six more rows start at slot 5, so three land at the end and three at the front
+        ring.write(rows(5, 6))
+        views = reader.peek()
+        assert [len(view) for view in views] == [3, 3]
+        assert reader.peek(limit=2)[0]["value"].tolist() == [5, 6]
+        assert drained(reader) == list(range(5, 11))
+        assert len(reader) == 0 and reader.peek() == []
+        for start in range(11, 200, 7):
+            ring.write(rows(start, 7))
+            assert drained(reader) == list(range(start, start + 7))
+        assert int(reader.header[BATCHES]) == 2 + len(range(11, 200, 7))
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_full_ring_blocks_the_writer_until_the_reader_consumes():
+    ring = SharedRing(ROW, capacity=8)
+    reader = SharedRing(ROW, name=ring.name)
+    done = threading.Event()
+    writer = threading.Thread(target=lambda: (ring.write(rows(0, 20), wait=0.001), done.set()))
+    try:
+        writer.start()
+        received = []
+        while len(received) < 20:
+            # The writer can never get more than a ring's worth ahead
+            assert len(reader) <= 8
+            if len(reader) == 8 and len(received) + 8 < 20:
+                time.sleep(0.01)
+                assert not done.is_set()
+            received.extend(drained(reader))
+        writer.join(5)
+        assert done.is_set()
+        assert received == list(range(20))
+    finally:
+        writer.join(5)
+        reader.close()
+        ring.close()
+
+
+def test_stopped_writer_gives_up_on_a_full_ring():
+    ring = SharedRing(ROW, capacity=4)
+    try:
+        assert ring.write(rows(0, 4))
+        started = time.monotonic()
+        assert not ring.write(rows(4, 1), wait=0.001, should_stop=lambda: time.monotonic() - started > 0.05)
+        assert len(ring) == 4
+    finally:
+        ring.close()
+
+
+def test_alert_rows_round_trip_with_truncation():
+    alerts = [{"alert_id": "ALT-1", "timestamp": datetime(2024, 1, 1, 12, 0, 5), "attack_type": "SQL Injection",
+               "source_ip": "203.0.113.9", "dest_ip": "10.0.0.5", "severity": "High", "confidence": 87,
+               "payload_info": "x" * 500, "false_positive": True, "extra": "dropped"},
+              {"alert_id": "ALT-2", "timestamp": datetime(2024, 1, 1, 12, 0, 6), "confidence": "n/a"}]
+    packed = alert_rows(alerts, written_ns=123)
+    assert packed.dtype == ALERT_ROW
+    first, second = alert_records(packed)
+    assert first["alert_id"] == "ALT-1" and first["timestamp"] == alerts[0]["timestamp"]
+    assert first["confidence"] == 87 and first["false_positive"] is True
+    assert first["payload_info"] == "x" * 128
+    assert "extra" not in first and "written_ns" not in first
+    assert second["confidence"] == 0 and second["severity"] == ""
@@ -0,0 +1,89 @@
+"""Hourly Parquet event store: round trips, compaction, retention and schema drift."""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.flows import FlowTable, flows_from_records
+from soc.store import RECORD_SCHEMAS, EventStore, flow_columns_from_arrow, flow_table_to_arrow
+
+HOUR = datetime(2024, 1, 1, 10)
+
+
+def alert(minute: int, **fields):
+    record = {"alert_id": f"ALT-{minute}", "timestamp": HOUR + timedelta(minutes=minute), "attack_type": "SQL Injection",
+              "source_ip": "203.0.113.9", "dest_ip": "10.0.0.5", "severity": "High", "confidence": 80,
+              "false_positive": False}
+    record.update(fields)
+    return record
+
+
+def part_files(store, dataset):
+    return [name for _, path in store.partitions(dataset) for name in os.listdir(path)]
+
+
+def test_flow_round_trip_and_pruned_reads(tmp_path):
+    store = EventStore(str(tmp_path))
+    records = [{"timestamp": HOUR + timedelta(minutes=20 * index), "source_ip": "10.0.0.1", "dest_ip": "8.8.8.8",
+                "bytes_sent": 5_000_000_000 + index, "protocol": "DNS"} for index in range(6)]
+    table = FlowTable()
+    table.append_batch(flows_from_records(records))
+    assert store.write("network_activity", flow_table_to_arrow(table)) == 6
+    assert len(store.partitions("network_activity")) == 2
+
+    restored = flow_columns_from_arrow(store.read("network_activity"))
+    assert np.array_equal(restored["bytes_sent"], table.column("bytes_sent"))
+    assert np.array_equal(restored["protocol"], table.column("protocol"))
+
+    window = store.read("network_activity", start=HOUR + timedelta(minutes=30), end=HOUR + timedelta(minutes=70),
+                        columns=["bytes_sent"])
+    assert window.column_names == ["bytes_sent"]
+    assert window.column("bytes_sent").to_pylist() == [5_000_000_002, 5_000_000_003]
+
+
+def test_records_are_cast_to_the_dataset_schema(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.write_records("ids_alerts", [alert(1)])
+    store.write_records("ids_alerts", [alert(2, confidence="high", extra_label="dropped"),
+                                       alert(3, timestamp="2024-01-01T10:03:00")])
+    table = store.read("ids_alerts")
+    assert table.schema.equals(RECORD_SCHEMAS["ids_alerts"])
+    assert sorted(table.column("confidence").to_pylist(), key=str) == [80, 80, None]
+    assert "extra_label" not in table.column_names
+
+
+def test_compaction_merges_closed_hours_with_mixed_legacy_files(tmp_path):
+    store = EventStore(str(tmp_path))
+    # Written the way the store used to write records: whatever types pandas inferred
+    legacy = pa.Table.from_pandas(pd.DataFrame.from_records([alert(5, confidence="high")]), preserve_index=False)
+    store.write("ids_alerts", legacy)
+    store.write_records("ids_alerts", [alert(1)])
+    store.write_records("ids_alerts", [alert(9)])
+    assert len(part_files(store, "ids_alerts")) == 3
+    assert store.read("ids_alerts").num_rows == 3
+
+    # The current hour is still being written and is left alone
+    assert store.compact(now=HOUR + timedelta(minutes=30)) == 0
+    assert store.compact(now=HOUR + timedelta(hours=1)) == 1
+    assert len(part_files(store, "ids_alerts")) == 1
+    merged = store.read("ids_alerts")
+    assert merged.column("alert_id").to_pylist() == ["ALT-1", "ALT-5", "ALT-9"]
+    assert merged.column("confidence").to_pylist() == [80, None, 80]
+
+
+def test_retention_drops_whole_old_partitions(tmp_path):
+    store = EventStore(str(tmp_path), retention_days=1)
+    store.write_records("honeypot_data", [{"honeypot_id": "HP-1", "timestamp": HOUR, "credentials_tried": "7"}])
+    store.write_records("honeypot_data", [{"honeypot_id": "HP-2", "timestamp": HOUR + timedelta(days=2)}])
+    result = store.maintain(now=HOUR + timedelta(days=2, hours=2))
+    assert result["expired"] == 1
+    table = store.read("honeypot_data")
+    assert table.column("honeypot_id").to_pylist() == ["HP-2"]
+    assert not os.path.exists(os.path.join(str(tmp_path), "honeypot_data", "date=2024-01-01"))
@@ -0,0 +1,115 @@
+"""Full-text index: sync, ring eviction, compaction and search against a scan."""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc import textindex
+from soc.alerts import AlertRingBuffer
+from soc.textindex import TextIndex, tokenize
+
+START = datetime(2024, 1, 1, 12)
+WORDS = ["ransomware", "trojan", "backdoor", "exploit", "kit", "blocked", "beacon", "dns", "tunnel", "payload"]
+
+
+def message(rng) -> str:
+    words = rng.choice(WORDS, int(rng.integers(2, 8))).tolist()
+    return f"{' '.join(words)} from 10.0.{int(rng.integers(0, 3))}.{int(rng.integers(0, 3))}"
+
+
+def has_phrase(text, phrase) -> bool:
+    tokens, wanted = tokenize(text), tokenize(phrase)
+    return any(tokens[index:index + len(wanted)] == wanted for index in range(len(tokens) - len(wanted) + 1))
+
+
+# Query -> the same test as a predicate over one text
+QUERIES = {
+    "ransomware": lambda text: has_phrase(text, "ransomware"),
+    "trojan backdoor": lambda text: has_phrase(text, "trojan") and has_phrase(text, "backdoor"),
+    '"exploit kit"': lambda text: has_phrase(text, "exploit kit"),
+    # AND binds tighter than OR
+    "dns OR tunnel -blocked": lambda text: has_phrase(text, "dns") or (has_phrase(text, "tunnel") and not has_phrase(text, "blocked")),
+    "(dns OR tunnel) -blocked": lambda text: (has_phrase(text, "dns") or has_phrase(text, "tunnel")) and not has_phrase(text, "blocked"),
+    "10.0.1.2 AND (beacon OR payload)": lambda text: has_phrase(text, "10.0.1.2") and (has_phrase(text, "beacon") or has_phrase(text, "payload")),
+    "NOT kit": lambda text: not has_phrase(text, "kit"),
+}
+
+
+def live_texts(index: TextIndex):
+    return [record for record in index._records if record is not None]
+
+
+def assert_matches_scan(index: TextIndex, records, text_field, datasets=None):
+    for query, predicate in QUERIES.items():
+        result = index.search(query, datasets=datasets)
+        expected = sorted(id(record) for record in records if predicate(record[text_field]))
+        found = sorted(id(row) for row in (index._records[doc] for doc in result.docs.tolist()))
+        assert found == expected, query
+
+
+@pytest.fixture
+def small_compaction(monkeypatch):
+    # Compaction normally waits for 4096 tombstones
+    monkeypatch.setattr(textindex, "COMPACT_MIN_DEAD", 50)
+
+
+def test_ring_sync_eviction_compaction_then_search(small_compaction):
+    rng = np.random.default_rng(8)
+    ring = AlertRingBuffer(capacity=200)
+    index = TextIndex()
+    compactions = 0
+    for step in range(30):
+        for offset in range(int(rng.integers(1, 60))):
+            ring.append({"timestamp": START + timedelta(seconds=step * 60 + offset), "message": message(rng),
+                         "severity": "HIGH", "type": "TEST", "user": "SYSTEM"})
+        before = index.stats()["tombstoned"]
+        index.sync("alert_history", ring)
+        stats = index.stats()
+        compactions += stats["tombstoned"] < before
+        # Only the events still in the ring are searchable
+        assert stats["documents"] == len(ring)
+        assert sorted(map(id, live_texts(index))) == sorted(map(id, ring))
+        assert_matches_scan(index, list(ring), "message")
+    assert ring.total_logged > ring.capacity
+    assert compactions > 0
+
+
+def test_retain_dataset_filter_time_range_and_paging(small_compaction):
+    rng = np.random.default_rng(9)
+    index = TextIndex()
+    alerts = [{"timestamp": START + timedelta(minutes=minute), "payload_info": message(rng)} for minute in range(300)]
+    threats = [{"last_activity": START, "description": "ransomware operator using exploit kit"}]
+    index.sync("ids_alerts", alerts)
+    index.sync("live_threats", threats)
+
+    # Expiry replaces the list with the rows it keeps; the index drops the rest without a rebuild
+    keep = [alert["timestamp"] >= START + timedelta(minutes=120) for alert in alerts]
+    kept = [alert for alert, retained in zip(alerts, keep) if retained]
+    index.retain("ids_alerts", alerts, keep, kept)
+    assert index.stats()["tombstoned"] == 120 and len(index) == len(kept) + 1
+    index.sync("ids_alerts", kept)
+    assert len(index) == len(kept) + 1
+    # Dropping another 120 leaves more dead documents than live ones, so the index compacts
+    index.retain("ids_alerts", kept, [row >= 120 for row in range(len(kept))], kept[120:])
+    kept = kept[120:]
+    assert index.stats()["tombstoned"] == 0 and len(index._records) == len(kept) + 1
+    assert_matches_scan(index, kept, "payload_info", datasets=["ids_alerts"])
+
+    result = index.search("ransomware", datasets=["ids_alerts"])
+    assert result.counts() == {"ids_alerts": sum(has_phrase(alert["payload_info"], "ransomware") for alert in kept)}
+    assert index.search('"exploit kit"', datasets=["live_threats"]).total == 1
+
+    window = index.search("ransomware", datasets=["ids_alerts"], start=START + timedelta(minutes=200),
+                          end=START + timedelta(minutes=249))
+    expected = [alert for alert in kept if 200 <= (alert["timestamp"] - START).total_seconds() / 60 <= 249
+                and has_phrase(alert["payload_info"], "ransomware")]
+    assert window.total == len(expected)
+    pages = [window.page(number, page_size=7) for number in range(1, window.pages(7) + 1)]
+    rows = [row for page in pages for row in page.to_dict("records")]
+    # Newest first across pages
+    assert [row["timestamp"] for row in rows] == sorted((alert["timestamp"] for alert in expected), reverse=True)
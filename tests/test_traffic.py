@@ -0,0 +1,82 @@
+"""Traffic analytics: windowed totals, heavy hitters and late flows against exact counts."""
+
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from soc.flows import DEST_PORTS, GEO_LOCATIONS, PROTOCOLS, SERVICES, flows_from_records
+from soc.traffic import CountMinSketch, SpaceSaving, TrafficAnalytics
+
+START = datetime(2024, 1, 1, 12)
+
+
+def flow_records(rng, minute: int, count: int):
+    # Source addresses are Zipf-distributed so a few of them carry most of the bytes
+    talkers = np.minimum(rng.zipf(1.3, count), 5000)
+    return [{"timestamp": START + timedelta(minutes=minute, seconds=int(rng.integers(0, 60))),
+             "source_ip": f"10.0.{talker // 256}.{talker % 256}", "dest_ip": "198.51.100.1",
+             "dest_port": int(rng.choice(DEST_PORTS)) if rng.random() < 0.9 else int(rng.integers(1024, 65536)),
+             "protocol": str(rng.choice(PROTOCOLS)), "service": str(rng.choice(SERVICES)),
+             "geo_location": str(rng.choice(GEO_LOCATIONS)),
+             "bytes_sent": int(rng.integers(100, 100_000)), "bytes_received": int(rng.integers(100, 10_000))}
+            for talker in talkers.tolist()]
+
+
+def test_sketches_never_undercount_and_keep_the_heavy_keys():
+    rng = np.random.default_rng(10)
+    keys = np.minimum(rng.zipf(1.2, 200_000), 1_000_000).astype(np.uint64)
+    sketch, summary = CountMinSketch(width=1024), SpaceSaving(capacity=100)
+    for part in np.array_split(keys, 20):
+        weights = np.ones(len(part), dtype=np.int64)
+        sketch.add(part, weights)
+        summary.update(part, weights)
+    exact = Counter(keys.tolist())
+    distinct = np.asarray(sorted(exact), dtype=np.uint64)
+    estimates = sketch.estimate(distinct)
+    assert np.all(estimates >= np.asarray([exact[key] for key in distinct.tolist()]))
+    # Within the error bound of e / width of the total for nearly every key
+    assert np.mean(estimates - np.asarray([exact[key] for key in distinct.tolist()]) <= 2.72 * len(keys) / 1024) > 0.95
+    top = summary.top(10)
+    assert [key for key, _, _ in top[:5]] == [key for key, _ in exact.most_common(5)]
+    for key, count, error in top:
+        assert count - error <= exact[key] <= count
+
+
+def test_window_totals_top_talkers_and_late_flows():
+    rng = np.random.default_rng(11)
+    analytics = TrafficAnalytics(window_minutes=5, retain_minutes=10, top_k=5, publish_interval=0)
+    records = []
+    for minute in range(20):
+        batch = flow_records(rng, minute, int(rng.integers(200, 800)))
+        records.extend(batch)
+        analytics.add_batch(flows_from_records(batch))
+    snapshot = analytics.snapshot
+    assert snapshot["watermark"] == np.datetime64(START + timedelta(minutes=19), "m")
+    assert len(snapshot["per_minute"]) == 10 and len(analytics.closed) == 10
+
+    window = [record for record in records if record["timestamp"] >= START + timedelta(minutes=15)]
+    assert snapshot["sessions"] == len(window)
+    assert snapshot["bytes"] == sum(record["bytes_sent"] + record["bytes_received"] for record in window)
+    by_protocol = Counter(record["protocol"] for record in window)
+    assert {row["protocol"]: row["sessions"] for row in snapshot["by_protocol"]} == by_protocol
+
+    talker_bytes = Counter()
+    for record in window:
+        talker_bytes[record["source_ip"]] += record["bytes_sent"] + record["bytes_received"]
+    top = snapshot["top_talkers"]
+    assert top[0]["source_ip"] == talker_bytes.most_common(1)[0][0]
+    for row in top:
+        assert row["bytes"] >= talker_bytes[row["source_ip"]]
+    ports = Counter(record["dest_port"] for record in window)
+    assert {row["dest_port"] for row in snapshot["top_ports"][:3]} == {port for port, _ in ports.most_common(3)}
+
+    # Flows older than the retained minutes are counted, not folded in
+    sessions = snapshot["sessions"]
+    analytics.add_batch(flows_from_records(flow_records(rng, 2, 50)))
+    assert analytics.late_flows == 50
+    assert analytics.snapshot["sessions"] == sessions